@@ -0,0 +1,204 @@
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Union
+from urllib.parse import parse_qs, urlparse
+
+from google.api_core.exceptions import ResourceExhausted
+
+# Small vocabulary so queries share terms with the documents
+WORDS = (
+    "alpha beta gamma delta epsilon zeta theta kappa lambda sigma omega cache index shard replica "
+    "token session timeout retry backoff queue worker batch stream buffer latency throughput "
+    "deploy rollback config secret rotate certificate oauth refresh gateway proxy ingress service "
+    "database migration schema column vector embedding search ranking filter payload cluster node "
+    "error warning failure incident alert metric trace span log audit policy quota limit").split()
+
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng: random.Random) -> str:
+    return " ".join(sentence(rng) for _ in range(rng.randint(3, 7)))
+
+
+def document(rng: random.Random, paragraphs: int) -> str:
+    # A serial number keeps documents distinct, so dedup never skips one
+    return f"Document {rng.getrandbits(48):x}.\n\n" + "\n\n".join(paragraph(rng) for _ in range(paragraphs))
+
+
+def fake_vector(text: str, dim: int) -> List[float]:
+    """Bag of hashed words, normalised: texts sharing words get similar vectors."""
+    vector = [0.0] * dim
+    for word in text.casefold().split():
+        vector[zlib.crc32(word.strip(".,").encode()) % dim] += 1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class FakeGeminiAPI:
+    """
+    Stand-in for `genai.embed_content_async`. Each call sleeps `latency` seconds
+    (+/- `jitter`) plus `per_item` seconds per input, and fails with
+    ResourceExhausted with probability `failure_rate`, so the real GeminiEmbedder
+    batching, concurrency and retry paths run unchanged.
+    """
+
+    def __init__(self, dimension: int, latency: float = 0.05, jitter: float = 0.0, per_item: float = 0.0,
+                 failure_rate: float = 0.0, seed: int = 0):
+        self.dimension = dimension
+        self.latency = latency
+        self.jitter = jitter
+        self.per_item = per_item
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.failures = 0
+        self.inputs = 0
+        self._rng = random.Random(seed)
+
+    async def embed_content_async(self, model: str, content: Union[str, List[str]],
+                                  task_type: Optional[str] = None, title: Optional[str] = None) -> Dict:
+        self.calls += 1
+        texts = content if isinstance(content, list) else [content]
+        delay = self.latency + self._rng.uniform(-self.jitter, self.jitter) + self.per_item * len(texts)
+        await asyncio.sleep(max(0.0, delay))
+        if self._rng.random() < self.failure_rate:
+            self.failures += 1
+            raise ResourceExhausted("Injected quota error")
+        self.inputs += len(texts)
+        vectors = [fake_vector(text, self.dimension) for text in texts]
+        return {"embedding": vectors if isinstance(content, list) else vectors[0]}
+
+    def stats(self) -> Dict[str, int]:
+        return {"embed_calls": self.calls, "embed_failures": self.failures, "embedded_texts": self.inputs}
+
+
+class ConfluenceMock:
+    """
+    Local Confluence REST API serving a space of `pages` generated pages: the
+    paged `content` listing and `content/search` by CQL id list. Each response
+    is delayed by `latency` seconds, and every `throttle_every`-th request is
+    answered with 429 and a Retry-After of `retry_after` seconds. Pages are at
+    version 1 unless set in `versions`; ids in `unindexed` are listed but not
+    found by search, like pages the search index has not caught up with.
+    """
+
+    def __init__(self, pages: int, paragraphs: int = 8, latency: float = 0.02,
+                 throttle_every: int = 0, retry_after: float = 1.0, seed: int = 0):
+        rng = random.Random(seed)
+        self.pages = {str(100000 + i): (f"Page {i}", "".join(f"<p>{paragraph(rng)}</p>" for _ in range(paragraphs)))
+                      for i in range(pages)}
+        self.versions: Dict[str, int] = {}
+        self.unindexed: Set[str] = set()
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "ConfluenceMock":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"confluence_requests": self.requests, "confluence_throttled": self.throttled}
+
+    def _respond(self, path: str, query: Dict[str, List[str]]):
+        with self._lock:
+            self.requests += 1
+            throttle = self.throttle_every and self.requests % self.throttle_every == 0
+            if throttle:
+                self.throttled += 1
+        if throttle:
+            return 429, None
+        time.sleep(self.latency)
+        if path.endswith("/content"):
+            start, limit = int(query["start"][0]), int(query["limit"][0])
+            ids = list(self.pages)[start:start + limit]
+            return 200, {
+                "results": [{"id": page_id,
+                             "version": {"number": self.versions.get(page_id, 1), "when": "2024-01-01T00:00:00Z"}}
+                            for page_id in ids],
+                "_links": {"next": "more"} if start + limit < len(self.pages) else {},
+            }
+        if path.endswith("/content/search"):
+            cql = query["cql"][0]
+            ids = cql[cql.index("(") + 1:cql.rindex(")")].split(",")
+            return 200, {"results": [
+                {"id": page_id, "title": self.pages[page_id][0], "version": {"number": self.versions.get(page_id, 1)},
+                 "body": {"storage": {"value": self.pages[page_id][1]}}}
+                for page_id in ids if page_id in self.pages and page_id not in self.unindexed]}
+        return 404, {"message": "Not found"}
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, body = mock._respond(url.path, parse_qs(url.query))
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", str(mock.retry_after))
+                    self.end_headers()
+                    return
+                data = json.dumps(body).encode()
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """A minimal PDF with one Helvetica text page per entry of `pages`."""
+    objects: List[bytes] = []
+    page_refs = []
+    font_id = 3
+    for index, text in enumerate(pages):
+        content_id, page_id = 4 + 2 * index, 5 + 2 * index
+        lines = [text[i:i + 90] for i in range(0, len(text), 90)][:60]
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+        stream = ("BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({line}) '" for line in escaped) + " ET").encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 %d 0 R >> >> "
+                       b"/Contents %d 0 R >>" % (font_id, content_id))
+        page_refs.append(b"%d 0 R" % page_id)
+
+    header = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(page_refs) + b"] /Count %d >>" % len(pages),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(header + objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref)
+    return bytes(out)
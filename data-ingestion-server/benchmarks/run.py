@@ -0,0 +1,353 @@
+"""
+End-to-end benchmarks of the ingestion and search hot paths, without Gemini,
+Confluence or a Qdrant server.
+
+    python -m benchmarks.run                              # all scenarios
+    python -m benchmarks.run --scenarios ingest,search --save-baseline main
+    python -m benchmarks.run --compare main               # exit 1 on regression
+
+Each scenario runs in a fresh process, so its peak RSS is its own.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+SCENARIOS = ("ingest", "confluence", "pdf", "search")
+# Metric -> whether higher is better; compared against baselines
+COMPARED_METRICS = {"throughput": True, "p95_ms": False, "peak_rss_mb": False}
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def summarize(latencies: List[float], wall: float, work: float, unit: str, **extra: Any) -> Dict[str, Any]:
+    return {
+        "operations": len(latencies),
+        "throughput": work / wall if wall else 0.0,
+        "throughput_unit": unit,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "wall_s": wall,
+        **extra,
+    }
+
+
+# --- Scenarios (run in a child process) ---
+
+
+def _setup(options: Dict[str, Any], workdir: str):
+    """Point the server's state at `workdir` and Gemini at the fake, then import it."""
+    os.environ.update({
+        "GEMINI_API_KEY": "benchmark",
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.sqlite3"),
+        "CONFLUENCE_STATE_PATH": os.path.join(workdir, "confluence_state.sqlite3"),
+        "JOB_STORE_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "JOB_SPOOL_DIR": os.path.join(workdir, "uploads"),
+        "CONFLUENCE_SPACE_KEY": "BENCH",
+    })
+    import google.generativeai as genai
+    from src.service.embedding_service import GEMINI_EMBED_DIMENSION
+    from .fakes import FakeGeminiAPI
+
+    api = FakeGeminiAPI(GEMINI_EMBED_DIMENSION, latency=options["embed_latency"], jitter=options["embed_jitter"],
+                        per_item=options["embed_per_item"], failure_rate=options["failure_rate"],
+                        seed=options["seed"])
+    genai.embed_content_async = api.embed_content_async
+    return api
+
+
+def _clients(options: Dict[str, Any]):
+    from qdrant_client import AsyncQdrantClient
+    from src.service.embedders import create_embedders
+    from src.service.embedding_cache import EmbeddingCache
+
+    qdrant = AsyncQdrantClient(url=options["qdrant_url"]) if options["qdrant_url"] else AsyncQdrantClient(":memory:")
+    # Memory-only cache, so repeated runs do not answer from an earlier run's vectors
+    return qdrant, create_embedders(EmbeddingCache(None), default="gemini", collection_embedders="")
+
+
+async def _segments(text: str):
+    for part in text.split("\n\n"):
+        yield part
+
+
+async def _ingest_documents(qdrant, embedders, texts: List[str], collection: str, concurrency: int):
+    from src.core.ingest_controller import ingest_file_to_qdrant
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    chunks = 0
+
+    async def ingest(index: int, text: str):
+        nonlocal chunks
+        async with semaphore:
+            start = time.perf_counter()
+            chunks += await ingest_file_to_qdrant(qdrant, embedders, _segments(text), f"doc-{index}.txt", collection)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(ingest(index, text) for index, text in enumerate(texts)))
+    return latencies, chunks
+
+
+async def bench_ingest(options: Dict[str, Any], api) -> Dict[str, Any]:
+    from .fakes import document
+
+    rng = random.Random(options["seed"])
+    texts = [document(rng, options["doc_paragraphs"]) for _ in range(options["docs"])]
+    qdrant, embedders = _clients(options)
+    try:
+        start = time.perf_counter()
+        latencies, chunks = await _ingest_documents(
+            qdrant, embedders, texts, "bench_ingest", options["ingest_concurrency"])
+        wall = time.perf_counter() - start
+    finally:
+        await qdrant.close()
+        embedders.close()
+    return summarize(latencies, wall, chunks, "chunks/s", chunks=chunks, **api.stats())
+
+
+async def bench_confluence(options: Dict[str, Any], api) -> Dict[str, Any]:
+    import src.core.ingest_controller as controller
+    from .fakes import ConfluenceMock
+
+    mock = ConfluenceMock(options["pages"], latency=options["confluence_latency"],
+                          throttle_every=options["confluence_throttle_every"], seed=options["seed"]).start()
+    controller.CONFLUENCE_BASE_URL = mock.base_url
+    latencies: List[float] = []
+    pages = chunks = 0
+    try:
+        for run in range(options["repeat"]):
+            # Fresh clients and collection each run: otherwise chunks stored by the
+            # last run are skipped
+            qdrant, embedders = _clients(options)
+            controller.CONFLUENCE_COLLECTION = f"bench_confluence_{run}"
+            try:
+                start = time.perf_counter()
+                result = await controller.fetch_and_ingest_confluence_pages(qdrant, embedders, mode="full")
+                latencies.append(time.perf_counter() - start)
+            finally:
+                await qdrant.close()
+                embedders.close()
+            pages += result["pages_ingested"]
+            chunks += result["chunks_ingested"]
+    finally:
+        mock.stop()
+    return summarize(latencies, sum(latencies), pages, "pages/s", chunks=chunks, **api.stats(), **mock.stats())
+
+
+async def bench_pdf(options: Dict[str, Any], api) -> Dict[str, Any]:
+    from src.utils.ingest_util import stream_text_from_path
+    from src.utils.pdf_extractor import shutdown_ocr_pool
+    from .fakes import make_pdf, paragraph
+
+    rng = random.Random(options["seed"])
+    pdfs = [make_pdf([paragraph(rng) * 3 for _ in range(options["pdf_pages"])]) for _ in range(options["pdf_docs"])]
+    latencies: List[float] = []
+    characters = 0
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            paths = []
+            for index, pdf in enumerate(pdfs):
+                paths.append(os.path.join(workdir, f"doc-{index}.pdf"))
+                with open(paths[-1], "wb") as f:
+                    f.write(pdf)
+
+            # The upload job's extraction path: pages are streamed as they are extracted
+            start = time.perf_counter()
+            for path in paths:
+                began = time.perf_counter()
+                characters += sum([len(page) async for page in stream_text_from_path(path)])
+                latencies.append(time.perf_counter() - began)
+            wall = time.perf_counter() - start
+    finally:
+        shutdown_ocr_pool()
+    return summarize(latencies, wall, len(pdfs) * options["pdf_pages"], "pages/s", characters=characters)
+
+
+async def bench_search(options: Dict[str, Any], api) -> Dict[str, Any]:
+    import httpx
+    from src.main import app
+    from .fakes import WORDS, document
+
+    rng = random.Random(options["seed"])
+    qdrant, embedders = _clients(options)
+    app.state.qdrant, app.state.embedders = qdrant, embedders
+    try:
+        # The corpus is not part of the measurement
+        await _ingest_documents(qdrant, embedders, [document(rng, options["doc_paragraphs"])
+                                                    for _ in range(options["search_docs"])],
+                                "bench_search", options["ingest_concurrency"])
+        api_before = api.stats()
+        queries = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))) for _ in range(options["searches"])]
+        semaphore = asyncio.Semaphore(options["search_concurrency"])
+        latencies: List[float] = []
+        errors = 0
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def search(query: str):
+                nonlocal errors
+                async with semaphore:
+                    began = time.perf_counter()
+                    response = await client.post("/ingest/search", json={
+                        "query": query, "collection": "bench_search", "top_k": options["top_k"],
+                        "mode": options["search_mode"]})
+                    latencies.append(time.perf_counter() - began)
+                    errors += response.status_code != 200
+
+            start = time.perf_counter()
+            await asyncio.gather(*(search(query) for query in queries))
+            wall = time.perf_counter() - start
+    finally:
+        await qdrant.close()
+        embedders.close()
+    api_after = api.stats()
+    return summarize(latencies, wall, len(queries), "requests/s", errors=errors,
+                     **{key: api_after[key] - api_before[key] for key in api_after})
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    "ingest": bench_ingest,
+    "confluence": bench_confluence,
+    "pdf": bench_pdf,
+    "search": bench_search,
+}
+
+
+def run_scenario(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry point of the child process."""
+    import logging
+    logging.disable(logging.WARNING if options["quiet"] else logging.NOTSET)
+    with tempfile.TemporaryDirectory(prefix="nexlify-bench-") as workdir:
+        api = _setup(options, workdir)
+        result = asyncio.run(BENCHMARKS[name](options, api))
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+# --- Reporting and baselines ---
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'scenario':<12}{'ops':>7}{'throughput':>22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+    for name, result in results.items():
+        throughput = f"{result['throughput']:.1f} {result['throughput_unit']}"
+        print(f"{name:<12}{result['operations']:>7}{throughput:>22}{result['p50_ms']:>10.1f}"
+              f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['peak_rss_mb']:>10.1f}")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a description of every metric worse than the baseline by more than `tolerance`."""
+    regressions = []
+    print(f"\n{'scenario':<12}{'metric':<14}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, result in results.items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = reference[metric], result[metric]
+            change = (after - before) / before if before else 0.0
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > tolerance else ""
+            print(f"{name:<12}{metric:<14}{before:>12.1f}{after:>12.1f}{change:>+10.1%}{flag}")
+            if flag:
+                regressions.append(f"{name} {metric}: {before:.1f} -> {after:.1f} ({change:+.1%})")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--docs", type=int, default=40, help="Documents ingested by the ingest scenario")
+    parser.add_argument("--doc-paragraphs", type=int, default=60)
+    parser.add_argument("--ingest-concurrency", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the mock Confluence space")
+    parser.add_argument("--confluence-latency", type=float, default=0.02, help="Seconds per mock Confluence response")
+    parser.add_argument("--confluence-throttle-every", type=int, default=0, help="Answer every Nth request with 429 (0: never)")
+    parser.add_argument("--repeat", type=int, default=3, help="Confluence syncs to run")
+    parser.add_argument("--pdf-docs", type=int, default=20)
+    parser.add_argument("--pdf-pages", type=int, default=30)
+    parser.add_argument("--search-docs", type=int, default=40, help="Documents ingested before the search scenario")
+    parser.add_argument("--searches", type=int, default=1000)
+    parser.add_argument("--search-concurrency", type=int, default=16)
+    parser.add_argument("--search-mode", choices=["dense", "hybrid"], default="dense")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Seconds per fake Gemini call")
+    parser.add_argument("--embed-jitter", type=float, default=0.01)
+    parser.add_argument("--embed-per-item", type=float, default=0.0005, help="Extra seconds per input of a call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of fake Gemini calls failing with 429")
+    parser.add_argument("--qdrant-url", default="", help="Benchmark against this Qdrant server instead of in-memory mode")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Save the results as baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Compare with baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression when comparing")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--verbose", dest="quiet", action="store_false", help="Keep the server's logging")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"Unknown scenario: {', '.join(unknown)}")
+    options = {key: value for key, value in vars(args).items()
+               if key not in ("scenarios", "save_baseline", "compare", "tolerance", "json")}
+
+    results: Dict[str, Dict[str, Any]] = {}
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[name] = pool.submit(run_scenario, name, options).result()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w") as f:
+            json.dump({"created_at": time.time(), "machine": platform.platform(), "python": platform.python_version(),
+                       "options": options, "results": results}, f, indent=2)
+        print(f"\nSaved baseline {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+        changed = sorted(key for key in options if baseline["options"].get(key) != options[key])
+        if changed:
+            print(f"\nWarning: options differ from the baseline: {', '.join(changed)}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions beyond {:.0%}:\n  ".format(args.tolerance) + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+from fastapi import Request
+from qdrant_client import AsyncQdrantClient
+
+from ..core.job_manager import JobManager
+from ..service.embedders import EmbedderRouter
+
+
+# Clients are created once in the app lifespan (see main.py) and kept on app.state
+
+
+def get_qdrant(request: Request) -> AsyncQdrantClient:
+    return request.app.state.qdrant
+
+
+def get_embedders(request: Request) -> EmbedderRouter:
+    return request.app.state.embedders
+
+
+def get_job_manager(request: Request) -> JobManager:
+    return request.app.state.jobs
@@ -1,124 +1,175 @@
 import os
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue
-from ..core.ingest_controller import get_embedding
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
-from fastapi import APIRouter, Depends, File, HTTPException
-from uuid import uuid4
+import asyncio
 import logging
+from typing import List, Literal
+from uuid import uuid4
+from qdrant_client import AsyncQdrantClient
+from fastapi import APIRouter, Depends, File, HTTPException
 from fastapi import UploadFile
-from pydantic import BaseModel
-from ..utils.ingest_util import extract_text_from_file
-from fastapi import APIRouter, Depends, HTTPException, status
-
-from ..models.embedding_model import EmbeddingRequest, EmbeddingResponse, SearchResult, SemanticSearchRequest, SemanticSearchResponse
-from ..core.ingest_controller import fetch_and_ingest_confluence_pages, get_embedding, ingest_file_to_qdrant
+from ..utils.ingest_util import SUPPORTED_EXTENSIONS, spool_upload
+from ..utils.chunker import CHUNK_STRATEGY, CHUNKERS
+
+from ..models.embedding_model import (
+    BatchSearchRequest, BatchSearchResponse, EmbeddingRequest, EmbeddingResponse, SemanticSearchRequest,
+    SemanticSearchResponse)
+from ..models.job_model import JobStatusResponse, JobSubmittedResponse
+from ..core.ingest_controller import CONFLUENCE_COLLECTION, get_embedding, get_embedding_cache_stats, merge_search_results, search_collection, search_many
+from ..core.search_cache import search_cache
+from ..core.job_manager import JOB_SPOOL_DIR, Job, JobManager
+from ..service.embedders import EmbedderRouter
+from .dependencies import get_embedders, get_job_manager, get_qdrant
 
 router = APIRouter()
 
 
-@router.post("/admin/confluence")
-def ingest_confluence_docs():
-    fetch_and_ingest_confluence_pages()
-    return {"status": "success", "source": "confluence"}
+@router.post("/admin/confluence", status_code=202, response_model=JobSubmittedResponse)
+async def ingest_confluence_docs(
+    mode: Literal["incremental", "full"] = "incremental",
+    jobs: JobManager = Depends(get_job_manager),
+):
+    # Only one sync of the space at a time, a second request gets the running job
+    job = jobs.active("confluence")
+    if job is not None and job.params.get("mode") != mode:
+        raise HTTPException(
+            status_code=409,
+            detail=f"A {job.params.get('mode')} Confluence sync ({job.job_id}) is already {job.status}. "
+                   f"Retry the {mode} sync once it finishes, or cancel it first.")
+    job = job or jobs.submit("confluence", CONFLUENCE_COLLECTION, {"mode": mode})
+    return _submitted(job)
 
 
 
-@router.post("/admin/docs")
+@router.post("/admin/docs", status_code=202, response_model=JobSubmittedResponse)
 async def upload_dev_doc(
     file: UploadFile = File(...),
     collection: str = "dev_docs",
+    chunk_strategy: str = CHUNK_STRATEGY,
+    replace: bool = True,
+    jobs: JobManager = Depends(get_job_manager),
 ):
-    try:
-        # Extract text
-        extracted_text = await extract_text_from_file(file)
+    extension = os.path.splitext(file.filename)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400, detail=f"Unsupported file extension: {extension}")
+    if chunk_strategy not in CHUNKERS:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown chunking strategy: {chunk_strategy}")
 
-        if not extracted_text.strip():
-            raise HTTPException(
-                status_code=400, detail="No extractable content found.")
+    try:
+        # Keep the upload on disk so the job can run (or resume) after this request returns
+        spool_path = os.path.join(JOB_SPOOL_DIR, f"{uuid4().hex}{extension}")
+        await spool_upload(file, spool_path)
 
-        # Ingest to vector DB
-        await ingest_file_to_qdrant(
-            content=extracted_text,
-            filename=file.filename,
-            collection_name=collection
-        )
+        job = jobs.submit("document", collection, {
+            "filename": file.filename, "spool_path": spool_path,
+            "chunk_strategy": chunk_strategy, "replace": replace})
+        return _submitted(job)
 
-        return {"status": "success", "message": f"Ingested {file.filename} into {collection}"}
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
     except Exception as e:
         logging.exception("Error while uploading developer documentation")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/jobs", response_model=List[JobStatusResponse])
+def list_jobs(limit: int = 50, jobs: JobManager = Depends(get_job_manager)):
+    return [job.to_response() for job in jobs.recent(limit)]
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+def get_job(job_id: str, jobs: JobManager = Depends(get_job_manager)):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job.to_response()
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobStatusResponse)
+async def cancel_job(job_id: str, jobs: JobManager = Depends(get_job_manager)):
+    job = jobs.cancel(job_id)
+    if job is None:
+        # Finished or unknown: the store is read on its writer thread, off the event loop
+        job = await asyncio.to_thread(jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job.to_response()
+
+
+def _submitted(job: Job) -> JobSubmittedResponse:
+    return JobSubmittedResponse(job_id=job.job_id, status=job.status, kind=job.kind, collection=job.collection)
+
+
 @router.post("/embeddings", response_model=EmbeddingResponse)
-async def embed_text(request: EmbeddingRequest):
+async def embed_text(request: EmbeddingRequest, embedders: EmbedderRouter = Depends(get_embedders)):
     """
-    Generate embedding for a single text string using GeminiEmbedder.
+    Generate embedding for a single text string, with the backend of
+    `request.collection` when given, otherwise the default backend.
     """
     try:
-        embedding = get_embedding(request.text)
+        embedding = await get_embedding(embedders, request.text, request.collection)
         return EmbeddingResponse(embedding=embedding)
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/embeddings/cache/stats", summary="Embedding cache statistics")
+def embedding_cache_stats(embedders: EmbedderRouter = Depends(get_embedders)):
+    return get_embedding_cache_stats(embedders)
+
+
+@router.get("/embeddings/backends", summary="Embedding backends and the collections using them")
+def embedding_backends(embedders: EmbedderRouter = Depends(get_embedders)):
+    return embedders.describe()
+
+
 @router.get("/health", summary="Health check")
 def health_check():
     return {"status": "ok"}
 
 
-qdrant = QdrantClient(host=os.getenv("QDRANT_HOST", "localhost"),
-                      port=int(os.getenv("QDRANT_PORT", 6333)))
+@router.post("/search", response_model=SemanticSearchResponse)
+async def semantic_search(
+    req: SemanticSearchRequest,
+    qdrant: AsyncQdrantClient = Depends(get_qdrant),
+    embedders: EmbedderRouter = Depends(get_embedders),
+):
+    try:
+        return await search_collection(qdrant, embedders, req)
 
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {e}")
 
-@router.post("/search", response_model=SemanticSearchResponse)
-async def semantic_search(req: SemanticSearchRequest):
+
+@router.post("/search/batch", response_model=BatchSearchResponse)
+async def batch_semantic_search(
+    req: BatchSearchRequest,
+    qdrant: AsyncQdrantClient = Depends(get_qdrant),
+    embedders: EmbedderRouter = Depends(get_embedders),
+):
     try:
-        # 1. Embed query
-        query_vector = get_embedding(req.query)
-
-        # 2. Prepare filters (optional)
-        filters = []
-        if req.filter_source:
-            filters.append(FieldCondition(
-                key="source", match=MatchValue(value=req.filter_source)))
-        if req.filter_filename:
-            filters.append(FieldCondition(
-                key="filename", match=MatchValue(value=req.filter_filename)))
-
-        final_filter = Filter(must=filters) if filters else None
-
-        # 3. Query Qdrant
-        search_result = qdrant.search(
-            collection_name=req.collection,
-            query_vector=query_vector,
-            limit=req.top_k,
-            with_payload=True,
-            score_threshold=None,
-            query_filter=final_filter
-        )
-
-        # 4. Format response
-        results = []
-        for item in search_result:
-            payload = item.payload or {}
-            results.append(SearchResult(
-                text=payload.get("text", ""),
-                score=item.score,
-                filename=payload.get("filename"),
-                title=payload.get("title"),
-                chunk_index=payload.get("chunk_index"),
-                source=payload.get("source")
-            ))
-
-        return SemanticSearchResponse(
-            query=req.query,
-            collection=req.collection,
-            results=results
-        )
+        responses = await search_many(qdrant, embedders, req.queries)
+        merged = None
+        if req.merge:
+            top_k = req.merge_top_k or max(query.top_k for query in req.queries)
+            merged = merge_search_results(responses, top_k)
+        return BatchSearchResponse(responses=responses, merged=merged)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {e}")
+
+
+@router.get("/search/cache/stats", summary="Search result cache statistics")
+def search_cache_stats():
+    return {**search_cache.stats(), "generations": search_cache.generations()}
+
+
+@router.get("/collections/generations", summary="Write counters of every collection")
+def collection_generations():
+    """
+    Each collection's counter increases whenever ingestion writes to it. Clients
+    caching anything derived from search results can compare snapshots of this
+    response to tell whether their entries are still current.
+    """
+    return {"epoch": search_cache.epoch, "generations": search_cache.generations()}
@@ -0,0 +1,106 @@
+import os
+from typing import Any, Dict, NamedTuple, Optional
+from qdrant_client.http.models import (
+    BinaryQuantization, BinaryQuantizationConfig, Distance, HnswConfigDiff, Modifier,
+    QuantizationSearchParams, ScalarQuantization, ScalarQuantizationConfig, ScalarType, SearchParams,
+    SparseIndexParams, SparseVectorParams, VectorParams)
+
+# Profile used for collections not listed in COLLECTION_PROFILES
+COLLECTION_PROFILE = os.getenv("COLLECTION_PROFILE", "default")
+# Per-collection profiles, e.g. "confluence_docs=large,dev_docs=precise"
+COLLECTION_PROFILES = os.getenv("COLLECTION_PROFILES", "")
+
+# Payload fields used by search filters and by re-ingestion deletes
+INDEXED_PAYLOAD_FIELDS = ("source", "filename", "page_id")
+
+
+class CollectionProfile(NamedTuple):
+    """
+    How a collection is laid out in Qdrant. Only applied when the collection is
+    created; changing the profile of an existing collection needs a re-ingest
+    into a new one.
+    """
+    name: str
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    # Search-time beam width; None uses Qdrant's default (ef_construct)
+    hnsw_ef: Optional[int] = None
+    quantization: Optional[str] = None  # None, "scalar" (int8) or "binary"
+    # Candidates re-scored with the original vectors, as a multiple of the limit
+    oversampling: float = 1.0
+    on_disk_vectors: bool = False  # Keeps only the HNSW graph and quantized vectors in RAM
+    on_disk_payload: bool = False
+
+
+PROFILES: Dict[str, CollectionProfile] = {profile.name: profile for profile in [
+    # Qdrant's defaults: everything in RAM, exact float vectors
+    CollectionProfile("default"),
+    # 4x less vector RAM; originals on disk are only read to re-score candidates
+    CollectionProfile("balanced", quantization="scalar", oversampling=2.0,
+                      on_disk_vectors=True, on_disk_payload=True),
+    # Millions of chunks: 32x less vector RAM, more candidates re-scored to make up for it
+    CollectionProfile("large", hnsw_ef_construct=128, quantization="binary", oversampling=3.0,
+                      on_disk_vectors=True, on_disk_payload=True),
+    # Best recall for small collections: denser graph, wider search
+    CollectionProfile("precise", hnsw_m=32, hnsw_ef_construct=256, hnsw_ef=128),
+]}
+
+
+def parse_collection_profiles(value: str) -> Dict[str, str]:
+    mapping = {}
+    for entry in value.split(","):
+        if entry.strip():
+            collection, _, profile = entry.partition("=")
+            mapping[collection.strip()] = profile.strip()
+    return mapping
+
+
+def _resolve(name: str) -> CollectionProfile:
+    if name not in PROFILES:
+        raise ValueError(f"Unknown collection profile: {name}. Available: {', '.join(sorted(PROFILES))}")
+    return PROFILES[name]
+
+
+_default_profile = _resolve(COLLECTION_PROFILE)
+_collection_profiles = {collection: _resolve(name)
+                        for collection, name in parse_collection_profiles(COLLECTION_PROFILES).items()}
+
+
+def profile_for(collection: str) -> CollectionProfile:
+    return _collection_profiles.get(collection, _default_profile)
+
+
+def collection_config(profile: CollectionProfile, dim: int, sparse_vector_name: str) -> Dict[str, Any]:
+    """Keyword arguments of `create_collection` for the profile."""
+    quantization = None
+    if profile.quantization == "scalar":
+        quantization = ScalarQuantization(scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8, quantile=0.99, always_ram=True))
+    elif profile.quantization == "binary":
+        quantization = BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+
+    return {
+        "vectors_config": VectorParams(size=dim, distance=Distance.COSINE, on_disk=profile.on_disk_vectors),
+        "sparse_vectors_config": {
+            sparse_vector_name: SparseVectorParams(
+                modifier=Modifier.IDF, index=SparseIndexParams(on_disk=profile.on_disk_vectors))},
+        "hnsw_config": HnswConfigDiff(m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct),
+        "quantization_config": quantization,
+        "on_disk_payload": profile.on_disk_payload,
+    }
+
+
+def search_params(profile: CollectionProfile, hnsw_ef: Optional[int] = None,
+                  exact: bool = False) -> Optional[SearchParams]:
+    """
+    Dense search parameters: the request's `hnsw_ef` (or the profile's), exact
+    search when asked for, and re-scoring of quantized candidates with the
+    original vectors.
+    """
+    ef = hnsw_ef or profile.hnsw_ef
+    quantization = None
+    if profile.quantization and not exact:
+        quantization = QuantizationSearchParams(rescore=True, oversampling=profile.oversampling)
+    if ef is None and not exact and quantization is None:
+        return None
+    return SearchParams(hnsw_ef=ef, exact=exact, quantization=quantization)
@@ -0,0 +1,145 @@
+import os
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+
+CONFLUENCE_TIMEOUT = float(os.getenv("CONFLUENCE_TIMEOUT", 10))
+# Upper bound on requests per second across every thread sharing the client
+CONFLUENCE_MAX_RPS = float(os.getenv("CONFLUENCE_MAX_RPS", 10))
+CONFLUENCE_MAX_RETRIES = int(os.getenv("CONFLUENCE_MAX_RETRIES", 5))
+CONFLUENCE_POOL_SIZE = int(os.getenv("CONFLUENCE_POOL_SIZE", 8))
+# Seconds before the first retry of a failed request, doubled on every attempt
+CONFLUENCE_BACKOFF_BASE = 1.0
+CONFLUENCE_BACKOFF_MAX = 60.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+logger = logging.getLogger("confluence_client")
+
+
+class ConfluenceClient:
+    """
+    Thread-safe Confluence REST client over one pooled keep-alive session.
+
+    Requests from all threads are spaced to stay under `max_rps`. A 429 pauses
+    every caller for the server's Retry-After (or an exponential backoff when it
+    is missing); 5xx responses and connection errors are retried the same way.
+    """
+
+    def __init__(self, base_url: str, user: Optional[str], token: Optional[str],
+                 max_rps: float = CONFLUENCE_MAX_RPS, max_retries: int = CONFLUENCE_MAX_RETRIES,
+                 pool_size: int = CONFLUENCE_POOL_SIZE, timeout: float = CONFLUENCE_TIMEOUT):
+        self.base_url = f"{base_url}/rest/api"
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._interval = 1.0 / max_rps if max_rps > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._session = requests.Session()
+        self._session.auth = (user, token)
+        self._session.headers.update({"Accept": "application/json"})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def get(self, path: str, params: Optional[dict] = None) -> dict:
+        url = f"{self.base_url}/{path}"
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_slot()
+            try:
+                response = self._session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"Confluence request failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if response.status_code in RETRYABLE_STATUS and attempt < self.max_retries:
+                delay = self._retry_after(response) or self._backoff(attempt)
+                if response.status_code == 429:
+                    # Throttling applies to the whole account, so hold back every caller
+                    self._defer(delay)
+                logger.warning(
+                    f"Confluence returned {response.status_code} for {path}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            return response.json()
+
+    def list_page_versions(self, space_key: str, limit: int = 100) -> Dict[str, Tuple[int, Optional[str]]]:
+        """
+        List every page in the space with its version, without fetching page bodies.
+        Returns page id -> (version number, last modified timestamp).
+        """
+        pages: Dict[str, Tuple[int, Optional[str]]] = {}
+        start = 0
+        while True:
+            data = self.get("content", params={
+                "spaceKey": space_key,
+                "type": "page",
+                "expand": "version",
+                "start": start,
+                "limit": limit
+            })
+            results = data.get("results", [])
+
+            for page in results:
+                version = page.get("version", {})
+                pages[page["id"]] = (version.get("number", 0), version.get("when"))
+
+            if not results or not data.get("_links", {}).get("next"):
+                break
+
+            start += len(results)
+
+        return pages
+
+    def get_pages(self, page_ids: List[str]) -> List[dict]:
+        """Fetch the storage-format body and version of the given pages."""
+        data = self.get("content/search", params={
+            "cql": f"id in ({','.join(page_ids)})",
+            "expand": "body.storage,version",
+            "limit": len(page_ids)
+        })
+        return data.get("results", [])
+
+    def close(self) -> None:
+        self._session.close()
+
+    def _wait_for_slot(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _defer(self, delay: float) -> None:
+        with self._lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + delay)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        delay = min(CONFLUENCE_BACKOFF_MAX, CONFLUENCE_BACKOFF_BASE * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(CONFLUENCE_BACKOFF_MAX, max(0.0, seconds))
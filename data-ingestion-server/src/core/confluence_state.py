@@ -0,0 +1,55 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+CONFLUENCE_STATE_PATH = os.getenv(
+    "CONFLUENCE_STATE_PATH", ".cache/confluence_state.sqlite3")
+
+
+class ConfluenceWatermarkStore:
+    """
+    Local record of the Confluence page versions already ingested, keyed by
+    (space key, page id). Incremental syncs diff the live space against it.
+    """
+
+    def __init__(self, path: str = CONFLUENCE_STATE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "space_key TEXT NOT NULL, page_id TEXT NOT NULL, "
+            "version INTEGER NOT NULL, last_modified TEXT, "
+            "PRIMARY KEY (space_key, page_id))")
+        self._db.commit()
+
+    def load(self, space_key: str) -> Dict[str, int]:
+        """Return page id -> ingested version for a space."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT page_id, version FROM pages WHERE space_key = ?", (space_key,)).fetchall()
+        return {page_id: version for page_id, version in rows}
+
+    def mark_ingested(self, space_key: str, pages: Iterable[Tuple[str, int, Optional[str]]]) -> None:
+        """Record (page_id, version, last_modified) tuples as ingested."""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO pages (space_key, page_id, version, last_modified) "
+                "VALUES (?, ?, ?, ?)",
+                [(space_key, page_id, version, last_modified)
+                 for page_id, version, last_modified in pages])
+            self._db.commit()
+
+    def forget(self, space_key: str, page_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._db.executemany(
+                "DELETE FROM pages WHERE space_key = ? AND page_id = ?",
+                [(space_key, page_id) for page_id in page_ids])
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
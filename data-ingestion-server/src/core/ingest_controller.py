@@ -1,17 +1,31 @@
-from typing import List
-from qdrant_client.models import PointStruct, VectorParams, Distance
+import asyncio
+import hashlib
 import os
+import time
 import logging
-import requests
-from typing import List, Dict
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import PointStruct
-from uuid import uuid4
-from tenacity import retry, wait_fixed, stop_after_attempt, retry_if_exception_type
-from google.auth.transport.requests import Request
-from google.oauth2.service_account import Credentials
+import httpx
+from typing import AsyncIterable, List, Dict, Optional, Set, Tuple, Union
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import (
+    PointStruct, VectorParams, Filter, FieldCondition, FilterSelector, HasIdCondition, IsEmptyCondition,
+    MatchAny, MatchValue, PayloadField, QueryRequest, ScoredPoint, Prefetch, FusionQuery, Fusion, SparseVector, PayloadSchemaType)
+from uuid import NAMESPACE_URL, uuid5
 import google.generativeai as genai
-from ..service.embedding_service import GeminiEmbedder
+from ..service.embedding_service import Embedder
+from ..service.embedding_cache import EmbeddingCache
+from ..service.embedders import EmbedderRouter, create_embedders
+from ..service.rate_limiter import interactive
+from .collection_profiles import INDEXED_PAYLOAD_FIELDS, collection_config, profile_for, search_params
+from .confluence_client import ConfluenceClient
+from .confluence_state import ConfluenceWatermarkStore
+from .progress import IngestProgress, NO_PROGRESS
+from .search_cache import search_cache
+from .text_store import get_text_store
+from ..models.embedding_model import SearchResult, SemanticSearchRequest, SemanticSearchResponse
+from ..utils.chunker import CHUNK_STRATEGY, Chunk, chunk_stream, chunk_text, get_chunker
+from ..utils.pipeline import Stage, run_pipeline
+from ..utils.sparse_encoder import encode_document, encode_query
+from ..utils.telemetry import span
 
 # --- Configuration ---
 CONFLUENCE_BASE_URL = os.getenv("CONFLUENCE_BASE_URL")
@@ -21,12 +35,52 @@ CONFLUENCE_API_TOKEN = os.getenv("CONFLUENCE_API_TOKEN")
 CONFLUENCE_COLLECTION = os.getenv("CONFLUENCE_COLLECTION", "confluence_docs")
 DOC_COLLECTION = os.getenv("DOC_COLLECTION", "dev_docs")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+POINT_NAMESPACE = uuid5(NAMESPACE_URL, "https://github.com/DeepakPant93/nexlify/points")
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", 30))
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", 20))
+# Chunks embedded and upserted together while a document is still being extracted
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 100))
+# Confluence pipeline: pages per content request, workers per stage, and how many
+# fetched-but-unprocessed batches may queue up between stages
+CONFLUENCE_FETCH_BATCH = 25
+CONFLUENCE_FETCH_CONCURRENCY = int(os.getenv("CONFLUENCE_FETCH_CONCURRENCY", 4))
+CONFLUENCE_PREPARE_CONCURRENCY = int(os.getenv("CONFLUENCE_PREPARE_CONCURRENCY", 2))
+CONFLUENCE_EMBED_CONCURRENCY = int(os.getenv("CONFLUENCE_EMBED_CONCURRENCY", 2))
+CONFLUENCE_EMBED_BATCHES = int(os.getenv("CONFLUENCE_EMBED_BATCHES", 4))
+CONFLUENCE_UPSERT_CONCURRENCY = int(os.getenv("CONFLUENCE_UPSERT_CONCURRENCY", 2))
+CONFLUENCE_PREFETCH = int(os.getenv("CONFLUENCE_PREFETCH", 8))
+# Hybrid search: name of the BM25 sparse vector, and candidates fetched per side
+# as a multiple of top_k before fusion
+SPARSE_VECTOR_NAME = "bm25"
+HYBRID_CANDIDATE_FACTOR = int(os.getenv("HYBRID_CANDIDATE_FACTOR", 4))
+# Rank constant of the reciprocal rank fusion that merges collections whose scores
+# are not comparable (the usual 60, as in Qdrant's own RRF)
+MERGE_RRF_K = 60
+
+# Payload fields returned with search hits; the rest are only used for filtering
+SEARCH_PAYLOAD_FIELDS = ["text", "filename", "title", "chunk_index", "source"]
+# Points listed per request when collecting the ids of points about to be deleted
+SCROLL_PAGE_SIZE = 1000
+
+# Collection name -> whether it has the sparse vector, filled lazily
+_sparse_support: Dict[str, bool] = {}
+# Collection metadata key recording the model its vectors were built with, and
+# collection name -> that model (None for collections not recorded yet), filled lazily
+EMBED_MODEL_KEY = "embed_model"
+_collection_models: Dict[str, Optional[str]] = {}
+# Collection name -> (expiry, vector size, model) of collections known to exist, so
+# ingest calls do not ask Qdrant every time. The TTL bounds how long a collection
+# dropped outside this server goes unnoticed.
+COLLECTION_CACHE_TTL_SECONDS = float(os.getenv("COLLECTION_CACHE_TTL_SECONDS", 300))
+_known_collections: Dict[str, Tuple[float, int, Optional[str]]] = {}
+_collection_lock = asyncio.Lock()
+# Collection value of search requests that searches every collection this server
+# manages, and (expiry, names) of the collections it resolved to, on the same TTL
+ALL_COLLECTIONS = "all"
+_searchable_collections: Optional[Tuple[float, List[str]]] = None
 
-# --- Qdrant Setup ---
-qdrant = QdrantClient(host=os.getenv("QDRANT_HOST", "localhost"),
-                      port=int(os.getenv("QDRANT_PORT", 6333)))
-
-gemini_embedder = GeminiEmbedder()
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("confluence_ingest")
@@ -34,86 +88,316 @@ logger = logging.getLogger("confluence_ingest")
 # --- Gemini Embedding ---
 genai.configure(api_key=GEMINI_API_KEY)
 
+# --- Shared Clients ---
+# Created once in the app lifespan (see main.py) and handed to the functions below.
 
 
-# --- Retryable GET ---
+def create_qdrant_client() -> AsyncQdrantClient:
+    return AsyncQdrantClient(
+        host=QDRANT_HOST,
+        port=QDRANT_PORT,
+        timeout=QDRANT_TIMEOUT,
+        limits=httpx.Limits(max_connections=QDRANT_POOL_SIZE,
+                            max_keepalive_connections=QDRANT_POOL_SIZE),
+    )
 
 
-@retry(wait=wait_fixed(2), stop=stop_after_attempt(3), retry=retry_if_exception_type(requests.RequestException))
-def confluence_get(url: str, params: dict = None) -> dict:
-    full_url = f"{CONFLUENCE_BASE_URL}/rest/api/{url}"
-    logger.debug(f"Fetching URL: {full_url}")
-    response = requests.get(
-        full_url,
-        params=params,
-        auth=(CONFLUENCE_API_USER, CONFLUENCE_API_TOKEN),
-        headers={"Accept": "application/json"},
-        timeout=10
-    )
-    response.raise_for_status()
-    return response.json()
+def create_embedder() -> EmbedderRouter:
+    return create_embedders(EmbeddingCache())
 
-# --- Main Ingestion Logic ---
 
+# --- Confluence Client ---
 
-def fetch_and_ingest_confluence_pages():
-    logger.info("Starting Confluence content ingestion...")
-    start = 0
-    limit = 25
-    total_uploaded = 0
-
-    ensure_collection_exists(CONFLUENCE_COLLECTION, 768)
-    while True:
-        params = {
-            "spaceKey": CONFLUENCE_SPACE_KEY,
-            "expand": "body.storage",
-            "start": start,
-            "limit": limit
-        }
-
-        data = confluence_get("content", params=params)
-        results = data.get("results", [])
-
-        if not results:
-            break
-
-        points: List[PointStruct] = []
-        for page in results:
-            page_id = page["id"]
-            title = page["title"]
-            html_content = page.get("body", {}).get(
-                "storage", {}).get("value", "")
-            if not html_content:
-                logger.warning(
-                    f"No content found for page {page_id} - {title}")
-                continue
 
-            text_content = clean_html_text(html_content)
-            full_text = f"{title}\n\n{text_content}"
-            vector = gemini_embedder.get_embedding(full_text)
+def create_confluence_client() -> ConfluenceClient:
+    return ConfluenceClient(CONFLUENCE_BASE_URL, CONFLUENCE_API_USER, CONFLUENCE_API_TOKEN)
 
-            point = PointStruct(
-                id=str(uuid4()),
-                vector=vector,
-                payload={
-                    "title": title,
-                    "page_id": page_id,
-                    "text": text_content,
-                    "source": "confluence"
-                }
-            )
-            points.append(point)
 
-        qdrant.upsert(collection_name=CONFLUENCE_COLLECTION, points=points)
-        total_uploaded += len(points)
-        logger.info(f"Uploaded {len(points)} pages (Total: {total_uploaded})")
+# --- Main Ingestion Logic ---
 
-        if not data.get("_links", {}).get("next"):
-            break
 
-        start += limit
+async def fetch_and_ingest_confluence_pages(qdrant: AsyncQdrantClient, embedders: EmbedderRouter,
+                                            mode: str = "incremental",
+                                            chunk_strategy: str = CHUNK_STRATEGY,
+                                            progress: IngestProgress = NO_PROGRESS) -> Dict[str, int]:
+    """
+    Sync the Confluence space into Qdrant.
+
+    In "incremental" mode only pages whose version differs from the local
+    watermark are fetched; "full" re-ingests every page. In both modes points for
+    pages removed from the space are deleted, and chunks already stored with the
+    same content are not embedded again. Pages the fetch did not return at their
+    listed version are left unmarked and retried on the next sync.
+
+    Changed pages flow through a pipeline (fetch -> clean -> chunk -> embed ->
+    upsert) whose stages run concurrently, so fetching the next pages overlaps
+    with embedding and writing the previous ones.
+    """
+    if mode not in ("incremental", "full"):
+        raise ValueError(f"Unsupported Confluence sync mode: {mode}")
+
+    logger.info(f"Starting Confluence content ingestion ({mode})...")
+    embedder = embedders.for_collection(CONFLUENCE_COLLECTION)
+    await ensure_collection_exists(qdrant, CONFLUENCE_COLLECTION, embedder)
+
+    client = create_confluence_client()
+    store = ConfluenceWatermarkStore()
+    try:
+        progress.set_stage("listing")
+        known = await asyncio.to_thread(store.load, CONFLUENCE_SPACE_KEY)
+        live = await asyncio.to_thread(client.list_page_versions, CONFLUENCE_SPACE_KEY)
+
+        if mode == "full":
+            changed = list(live)
+        else:
+            changed = [page_id for page_id, (version, _) in live.items()
+                       if known.get(page_id) != version]
+        removed = [page_id for page_id in known if page_id not in live]
+        logger.info(
+            f"{len(live)} pages in space: {len(changed)} to ingest, {len(removed)} removed")
+        progress.add_total(len(changed))
+
+        if removed:
+            await delete_points(qdrant, CONFLUENCE_COLLECTION, Filter(must=[
+                FieldCondition(key="page_id", match=MatchAny(any=removed))
+            ]))
+            await asyncio.to_thread(store.forget, CONFLUENCE_SPACE_KEY, removed)
+
+        totals = {"uploaded": 0, "skipped": 0, "pages": 0}
+
+        async def page_batches():
+            for start in range(0, len(changed), CONFLUENCE_FETCH_BATCH):
+                yield changed[start:start + CONFLUENCE_FETCH_BATCH]
+
+        async def fetch(page_ids: List[str]):
+            pages = await asyncio.to_thread(client.get_pages, page_ids)
+            # The search index can lag behind the page list: a page missing from the
+            # result, or returned at another version, is not touched this run
+            current = [page for page in pages
+                       if page["id"] in live and page.get("version", {}).get("number") == live[page["id"]][0]]
+            if len(current) < len(page_ids):
+                logger.warning(f"{len(page_ids) - len(current)} of {len(page_ids)} pages were not returned "
+                               f"at their listed version, retrying them on the next sync")
+            progress.advance(len(page_ids) - len(current))
+            return [page["id"] for page in current], current
+
+        async def clean(batch):
+            page_ids, pages = batch
+            return page_ids, await asyncio.to_thread(clean_confluence_pages, pages)
+
+        async def chunk(batch):
+            page_ids, documents = batch
+            return page_ids, await asyncio.to_thread(
+                build_confluence_items, documents, chunk_strategy)
+
+        async def embed(batches):
+            # Several page batches are embedded together to fill embedding requests
+            items = [item for _, batch_items in batches for item in batch_items]
+            fresh = await filter_stored_items(qdrant, CONFLUENCE_COLLECTION, items)
+            vectors = await embedder.get_embeddings([text for _, text, _ in fresh]) if fresh else []
+            return batches, fresh, vectors
+
+        async def upsert(embedded):
+            batches, fresh, vectors = embedded
+            page_ids = [page_id for batch_ids, _ in batches for page_id in batch_ids]
+            items = [item for _, batch_items in batches for item in batch_items]
+            await write_points(qdrant, CONFLUENCE_COLLECTION, fresh, vectors)
+            if page_ids:
+                # Drop points of these pages that are not part of their current version
+                # (edited chunks, emptied pages, or random-id points from older ingests)
+                await delete_stale_points(
+                    qdrant, CONFLUENCE_COLLECTION,
+                    FieldCondition(key="page_id", match=MatchAny(any=page_ids)),
+                    keep_ids=[item[0] for item in items])
+                # Pages without content are watermarked too, so they are not refetched every run
+                await asyncio.to_thread(
+                    store.mark_ingested, CONFLUENCE_SPACE_KEY,
+                    [(page_id, live[page_id][0], live[page_id][1]) for page_id in page_ids])
+            totals["uploaded"] += len(fresh)
+            totals["skipped"] += len(items) - len(fresh)
+            totals["pages"] += len(page_ids)
+            progress.advance(len(page_ids))
+            logger.info(
+                f"Uploaded {len(fresh)} chunks, {len(items) - len(fresh)} unchanged "
+                f"(Total: {totals['uploaded']})")
+
+        progress.set_stage("ingesting")
+        stages = await run_pipeline(page_batches(), [
+            Stage("fetch", fetch, CONFLUENCE_FETCH_CONCURRENCY),
+            Stage("clean", clean, CONFLUENCE_PREPARE_CONCURRENCY),
+            Stage("chunk", chunk, CONFLUENCE_PREPARE_CONCURRENCY),
+            Stage("embed", embed, CONFLUENCE_EMBED_CONCURRENCY, batch_size=CONFLUENCE_EMBED_BATCHES),
+            Stage("upsert", upsert, CONFLUENCE_UPSERT_CONCURRENCY),
+        ], queue_size=CONFLUENCE_PREFETCH, name="confluence")
+        logger.info("Confluence pipeline stage time: " + ", ".join(
+            f"{name} {stat['busy_seconds']:.1f}s/{int(stat['items'])}" for name, stat in stages.items()))
+    finally:
+        store.close()
+        client.close()
 
     logger.info("Finished Confluence ingestion.")
+    return {
+        "pages_in_space": len(live),
+        "pages_ingested": totals["pages"],
+        "pages_deferred": len(changed) - totals["pages"],
+        "chunks_ingested": totals["uploaded"],
+        "chunks_unchanged": totals["skipped"],
+        "removed": len(removed),
+        "unchanged": len(live) - len(changed),
+    }
+
+
+def clean_confluence_pages(pages: List[dict]) -> List[Tuple[str, str, str]]:
+    """Turn fetched pages into (page_id, title, plain text), skipping empty ones."""
+    documents = []
+    for page in pages:
+        page_id = page["id"]
+        title = page["title"]
+        html_content = page.get("body", {}).get("storage", {}).get("value", "")
+        if not html_content:
+            logger.warning(f"No content found for page {page_id} - {title}")
+            continue
+        documents.append((page_id, title, clean_html_text(html_content)))
+    return documents
+
+
+def build_confluence_items(documents: List[Tuple[str, str, str]],
+                           chunk_strategy: str) -> List[Tuple[str, str, Dict]]:
+    """Chunk cleaned pages into (point id, text to embed, payload) items."""
+    items = []
+    for page_id, title, text_content in documents:
+        for chunk in chunk_text(text_content, get_chunker(chunk_strategy)):
+            chunk_hash = content_hash(chunk.text)
+            # The title is prepended so every chunk of a page carries its topic
+            items.append((point_id("confluence", page_id, chunk.index, chunk_hash),
+                          f"{title}\n\n{chunk.text}", {
+                              "title": title,
+                              "page_id": page_id,
+                              "chunk_index": chunk.index,
+                              "char_start": chunk.char_start,
+                              "char_end": chunk.char_end,
+                              "content_hash": chunk_hash,
+                              "text": chunk.text,
+                              "source": "confluence"
+                          }))
+    return items
+
+
+# --- Point Identity & Dedup ---
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def point_id(source: str, document_key: str, chunk_index: int, chunk_hash: str) -> str:
+    """
+    Deterministic point id for a chunk. Re-ingesting identical content yields the
+    same id, so it overwrites (or is skipped) instead of adding a duplicate.
+    """
+    return str(uuid5(POINT_NAMESPACE, f"{source}:{document_key}:{chunk_index}:{chunk_hash}"))
+
+
+async def upsert_new_points(qdrant: AsyncQdrantClient, embedder: Embedder, collection_name: str,
+                            items: List[Tuple[str, str, Dict]]) -> int:
+    """
+    Embed and upsert (point id, text to embed, payload) items, skipping ids that
+    are already stored. Returns the number of points written.
+    """
+    fresh = await filter_stored_items(qdrant, collection_name, items)
+    if not fresh:
+        return 0
+    async with span("embed", texts=len(fresh)):
+        vectors = await embedder.get_embeddings([text for _, text, _ in fresh])
+    await write_points(qdrant, collection_name, fresh, vectors)
+    return len(fresh)
+
+
+async def filter_stored_items(qdrant: AsyncQdrantClient, collection_name: str,
+                              items: List[Tuple[str, str, Dict]]) -> List[Tuple[str, str, Dict]]:
+    """
+    Return the items whose point is not stored in the collection yet. A point
+    whose text is neither in its payload nor in the text store (e.g. the store
+    was lost) counts as not stored, so ingesting it again restores the text.
+    """
+    if not items:
+        return []
+    ids = [item[0] for item in items]
+    text_store = get_text_store()
+    async with span("dedup_lookup"):
+        stored = set()
+        if text_store is not None:
+            existing = await qdrant.retrieve(
+                collection_name=collection_name, ids=ids, with_payload=False, with_vectors=False)
+            stored = set(await asyncio.to_thread(
+                text_store.get_many, collection_name, [str(point.id) for point in existing]))
+        unresolved = [item_id for item_id in ids if item_id not in stored]
+        if unresolved:
+            # Points with their text in the payload: all of them when the text stays
+            # in Qdrant, and those written before the switch to the text store
+            with_text, _ = await qdrant.scroll(
+                collection_name=collection_name, limit=len(unresolved), with_payload=False,
+                scroll_filter=Filter(must=[HasIdCondition(has_id=unresolved)],
+                                     must_not=[IsEmptyCondition(is_empty=PayloadField(key="text"))]))
+            stored.update(str(point.id) for point in with_text)
+    return [item for item in items if item[0] not in stored]
+
+
+async def write_points(qdrant: AsyncQdrantClient, collection_name: str,
+                       items: List[Tuple[str, str, Dict]], vectors: List[List[float]]):
+    if not items:
+        return
+    text_store = get_text_store()
+    if text_store is not None:
+        # Written before the points, so a search never finds a point without its text
+        await asyncio.to_thread(text_store.put_many, collection_name,
+                                {item_id: payload["text"] for item_id, _, payload in items if "text" in payload})
+        items = [(item_id, text, {key: value for key, value in payload.items() if key != "text"})
+                 for item_id, text, payload in items]
+    if await supports_sparse(qdrant, collection_name):
+        # Dense vector under the default (unnamed) vector, BM25 weights alongside
+        points = [PointStruct(id=item_id, vector={"": vector, SPARSE_VECTOR_NAME: encode_document(text)},
+                              payload=payload)
+                  for (item_id, text, payload), vector in zip(items, vectors)]
+    else:
+        points = [PointStruct(id=item_id, vector=vector, payload=payload)
+                  for (item_id, _, payload), vector in zip(items, vectors)]
+    async with span("upsert", points=len(points)):
+        await qdrant.upsert(collection_name=collection_name, points=points)
+    search_cache.invalidate(collection_name)
+
+
+async def delete_stale_points(qdrant: AsyncQdrantClient, collection_name: str,
+                              document: FieldCondition, keep_ids: List[str]):
+    """Delete the points matching `document` whose id is not in `keep_ids`."""
+    stale = Filter(must=[document], must_not=[HasIdCondition(has_id=keep_ids)])
+    async with span("delete_stale"):
+        # Counting first keeps no-op re-ingests from invalidating cached search results
+        if not (await qdrant.count(collection_name=collection_name, count_filter=stale, exact=True)).count:
+            return
+        await delete_points(qdrant, collection_name, stale)
+
+
+async def delete_points(qdrant: AsyncQdrantClient, collection_name: str, points_filter: Filter):
+    """Delete the points matching `points_filter`, with their text in the local text store."""
+    text_store = get_text_store()
+    point_ids: List[str] = []
+    if text_store is not None:
+        offset = None
+        while True:
+            points, offset = await qdrant.scroll(
+                collection_name=collection_name, scroll_filter=points_filter, limit=SCROLL_PAGE_SIZE,
+                offset=offset, with_payload=False, with_vectors=False)
+            point_ids.extend(str(point.id) for point in points)
+            if offset is None:
+                break
+    await qdrant.delete(
+        collection_name=collection_name,
+        points_selector=FilterSelector(filter=points_filter),
+    )
+    if point_ids:
+        await asyncio.to_thread(text_store.delete_many, collection_name, point_ids)
+    search_cache.invalidate(collection_name)
 
 # --- HTML Cleaner ---
 
@@ -126,57 +410,157 @@ def clean_html_text(html: str) -> str:
 # --- Collection Ensurer ---
 
 
-def ensure_collection_exists(collection_name: str, dim: int = 384):
+async def ensure_collection_exists(qdrant: AsyncQdrantClient, collection_name: str, embedder: Embedder):
+    """
+    Create the collection for the embedder's vectors if it is missing, laid out
+    by its profile (see collection_profiles.py) and recording the embedder's
+    model. An existing collection must already have that vector size and model,
+    since its vectors and the embedder's would otherwise be incomparable.
+    """
+    known = _known_collections.get(collection_name)
+    if known is None or known[0] < time.monotonic():
+        # Serialised so concurrent first uploads do not both try to create it
+        async with _collection_lock:
+            known = _known_collections.get(collection_name)
+            if known is None or known[0] < time.monotonic():
+                size, model = await _create_or_inspect_collection(qdrant, collection_name, embedder)
+                known = _known_collections[collection_name] = (
+                    time.monotonic() + COLLECTION_CACHE_TTL_SECONDS, size, model)
+    if known[1] != embedder.dimension:
+        raise ValueError(
+            f"Collection {collection_name} stores {known[1]}-d vectors but its embedder produces "
+            f"{embedder.dimension}-d vectors. Use the backend it was created with, or ingest into a new collection.")
+    if known[2] != embedder.model_name:
+        raise ValueError(
+            f"Collection {collection_name} was built with {known[2]} but its embedder is {embedder.model_name}. "
+            f"Use the backend it was created with, or ingest into a new collection.")
+
+
+async def _create_or_inspect_collection(qdrant: AsyncQdrantClient, collection_name: str,
+                                        embedder: Embedder) -> Tuple[int, str]:
+    """Create the collection if needed and return the size of its vectors and their model."""
+    global _searchable_collections
     try:
-        collections = qdrant.get_collections().collections
-        names = [col.name for col in collections]
-        if collection_name not in names:
-            qdrant.recreate_collection(
-                collection_name=collection_name,
-                vectors_config=VectorParams(
-                    size=dim, distance=Distance.COSINE),
-            )
+        if not await qdrant.collection_exists(collection_name):
+            _searchable_collections = None
+            profile = profile_for(collection_name)
+            logger.info(f"Creating collection {collection_name} with the {profile.name} profile")
+            await qdrant.create_collection(
+                collection_name=collection_name, metadata={EMBED_MODEL_KEY: embedder.model_name},
+                **collection_config(profile, embedder.dimension, SPARSE_VECTOR_NAME))
+            indexed = set()
+            _sparse_support[collection_name] = True
+            size, model = embedder.dimension, embedder.model_name
+        else:
+            info = await qdrant.get_collection(collection_name)
+            indexed = set(info.payload_schema or {})
+            vectors = info.config.params.vectors
+            size = vectors.size if isinstance(vectors, VectorParams) else embedder.dimension
+            model = (info.config.metadata or {}).get(EMBED_MODEL_KEY)
+            if model is None and size == embedder.dimension:
+                # Collections created before models were recorded are assumed to
+                # hold the vectors of the backend they are routed to
+                logger.info(f"Recording {embedder.model_name} as the model of {collection_name}")
+                await qdrant.update_collection(
+                    collection_name=collection_name, metadata={EMBED_MODEL_KEY: embedder.model_name})
+                model = embedder.model_name
+                _searchable_collections = None
+        _collection_models[collection_name] = model
+        # Keyword indexes keep filtered searches and re-ingestion deletes from
+        # scanning every payload; collections created earlier get them here
+        for field in INDEXED_PAYLOAD_FIELDS:
+            if field not in indexed:
+                await qdrant.create_payload_index(
+                    collection_name=collection_name, field_name=field, field_schema=PayloadSchemaType.KEYWORD)
     except Exception as e:
         raise RuntimeError(f"Failed to ensure Qdrant collection: {e}")
+    return size, model
+
+
+async def supports_sparse(qdrant: AsyncQdrantClient, collection_name: str) -> bool:
+    """
+    Whether the collection has the BM25 sparse vector. Collections created before
+    hybrid search existed do not, until they are recreated and re-ingested.
+    """
+    if collection_name not in _sparse_support:
+        info = await qdrant.get_collection(collection_name)
+        _sparse_support[collection_name] = SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+    return _sparse_support[collection_name]
+
+
+async def collection_model(qdrant: AsyncQdrantClient, collection_name: str) -> Optional[str]:
+    """The embedding model recorded for the collection's vectors, if any."""
+    if collection_name not in _collection_models:
+        info = await qdrant.get_collection(collection_name)
+        _collection_models[collection_name] = (info.config.metadata or {}).get(EMBED_MODEL_KEY)
+    return _collection_models[collection_name]
 
 # --- Generic File Ingestion ---
 
 
-async def ingest_file_to_qdrant(content: str, filename: str, collection_name: str):
+async def ingest_file_to_qdrant(qdrant: AsyncQdrantClient, embedders: EmbedderRouter,
+                                segments: AsyncIterable[str], filename: str, collection_name: str,
+                                chunk_strategy: str = CHUNK_STRATEGY, replace: bool = True,
+                                progress: IngestProgress = NO_PROGRESS) -> int:
+    """
+    Chunk, embed and upsert a document as its text segments arrive.
+
+    Chunks are processed every INGEST_BATCH_SIZE chunks, so work on the first
+    pages overlaps with extraction of the later ones. Chunks already stored with
+    identical content are not embedded again. With `replace`, chunks of an
+    earlier upload of the same filename that are no longer present are deleted.
+    Returns the number of chunks in the document.
+    """
     try:
-        chunk_size = 512
-        overlap = 64
-        words = content.split()
-        chunks = []
-        i = 0
-        while i < len(words):
-            chunk = " ".join(words[i:i + chunk_size])
-            chunks.append(chunk)
-            i += chunk_size - overlap
-
-        logging.info(f"Split content into {len(chunks)} chunks")
-        ensure_collection_exists(
-            collection_name, 768)
-
-        points = []
-        for idx, chunk in enumerate(chunks):
-            vector = gemini_embedder.get_embedding(chunk)
-            points.append(
-                PointStruct(
-                    id=str(uuid4()),
-                    vector=vector,
-                    payload={
-                        "filename": filename,
-                        "chunk_index": idx,
-                        "text": chunk,
-                        "source": "developer_upload"
-                    }
-                )
-            )
+        embedder = embedders.for_collection(collection_name)
+        await ensure_collection_exists(qdrant, collection_name, embedder)
+
+        chunker = get_chunker(chunk_strategy)
+        total = 0
+        written = 0
+        batch: List[Chunk] = []
+        chunk_ids: List[str] = []
+
+        async def flush():
+            nonlocal total, written
+            progress.add_total(len(batch))
+
+            items = []
+            for chunk in batch:
+                chunk_hash = content_hash(chunk.text)
+                items.append((point_id("developer_upload", filename, chunk.index, chunk_hash),
+                              chunk.text, {
+                                  "filename": filename,
+                                  "chunk_index": chunk.index,
+                                  "char_start": chunk.char_start,
+                                  "char_end": chunk.char_end,
+                                  "content_hash": chunk_hash,
+                                  "text": chunk.text,
+                                  "source": "developer_upload"
+                              }))
+            chunk_ids.extend(item[0] for item in items)
+
+            written += await upsert_new_points(qdrant, embedder, collection_name, items)
+            total += len(items)
+            progress.advance(len(items))
+            batch.clear()
+
+        async for chunk in chunk_stream(segments, chunker):
+            batch.append(chunk)
+            if len(batch) >= INGEST_BATCH_SIZE:
+                await flush()
+        if batch:
+            await flush()
+
+        if replace and total:
+            await delete_stale_points(
+                qdrant, collection_name,
+                FieldCondition(key="filename", match=MatchValue(value=filename)),
+                keep_ids=chunk_ids)
 
-        qdrant.upsert(collection_name=collection_name, points=points)
         logging.info(
-            f"Successfully ingested {len(points)} chunks from {filename} into {collection_name}")
+            f"Successfully ingested {total} chunks ({written} new or changed) from {filename} into {collection_name}")
+        return total
 
     except Exception as e:
         logging.exception(
@@ -184,14 +568,379 @@ async def ingest_file_to_qdrant(content: str, filename: str, collection_name: st
         raise
 
 
+# --- Semantic Search ---
+
+
+def build_search_filter(filter_source: Optional[str], filter_filename: Optional[str]) -> Optional[Filter]:
+    filters = []
+    if filter_source:
+        filters.append(FieldCondition(
+            key="source", match=MatchValue(value=filter_source)))
+    if filter_filename:
+        filters.append(FieldCondition(
+            key="filename", match=MatchValue(value=filter_filename)))
+
+    return Filter(must=filters) if filters else None
+
+
+async def search_collection(qdrant: AsyncQdrantClient, embedders: EmbedderRouter,
+                            req: SemanticSearchRequest) -> SemanticSearchResponse:
+    """
+    Embed the query and search its collection, or several merged into one
+    ranking. Responses are cached per collection until the TTL expires or the
+    collection is written to.
+    """
+    return (await search_many(qdrant, embedders, [req]))[0]
+
+
+async def search_many(qdrant: AsyncQdrantClient, embedders: EmbedderRouter,
+                      reqs: List[SemanticSearchRequest]) -> List[SemanticSearchResponse]:
+    """
+    Answer several searches together, in input order.
+
+    A search of several collections (or "all") is split into one search per
+    collection. All of them are answered together, then each multi-collection
+    search's results are merged into a single ranking. A collection that fails
+    is left out of such a search, which then lists only the collections it
+    searched.
+    """
+    targets: List[Optional[List[str]]] = []
+    flat: List[SemanticSearchRequest] = []
+    skippable: Set[int] = set()
+    for req in reqs:
+        if isinstance(req.collection, str) and req.collection != ALL_COLLECTIONS:
+            targets.append(None)
+            flat.append(req)
+        else:
+            collections = await resolve_collections(qdrant, embedders, req.collection)
+            targets.append(collections)
+            skippable.update(range(len(flat), len(flat) + len(collections)))
+            flat.extend(req.model_copy(update={"collection": collection}) for collection in collections)
+
+    answered = iter(await _search_single_collections(qdrant, embedders, flat, skippable))
+    responses = []
+    for req, collections in zip(reqs, targets):
+        if collections is None:
+            responses.append(next(answered))
+        else:
+            searched = [(collection, response) for collection, response
+                        in zip(collections, [next(answered) for _ in collections]) if response is not None]
+            # Models were looked up when planning the searches, so these are cache hits
+            models = [await collection_model(qdrant, collection) for collection, _ in searched]
+            responses.append(merge_collection_responses(
+                req, [collection for collection, _ in searched], [response for _, response in searched], models))
+    return responses
+
+
+async def resolve_collections(qdrant: AsyncQdrantClient, embedders: EmbedderRouter,
+                              collection: Union[str, List[str]]) -> List[str]:
+    """
+    The collections a search names. "all" stands for the collections this server
+    manages, i.e. those with a recorded embedding model, whose vectors the query
+    embedder routed to them can search. Other collections in Qdrant are left out.
+    """
+    global _searchable_collections
+    names = [collection] if isinstance(collection, str) else collection
+    if ALL_COLLECTIONS not in names:
+        return list(dict.fromkeys(names))
+    if _searchable_collections is None or _searchable_collections[0] < time.monotonic():
+        response = await qdrant.get_collections()
+        names = sorted(c.name for c in response.collections)
+        searchable = await asyncio.gather(*(_is_searchable(qdrant, embedders, name) for name in names))
+        _searchable_collections = (time.monotonic() + COLLECTION_CACHE_TTL_SECONDS,
+                                   [name for name, ok in zip(names, searchable) if ok])
+    return _searchable_collections[1]
+
+
+async def _is_searchable(qdrant: AsyncQdrantClient, embedders: EmbedderRouter, collection_name: str) -> bool:
+    try:
+        info = await qdrant.get_collection(collection_name)
+    except Exception as e:
+        logger.warning(f"Leaving {collection_name} out of searches of all collections: {e}")
+        return False
+    model = (info.config.metadata or {}).get(EMBED_MODEL_KEY)
+    _collection_models[collection_name] = model
+    vectors = info.config.params.vectors
+    if model is None or not isinstance(vectors, VectorParams):
+        return False
+    embedder = embedders.for_query(collection_name, model)
+    return embedder.model_name == model and embedder.dimension == vectors.size
+
+
+async def _search_single_collections(qdrant: AsyncQdrantClient, embedders: EmbedderRouter,
+                                     reqs: List[SemanticSearchRequest],
+                                     skippable: Optional[Set[int]] = None) -> List[Optional[SemanticSearchResponse]]:
+    """
+    Answer searches of one collection each, in input order.
+
+    Cached responses are reused. The remaining queries are embedded in one batched
+    call per model, each distinct query once, and sent as one batch query per
+    collection, with collections searched concurrently. Hybrid queries on
+    collections without a sparse index fall back to dense search.
+
+    When a collection fails and all its searches are at positions in
+    `skippable`, they are logged and answered with None instead of failing the batch.
+    """
+    responses: List[Optional[SemanticSearchResponse]] = [None] * len(reqs)
+    skippable = skippable or set()
+
+    def skip(collection: str, positions: List[int], error: Exception) -> None:
+        if not skippable.issuperset(positions):
+            raise error
+        logger.warning(f"Skipping collection {collection} in a multi-collection search: {error}")
+        for position in positions:
+            pending.pop(position, None)
+
+    pending: Dict[int, Tuple] = {}
+    for position, req in enumerate(reqs):
+        cache_key = search_cache.make_key(
+            req.query, req.collection, req.top_k,
+            (req.filter_source, req.filter_filename, req.mode, req.fusion, req.dense_weight, req.hnsw_ef, req.exact))
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            responses[position] = cached.model_copy(
+                update={"query": req.query, "cached": True})
+        else:
+            pending[position] = cache_key
+
+    if pending:
+        # Queries are embedded with their collection's model, one batch per model
+        groups: Dict[int, Tuple[Embedder, List[int]]] = {}
+        for position in list(pending):
+            collection = reqs[position].collection
+            try:
+                model = await collection_model(qdrant, collection)
+            except Exception as e:
+                skip(collection, [position], e)
+                continue
+            embedder = embedders.for_query(collection, model)
+            groups.setdefault(id(embedder), (embedder, []))[1].append(position)
+
+        vectors: Dict[int, List[float]] = {}
+
+        async def embed_group(embedder: Embedder, positions: List[int]):
+            # A query searched in several collections sharing the model is embedded once
+            queries = list(dict.fromkeys(reqs[position].query for position in positions))
+            batch = dict(zip(queries, await embedder.get_embeddings(queries)))
+            vectors.update((position, batch[reqs[position].query]) for position in positions)
+
+        try:
+            # Query embeddings go ahead of any ingestion waiting for the Gemini quota
+            async with span("search.embed", queries=len(pending)):
+                with interactive():
+                    await asyncio.gather(*(embed_group(embedder, positions)
+                                           for embedder, positions in groups.values()))
+        except Exception as e:
+            raise RuntimeError(f"Embedding generation failed: {e}")
+
+        # One or two Qdrant requests per query, answered in the same batch call
+        by_collection: Dict[str, List[Tuple[int, str, List[QueryRequest]]]] = {}
+        for position in list(pending):
+            vector = vectors[position]
+            req = reqs[position]
+            mode = req.mode
+            sparse = encode_query(req.query) if mode == "hybrid" else None
+            try:
+                if mode == "hybrid" and not (sparse.indices and await supports_sparse(qdrant, req.collection)):
+                    mode = "dense"
+            except Exception as e:
+                skip(req.collection, [position], e)
+                continue
+            by_collection.setdefault(req.collection, []).append(
+                (position, mode, build_query_requests(req, mode, vector, sparse)))
+
+        async def query_collection(collection: str, plans: List[Tuple[int, str, List[QueryRequest]]]):
+            try:
+                async with span("search.qdrant", collection=collection, queries=len(plans)):
+                    batch = await qdrant.query_batch_points(
+                        collection_name=collection,
+                        requests=[request for _, _, requests in plans for request in requests])
+            except Exception as e:
+                skip(collection, [position for position, _, _ in plans], e)
+                return
+            offset = 0
+            hits: List[Tuple[int, str, List[ScoredPoint]]] = []
+            for position, mode, requests in plans:
+                results = batch[offset:offset + len(requests)]
+                offset += len(requests)
+                req = reqs[position]
+                if len(results) == 2:
+                    points = weighted_fusion(
+                        results[0].points, results[1].points, req.dense_weight, req.top_k)
+                else:
+                    points = results[0].points
+                hits.append((position, mode, points))
+
+            texts = await hydrate_texts(collection, [point for _, _, points in hits for point in points])
+            for position, mode, points in hits:
+                req = reqs[position]
+                responses[position] = SemanticSearchResponse(
+                    query=req.query,
+                    collection=req.collection,
+                    mode=mode,
+                    results=to_search_results(points, req.collection, texts)
+                )
+                search_cache.put(pending[position], responses[position])
+
+        await asyncio.gather(*(query_collection(collection, plans)
+                               for collection, plans in by_collection.items()))
+
+    return responses
+
+
+def build_query_requests(req: SemanticSearchRequest, mode: str, vector: List[float],
+                         sparse: Optional[SparseVector]) -> List[QueryRequest]:
+    search_filter = build_search_filter(req.filter_source, req.filter_filename)
+    params = search_params(profile_for(req.collection), req.hnsw_ef, req.exact)
+    if mode == "dense":
+        return [QueryRequest(query=vector, limit=req.top_k, with_payload=SEARCH_PAYLOAD_FIELDS,
+                             filter=search_filter, params=params)]
+
+    # Each side retrieves a deeper candidate list so fusion can promote results
+    # that rank moderately in both
+    candidates = req.top_k * HYBRID_CANDIDATE_FACTOR
+    if req.fusion == "rrf":
+        return [QueryRequest(
+            prefetch=[
+                Prefetch(query=vector, limit=candidates, filter=search_filter, params=params),
+                Prefetch(query=sparse, using=SPARSE_VECTOR_NAME, limit=candidates, filter=search_filter),
+            ],
+            query=FusionQuery(fusion=Fusion.RRF),
+            limit=req.top_k,
+            with_payload=SEARCH_PAYLOAD_FIELDS,
+        )]
+    return [
+        QueryRequest(query=vector, limit=candidates, with_payload=SEARCH_PAYLOAD_FIELDS,
+                     filter=search_filter, params=params),
+        QueryRequest(query=sparse, using=SPARSE_VECTOR_NAME, limit=candidates,
+                     with_payload=SEARCH_PAYLOAD_FIELDS, filter=search_filter),
+    ]
+
+
+def weighted_fusion(dense: List[ScoredPoint], sparse: List[ScoredPoint],
+                    dense_weight: float, top_k: int) -> List[ScoredPoint]:
+    """
+    Combine min-max normalised dense and sparse scores as
+    dense_weight * dense + (1 - dense_weight) * sparse.
+    """
+    def normalised(points: List[ScoredPoint]) -> Dict[str, float]:
+        if not points:
+            return {}
+        low, high = min(p.score for p in points), max(p.score for p in points)
+        span = high - low
+        return {str(p.id): (p.score - low) / span if span else 1.0 for p in points}
+
+    dense_scores, sparse_scores = normalised(dense), normalised(sparse)
+    points = {str(p.id): p for p in [*sparse, *dense]}
+    fused = [
+        point.model_copy(update={"score": dense_weight * dense_scores.get(point_id, 0.0) +
+                                 (1 - dense_weight) * sparse_scores.get(point_id, 0.0)})
+        for point_id, point in points.items()
+    ]
+    return sorted(fused, key=lambda point: point.score, reverse=True)[:top_k]
+
+
+async def hydrate_texts(collection: str, points: List[ScoredPoint]) -> Dict[str, str]:
+    """
+    Look up, in one batch, the text of the points whose payload has none
+    because it is kept in the local text store.
+    """
+    text_store = get_text_store()
+    missing = [str(point.id) for point in points if not (point.payload or {}).get("text")]
+    texts: Dict[str, str] = {}
+    if text_store is not None and missing:
+        async with span("search.hydrate", points=len(missing)):
+            texts = await asyncio.to_thread(text_store.get_many, collection, missing)
+    if len(texts) < len(set(missing)):
+        logger.warning(f"{len(set(missing)) - len(texts)} search hits in {collection} have no stored text "
+                       f"and are left out; ingest their documents again to restore it")
+    return texts
+
+
+def to_search_results(points: List[ScoredPoint], collection: str,
+                      texts: Optional[Dict[str, str]] = None) -> List[SearchResult]:
+    """Search results of the points, leaving out points whose text is missing."""
+    results = []
+    for item in points:
+        payload = item.payload or {}
+        text = payload.get("text") or (texts or {}).get(str(item.id))
+        if not text:
+            continue
+        results.append(SearchResult(
+            id=str(item.id),
+            collection=collection,
+            text=text,
+            score=item.score,
+            filename=payload.get("filename"),
+            title=payload.get("title"),
+            chunk_index=payload.get("chunk_index"),
+            source=payload.get("source")
+        ))
+    return results
+
+
+def merge_collection_responses(req: SemanticSearchRequest, collections: List[str],
+                               responses: List[SemanticSearchResponse],
+                               models: List[Optional[str]]) -> SemanticSearchResponse:
+    """
+    Merge the per-collection responses of a multi-collection search into one
+    top_k ranking. Dense results of collections built with the same model
+    (`models`, None when not recorded) are cosine similarities in one space and
+    are merged on their scores. Scores of different models, and hybrid scores,
+    which depend on each collection's fusion and term statistics, are not
+    comparable, so such results are merged by reciprocal rank instead, with the
+    original score kept as `raw_score`.
+    """
+    same_model = len(set(models)) == 1 and None not in models
+    if len(responses) == 1:
+        results = list(responses[0].results)
+    elif same_model and all(response.mode == "dense" for response in responses):
+        results = sorted((result for response in responses for result in response.results),
+                         key=lambda result: result.score, reverse=True)
+    else:
+        results = [
+            result.model_copy(update={"score": 1 / (MERGE_RRF_K + rank), "raw_score": result.score})
+            for response in responses for rank, result in enumerate(response.results, start=1)]
+        # Equal ranks keep the order of the collections
+        results.sort(key=lambda result: result.score, reverse=True)
+
+    # "mixed" when hybrid fell back to dense in some of the collections only
+    modes = {response.mode for response in responses} or {req.mode}
+    return SemanticSearchResponse(
+        query=req.query,
+        collection=req.collection,
+        collections=collections,
+        mode=modes.pop() if len(modes) == 1 else "mixed",
+        cached=bool(responses) and all(response.cached for response in responses),
+        results=results[:req.top_k],
+    )
+
+
+def merge_search_results(responses: List[SemanticSearchResponse], top_k: int) -> List[SearchResult]:
+    """Merge results across responses, keeping the best score per point."""
+    best: Dict[Tuple[str, str], SearchResult] = {}
+    for response in responses:
+        for result in response.results:
+            key = (result.collection, result.id)
+            if key not in best or result.score > best[key].score:
+                best[key] = result
+    return sorted(best.values(), key=lambda result: result.score, reverse=True)[:top_k]
+
+
 # Utility method to get embedding for a given text
 
 
-def get_embedding(text: str) -> List[float]:
+async def get_embedding(embedders: EmbedderRouter, text: str, collection: Optional[str] = None) -> List[float]:
     try:
-        # Use Gemini embedder (could expand with fallback logic here)
-        vector = gemini_embedder.get_embedding(text)
+        # Same model as the collection's stored vectors, or the default backend.
+        # Callers wait on this one (e.g. the agentics server's answer cache), like a search.
+        with interactive():
+            vector = await embedders.for_collection(collection).get_embedding(text)
         return vector
     except Exception as e:
         # Handle/embed fallback or error logging
         raise RuntimeError(f"Embedding generation failed: {e}")
+
+
+def get_embedding_cache_stats(embedders: EmbedderRouter) -> Dict[str, float]:
+    return embedders.cache.stats()
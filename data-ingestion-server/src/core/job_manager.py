@@ -0,0 +1,365 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+from qdrant_client import AsyncQdrantClient
+
+from .progress import IngestProgress
+from .ingest_controller import fetch_and_ingest_confluence_pages, ingest_file_to_qdrant
+from ..models.job_model import JobStatusResponse
+from ..service.embedders import EmbedderRouter
+from ..utils.chunker import CHUNK_STRATEGY
+from ..utils.ingest_util import stream_text_from_path
+
+logger = logging.getLogger("job_manager")
+
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", ".cache/jobs.sqlite3")
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", ".cache/uploads")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_COLLECTION_CONCURRENCY = int(os.getenv("JOB_COLLECTION_CONCURRENCY", 2))
+# Minimum seconds between progress writes to the job store
+JOB_PERSIST_INTERVAL = 1.0
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATES = {SUCCEEDED, FAILED, CANCELLED}
+
+
+class Job(IngestProgress):
+    def __init__(self, job_id: str, kind: str, collection: str, params: Dict[str, Any],
+                 status: str = QUEUED, stage: str = QUEUED, chunks_done: int = 0, chunks_total: int = 0,
+                 errors: Optional[List[str]] = None, result: Optional[Dict[str, Any]] = None,
+                 created_at: Optional[float] = None, started_at: Optional[float] = None,
+                 finished_at: Optional[float] = None, store: Optional["JobStore"] = None):
+        self.job_id = job_id
+        self.kind = kind
+        self.collection = collection
+        self.params = params
+        self.status = status
+        self.stage = stage
+        self.chunks_done = chunks_done
+        self.chunks_total = chunks_total
+        self.errors = errors or []
+        self.result = result
+        self.created_at = created_at or time.time()
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self._store = store
+        self._last_persist = 0.0
+
+    # --- IngestProgress ---
+
+    def set_stage(self, stage: str) -> None:
+        self.stage = stage
+        self._persist(force=True)
+
+    def add_total(self, chunks: int) -> None:
+        self.chunks_total += chunks
+        self._persist()
+
+    def advance(self, chunks: int) -> None:
+        self.chunks_done += chunks
+        self._persist()
+
+    def add_error(self, message: str) -> None:
+        self.errors.append(message)
+        self._persist(force=True)
+
+    # --- Lifecycle ---
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+    @property
+    def source_key(self) -> Tuple[str, str]:
+        """What the job writes and may delete: a document's filename, or the whole source of its kind."""
+        return self.collection, self.params.get("filename") or self.kind
+
+    def mark_queued(self) -> None:
+        self.status = self.stage = QUEUED
+        self.chunks_done = self.chunks_total = 0
+        self.started_at = None
+        self._persist(force=True)
+
+    def mark_running(self) -> None:
+        self.status = RUNNING
+        self.stage = "starting"
+        self.started_at = time.time()
+        self._persist(force=True)
+
+    def mark_finished(self, status: str, result: Optional[Dict[str, Any]] = None,
+                      error: Optional[str] = None) -> None:
+        self.status = self.stage = status
+        self.result = result
+        if error:
+            self.errors.append(error)
+        self.finished_at = time.time()
+        self._persist(force=True)
+
+    def to_response(self) -> JobStatusResponse:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return JobStatusResponse(
+            job_id=self.job_id,
+            kind=self.kind,
+            collection=self.collection,
+            status=self.status,
+            stage=self.stage,
+            chunks_done=self.chunks_done,
+            chunks_total=self.chunks_total,
+            throughput=self.chunks_done / elapsed if elapsed > 0 else 0.0,
+            errors=self.errors,
+            params=self.params,
+            result=self.result,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+        )
+
+    def _persist(self, force: bool = False) -> None:
+        now = time.time()
+        if self._store is None or (not force and now - self._last_persist < JOB_PERSIST_INTERVAL):
+            return
+        self._last_persist = now
+        self._store.save(self)
+
+
+class JobStore:
+    """
+    SQLite-backed record of ingestion jobs, so they survive restarts.
+
+    Statements run on one writer thread, in submission order: `save` returns
+    without waiting for the commit, so progress updates never block the event
+    loop, and reads queue behind the writes before them.
+    """
+
+    COLUMNS = ("job_id", "kind", "collection", "status", "stage", "chunks_done", "chunks_total",
+               "errors", "params", "result", "created_at", "started_at", "finished_at")
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, collection TEXT NOT NULL, "
+            "status TEXT NOT NULL, stage TEXT NOT NULL, chunks_done INTEGER NOT NULL, "
+            "chunks_total INTEGER NOT NULL, errors TEXT NOT NULL, params TEXT NOT NULL, "
+            "result TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL)")
+        self._db.commit()
+
+    def save(self, job: Job) -> None:
+        row = (job.job_id, job.kind, job.collection, job.status, job.stage, job.chunks_done,
+               job.chunks_total, json.dumps(job.errors), json.dumps(job.params),
+               json.dumps(job.result) if job.result is not None else None,
+               job.created_at, job.started_at, job.finished_at)
+        self._writer.submit(self._write, row)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        rows = self._select("WHERE job_id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def unfinished(self) -> List[Job]:
+        return self._select(
+            "WHERE status NOT IN (?, ?, ?) ORDER BY created_at", tuple(TERMINAL_STATES))
+
+    def recent(self, limit: int) -> List[Job]:
+        return self._select("ORDER BY created_at DESC LIMIT ?", (limit,))
+
+    def close(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._db.close()
+
+    def _write(self, row: tuple) -> None:
+        try:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self.COLUMNS))})", row)
+            self._db.commit()
+        except Exception:
+            logger.exception(f"Failed to save job {row[0]}")
+
+    def _select(self, clause: str, args: tuple) -> List[Job]:
+        rows = self._writer.submit(
+            lambda: self._db.execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs {clause}", args).fetchall()
+        ).result()
+        jobs = []
+        for row in rows:
+            values = dict(zip(self.COLUMNS, row))
+            values["errors"] = json.loads(values["errors"])
+            values["params"] = json.loads(values["params"])
+            values["result"] = json.loads(
+                values["result"]) if values["result"] else None
+            jobs.append(Job(**values, store=self))
+        return jobs
+
+
+JobRunner = Callable[[Job], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobManager:
+    """
+    Runs ingestion jobs in the background on a bounded pool, with at most
+    `collection_concurrency` jobs per Qdrant collection at a time. Jobs writing
+    the same source (one filename, or a Confluence space) run one after another,
+    since each one deletes the points the other has not written.
+
+    Only unfinished jobs are kept in memory; finished ones are read back from
+    the store.
+    """
+
+    def __init__(self, store: JobStore, runners: Dict[str, JobRunner],
+                 workers: int = JOB_WORKERS, collection_concurrency: int = JOB_COLLECTION_CONCURRENCY):
+        self._store = store
+        self._runners = runners
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._workers = asyncio.Semaphore(workers)
+        self._collection_slots: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(collection_concurrency))
+        # Source key -> (lock, jobs holding or waiting for it)
+        self._source_locks: Dict[Tuple[str, str], Tuple[asyncio.Lock, int]] = {}
+        self._stopping = False
+
+    def submit(self, kind: str, collection: str, params: Dict[str, Any]) -> Job:
+        if kind not in self._runners:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(str(uuid4()), kind, collection, params, store=self._store)
+        self._store.save(job)
+        self._schedule(job)
+        logger.info(f"Queued {kind} job {job.job_id} for {collection}")
+        return job
+
+    def active(self, kind: str) -> Optional[Job]:
+        """Return a queued or running job of the given kind, if any."""
+        for job in self._jobs.values():
+            if job.kind == kind and not job.finished:
+                return job
+        return None
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id) or self._store.get(job_id)
+
+    def recent(self, limit: int = 50) -> List[Job]:
+        return [self._jobs.get(job.job_id, job) for job in self._store.recent(limit)]
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancels a queued or running job and returns it, or None when no such job is
+        active. Only in-memory state is read, so it is safe to call on the event loop.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        if job.status == QUEUED:
+            # A task cancelled before it first runs never reaches its handlers
+            job.mark_finished(CANCELLED)
+            self._finalize(job)
+        return job
+
+    async def start(self) -> None:
+        """Resume jobs that were queued or running when the server last stopped."""
+        for job in self._store.unfinished():
+            spool_path = job.params.get("spool_path")
+            if spool_path and not os.path.exists(spool_path):
+                job.mark_finished(
+                    FAILED, error="Interrupted by a restart and the uploaded file is no longer available.")
+                continue
+            logger.info(f"Resuming {job.kind} job {job.job_id}")
+            job.mark_queued()
+            self._schedule(job)
+
+    async def stop(self) -> None:
+        """Cancel in-flight jobs but leave them queued so the next start resumes them."""
+        self._stopping = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._store.close()
+
+    def _schedule(self, job: Job) -> None:
+        self._jobs[job.job_id] = job
+        self._tasks[job.job_id] = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: Job) -> None:
+        key = job.source_key
+        lock, users = self._source_locks.get(key, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._source_locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                async with self._collection_slots[job.collection]:
+                    async with self._workers:
+                        job.mark_running()
+                        result = await self._runners[job.kind](job)
+                        job.mark_finished(SUCCEEDED, result=result)
+                        logger.info(f"Job {job.job_id} succeeded")
+        except asyncio.CancelledError:
+            if self._stopping:
+                job.mark_queued()
+            elif not job.finished:
+                job.mark_finished(CANCELLED)
+                logger.info(f"Job {job.job_id} cancelled")
+        except Exception as e:
+            logger.exception(f"Job {job.job_id} failed")
+            job.mark_finished(FAILED, error=str(e))
+        finally:
+            lock, users = self._source_locks[key]
+            if users > 1:
+                self._source_locks[key] = (lock, users - 1)
+            else:
+                del self._source_locks[key]
+            self._finalize(job)
+
+    def _finalize(self, job: Job) -> None:
+        self._tasks.pop(job.job_id, None)
+        if not job.finished:
+            return
+        # Already saved by mark_finished, later lookups read it from the store
+        self._jobs.pop(job.job_id, None)
+        spool_path = job.params.get("spool_path")
+        if spool_path and os.path.exists(spool_path):
+            os.remove(spool_path)
+
+
+def create_job_manager(qdrant: AsyncQdrantClient, embedders: EmbedderRouter) -> JobManager:
+    async def run_confluence(job: Job) -> Dict[str, Any]:
+        return await fetch_and_ingest_confluence_pages(
+            qdrant, embedders, mode=job.params["mode"], progress=job)
+
+    async def run_document(job: Job) -> Dict[str, Any]:
+        job.set_stage("extracting")
+        ingested = await ingest_file_to_qdrant(
+            qdrant,
+            embedders,
+            segments=stream_text_from_path(job.params["spool_path"]),
+            filename=job.params["filename"],
+            collection_name=job.collection,
+            chunk_strategy=job.params.get("chunk_strategy", CHUNK_STRATEGY),
+            replace=job.params.get("replace", True),
+            progress=job,
+        )
+        if not ingested:
+            raise ValueError("No extractable content found.")
+        return {"chunks": ingested}
+
+    os.makedirs(JOB_SPOOL_DIR, exist_ok=True)
+    return JobManager(JobStore(), {"confluence": run_confluence, "document": run_document})
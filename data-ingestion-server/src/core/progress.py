@@ -0,0 +1,20 @@
+class IngestProgress:
+    """
+    Receives progress updates from the ingestion pipeline. The base class ignores
+    them; background jobs subclass it to track and persist their progress.
+    """
+
+    def set_stage(self, stage: str) -> None:
+        pass
+
+    def add_total(self, chunks: int) -> None:
+        pass
+
+    def advance(self, chunks: int) -> None:
+        pass
+
+    def add_error(self, message: str) -> None:
+        pass
+
+
+NO_PROGRESS = IngestProgress()
@@ -0,0 +1,91 @@
+import os
+import time
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from uuid import uuid4
+
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 2048))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", 300))
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+class SearchResultCache:
+    """
+    TTL + LRU cache of search responses.
+
+    Every key embeds the collection's generation counter, and ingestion bumps that
+    counter whenever it writes to the collection, so results computed before the
+    write can never be served after it.
+
+    The counters live in this process. Run the server with a single worker (as the
+    Dockerfile does), or results may stay stale on workers that did not ingest.
+    """
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES, ttl_seconds: float = SEARCH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        # Generations restart from zero with the process; the epoch tells consumers
+        # outside this process that earlier counter values no longer apply
+        self.epoch = uuid4().hex
+
+    def generation(self, collection: str) -> int:
+        return self._generations[collection]
+
+    def generations(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._generations)
+
+    def make_key(self, query: str, collection: str, top_k: int, filters: Hashable) -> Tuple:
+        return (collection, self.generation(collection), normalize_query(query), top_k, filters)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple, value: Any) -> None:
+        with self._lock:
+            # Drop results computed against a generation that was bumped meanwhile
+            if key[1] != self._generations[key[0]]:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, collection: str) -> None:
+        """Called after every write to `collection`."""
+        with self._lock:
+            self._generations[collection] += 1
+            for key in [key for key in self._entries if key[0] == collection]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+# Shared by the search endpoint and every ingestion path in this process
+search_cache = SearchResultCache()
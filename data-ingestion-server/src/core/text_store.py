@@ -0,0 +1,97 @@
+import os
+import zlib
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# Where chunk text is kept: "qdrant" (in every point's payload) or "local" (TEXT_STORE_PATH)
+PAYLOAD_TEXT_STORE = os.getenv("PAYLOAD_TEXT_STORE", "qdrant")
+TEXT_STORE_PATH = os.getenv("TEXT_STORE_PATH", ".cache/chunk_text.sqlite3")
+# zlib level 6 is its default trade-off between speed and size
+TEXT_STORE_COMPRESSION_LEVEL = 6
+# Ids per statement, under SQLite's host parameter limit
+LOOKUP_BATCH = 500
+
+_text_store: Optional["TextStore"] = None
+_text_store_lock = threading.Lock()
+
+
+class TextStore:
+    """
+    Chunk texts kept outside Qdrant, zlib-compressed in SQLite and keyed by
+    (collection, point id). Points of the same content share an id across
+    collections, so the collection is part of the key and deleting from one
+    collection never removes text another one still returns.
+    """
+
+    def __init__(self, path: str = TEXT_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS texts ("
+            "collection TEXT NOT NULL, point_id TEXT NOT NULL, body BLOB NOT NULL, "
+            "PRIMARY KEY (collection, point_id)) WITHOUT ROWID")
+        self._db.commit()
+
+    def put_many(self, collection: str, texts: Dict[str, str]) -> None:
+        rows = [(collection, point_id, zlib.compress(text.encode("utf-8"), TEXT_STORE_COMPRESSION_LEVEL))
+                for point_id, text in texts.items()]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO texts (collection, point_id, body) VALUES (?, ?, ?)", rows)
+            self._db.commit()
+
+    def get_many(self, collection: str, point_ids: Iterable[str]) -> Dict[str, str]:
+        """Texts of the given points; ids without a stored text are left out."""
+        ids = list(dict.fromkeys(point_ids))
+        found: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(ids), LOOKUP_BATCH):
+                batch = ids[start:start + LOOKUP_BATCH]
+                rows = self._db.execute(
+                    f"SELECT point_id, body FROM texts WHERE collection = ? "
+                    f"AND point_id IN ({','.join('?' * len(batch))})", (collection, *batch)).fetchall()
+                found.update((point_id, zlib.decompress(body).decode("utf-8")) for point_id, body in rows)
+        return found
+
+    def delete_many(self, collection: str, point_ids: List[str]) -> None:
+        with self._lock:
+            self._db.executemany(
+                "DELETE FROM texts WHERE collection = ? AND point_id = ?",
+                [(collection, point_id) for point_id in point_ids])
+            self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, stored_bytes = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM texts").fetchone()
+        return {"entries": entries, "compressed_bytes": stored_bytes}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def get_text_store() -> Optional[TextStore]:
+    """The process-wide text store, or None when chunk text stays in Qdrant."""
+    global _text_store
+    if PAYLOAD_TEXT_STORE not in ("qdrant", "local"):
+        raise ValueError(f"Unknown PAYLOAD_TEXT_STORE: {PAYLOAD_TEXT_STORE}. Available: qdrant, local")
+    if PAYLOAD_TEXT_STORE != "local":
+        return None
+    with _text_store_lock:
+        if _text_store is None:
+            _text_store = TextStore()
+        return _text_store
+
+
+def close_text_store() -> None:
+    global _text_store
+    with _text_store_lock:
+        if _text_store is not None:
+            _text_store.close()
+            _text_store = None
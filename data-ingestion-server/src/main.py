@@ -1,12 +1,40 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from .api.ingest_view import router as ingest_router
+from .core.ingest_controller import create_embedder, create_qdrant_client
+from .core.job_manager import create_job_manager
+from .core.text_store import close_text_store, get_text_store
+from .utils.pdf_extractor import shutdown_ocr_pool
+from .utils.telemetry import CONTENT_TYPE_LATEST, HTTP_REQUEST_SECONDS, REQUEST_ID_HEADER, new_request_id, render_metrics, request_id
 from fastapi.middleware.cors import CORSMiddleware
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Long-lived, pooled clients shared by every request
+    app.state.qdrant = create_qdrant_client()
+    app.state.embedders = create_embedder()
+    # Opened up front so a bad PAYLOAD_TEXT_STORE fails at startup
+    get_text_store()
+    app.state.jobs = create_job_manager(app.state.qdrant, app.state.embedders)
+    await app.state.jobs.start()
+    try:
+        yield
+    finally:
+        await app.state.jobs.stop()
+        await app.state.qdrant.close()
+        app.state.embedders.close()
+        shutdown_ocr_pool()
+        close_text_store()
+
+
 app = FastAPI(
     title="NEXLIFY Ingestion API",
     description="NEXLIFY Ingestion API for Confluence and other data sources",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS setup for mobile + web clients
@@ -19,12 +47,36 @@ app.add_middleware(
 )
 
 
-app.include_router(ingest_router, prefix="/ingest")
 
 
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    # Keep the caller's request id so one search can be followed across the three services
+    rid = request.headers.get(REQUEST_ID_HEADER) or new_request_id()
+    token = request_id.set(rid)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_id.reset(token)
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.labels(
+        method=request.method,
+        route=route.path if route is not None else "unmatched",
+        status=str(response.status_code),
+    ).observe(time.perf_counter() - started)
+    response.headers[REQUEST_ID_HEADER] = rid
+    return response
 
 
+app.include_router(ingest_router, prefix="/ingest")
+
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Nexlify"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -1,9 +1,10 @@
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import List, Literal, Optional, Union
+from pydantic import BaseModel, Field
 
 
 class EmbeddingRequest(BaseModel):
     text: str
+    collection: Optional[str] = None  # Embed with this collection's backend
 
 
 class EmbeddingResponse(BaseModel):
@@ -11,18 +12,35 @@ class EmbeddingResponse(BaseModel):
 
 # -----------  Input/Output Models ------------------
 
+# Largest number of results one search may ask for
+MAX_TOP_K = 100
+
 
 class SemanticSearchRequest(BaseModel):
     query: str
-    collection: str = "dev_docs"
-    top_k: int = 5
+    # One collection, several, or "all"; with more than one, the query is embedded
+    # once per model, searched in every collection concurrently and the results
+    # merged into one ranking
+    collection: Union[str, List[str]] = Field("dev_docs", min_length=1)
+    top_k: int = Field(5, ge=1, le=MAX_TOP_K)
     filter_source: Optional[str] = None
     filter_filename: Optional[str] = None
+    # "hybrid" adds BM25 keyword matching, which helps exact terms like error codes
+    mode: Literal["dense", "hybrid"] = "dense"
+    fusion: Literal["rrf", "weighted"] = "rrf"
+    dense_weight: float = Field(0.5, ge=0.0, le=1.0)  # Only used by weighted fusion
+    # Dense search accuracy: a wider HNSW beam than the collection profile's, or
+    # exact (brute-force) search for evaluation and small filtered result sets
+    hnsw_ef: Optional[int] = Field(None, ge=1)
+    exact: bool = False
 
 
 class SearchResult(BaseModel):
+    id: Optional[str] = None
+    collection: Optional[str] = None
     text: str
     score: float
+    raw_score: Optional[float] = None  # Score within its own collection, when `score` is a merged rank score
     filename: Optional[str] = None
     title: Optional[str] = None
     chunk_index: Optional[int] = None
@@ -31,5 +49,19 @@ class SearchResult(BaseModel):
 
 class SemanticSearchResponse(BaseModel):
     query: str
-    collection: str
+    collection: Union[str, List[str]]
     results: List[SearchResult]
+    mode: str = "dense"  # Mode actually used; hybrid falls back to dense without a sparse index
+    cached: bool = False  # True when served from the search result cache
+    collections: Optional[List[str]] = None  # Collections searched, on multi-collection searches
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[SemanticSearchRequest] = Field(..., min_length=1)
+    merge: bool = False  # Also return one deduplicated ranking across all queries
+    merge_top_k: Optional[int] = Field(None, ge=1, le=MAX_TOP_K)  # Defaults to the largest top_k of the queries
+
+
+class BatchSearchResponse(BaseModel):
+    responses: List[SemanticSearchResponse]
+    merged: Optional[List[SearchResult]] = None
@@ -0,0 +1,26 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+
+class JobSubmittedResponse(BaseModel):
+    job_id: str
+    status: str
+    kind: str
+    collection: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    collection: str
+    status: str
+    stage: str
+    chunks_done: int
+    chunks_total: int
+    throughput: float  # chunks per second while running
+    errors: List[str]
+    params: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
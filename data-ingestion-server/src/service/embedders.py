@@ -0,0 +1,112 @@
+import os
+import logging
+from typing import Callable, Dict, List, Optional
+
+from .embedding_cache import CachedEmbedder, EmbeddingCache
+from .embedding_service import Embedder, GeminiEmbedder
+from .local_embedder import LocalEmbedder
+
+logger = logging.getLogger("embedders")
+logger.setLevel(logging.INFO)
+
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "gemini")
+# Per-collection backend overrides, e.g. "dev_docs=local,confluence_docs=gemini"
+COLLECTION_EMBEDDERS = os.getenv("COLLECTION_EMBEDDERS", "")
+
+BACKENDS: Dict[str, Callable[[], Embedder]] = {
+    "gemini": GeminiEmbedder,
+    "local": LocalEmbedder,
+}
+
+
+def parse_collection_embedders(value: str) -> Dict[str, str]:
+    mapping = {}
+    for entry in value.split(","):
+        if entry.strip():
+            collection, _, backend = entry.partition("=")
+            mapping[collection.strip()] = backend.strip()
+    return mapping
+
+
+class EmbedderRouter(Embedder):
+    """
+    Picks the embedder of each collection. Every vector in a collection must come
+    from the same model: ingestion embeds with `for_collection`, and searches
+    embed with `for_query`, which matches the model the collection was built
+    with. Used directly, it embeds with the default backend.
+    """
+
+    def __init__(self, embedders: Dict[str, Embedder], default: str, collections: Dict[str, str],
+                 backends: List[Embedder], cache: EmbeddingCache):
+        self.embedders = embedders
+        self.default = embedders[default]
+        self.collections = collections
+        self.cache = cache
+        self._backends = backends
+
+    @property
+    def name(self) -> str:
+        return self.default.name
+
+    @property
+    def model_name(self) -> str:
+        return self.default.model_name
+
+    @property
+    def task_type(self) -> str:
+        return self.default.task_type
+
+    @property
+    def dimension(self) -> int:
+        return self.default.dimension
+
+    def for_collection(self, collection: Optional[str]) -> Embedder:
+        backend = self.collections.get(collection) if collection else None
+        return self.embedders[backend] if backend else self.default
+
+    def for_query(self, collection: Optional[str], built_with: Optional[str] = None) -> Embedder:
+        """
+        The embedder for search queries against `collection`, whose vectors were
+        built with the model `built_with` (None when it is not recorded): the
+        collection's backend, or another configured backend serving that model
+        when the collection was built with it (e.g. before its routing changed).
+        """
+        embedder = self.for_collection(collection)
+        if built_with is None or embedder.model_name == built_with:
+            return embedder
+        return next((other for other in self.embedders.values() if other.model_name == built_with), embedder)
+
+    async def get_embeddings(self, texts: List[str], title: Optional[str] = "Document Chunk") -> List[List[float]]:
+        return await self.default.get_embeddings(texts, title=title)
+
+    def describe(self) -> Dict[str, Dict]:
+        # Rate, queue and circuit state of the backends calling a remote provider
+        limiters = {backend.name: backend.limiter.stats()
+                    for backend in self._backends if getattr(backend, "limiter", None) is not None}
+        return {
+            name: {"model": embedder.model_name, "dimension": embedder.dimension,
+                   "default": embedder is self.default,
+                   "collections": sorted(c for c, backend in self.collections.items() if backend == name),
+                   "limiter": limiters.get(name)}
+            for name, embedder in self.embedders.items()
+        }
+
+    def close(self) -> None:
+        for backend in self._backends:
+            backend.close()
+        self.cache.close()
+
+
+def create_embedders(cache: EmbeddingCache, default: str = EMBED_BACKEND,
+                     collection_embedders: str = COLLECTION_EMBEDDERS) -> EmbedderRouter:
+    collections = parse_collection_embedders(collection_embedders)
+    names = {default, *collections.values()}
+    unknown = sorted(names - set(BACKENDS))
+    if unknown:
+        raise ValueError(
+            f"Unknown embedding backend: {', '.join(unknown)}. Available: {', '.join(sorted(BACKENDS))}")
+
+    backends = {name: BACKENDS[name]() for name in sorted(names)}
+    # Cache keys include the model name, so backends can share one cache
+    embedders: Dict[str, Embedder] = {name: CachedEmbedder(backend, cache) for name, backend in backends.items()}
+    return EmbedderRouter(embedders, default, collections, list(backends.values()), cache)
@@ -0,0 +1,268 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from .embedding_service import Embedder
+
+logger = logging.getLogger("embedding_cache")
+logger.setLevel(logging.INFO)
+
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MEMORY_MB = int(os.getenv("EMBEDDING_CACHE_MEMORY_MB", 64))
+EMBEDDING_CACHE_DISK_MB = int(os.getenv("EMBEDDING_CACHE_DISK_MB", 1024))
+
+# When the disk tier overflows it is trimmed down to this fraction of its budget,
+# so eviction runs once per batch of inserts instead of on every insert.
+DISK_EVICTION_TARGET = 0.9
+# Keys per disk lookup, under SQLite's host parameter limit
+LOOKUP_BATCH = 500
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """
+    Two-tier, content-addressed embedding cache.
+
+    The memory tier is an LRU of packed float32 vectors bounded by bytes. The disk
+    tier is a SQLite table that survives restarts and is trimmed least-recently-used
+    first once it grows past its byte budget.
+    """
+
+    def __init__(self, path: Optional[str] = EMBEDDING_CACHE_PATH,
+                 memory_max_bytes: int = EMBEDDING_CACHE_MEMORY_MB * 1024 * 1024,
+                 disk_max_bytes: int = EMBEDDING_CACHE_DISK_MB * 1024 * 1024):
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)")
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access "
+                "ON embeddings (last_access)")
+            self._db.commit()
+            row = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+            self._disk_bytes = row[0]
+
+    @staticmethod
+    def make_key(model_name: str, task_type: str, title: Optional[str], text: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model_name, task_type, title or "", text):
+            encoded = part.encode("utf-8")
+            # Length-prefix every part so ("ab", "c") and ("a", "bc") never collide
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up a batch of keys. Memory misses are read from disk in one query per
+        LOOKUP_BATCH keys, and their access times updated with a single commit.
+        """
+        with self._lock:
+            blobs: Dict[str, bytes] = {}
+            for key in keys:
+                blob = self._memory.get(key)
+                if blob is not None:
+                    self._memory.move_to_end(key)
+                    blobs[key] = blob
+
+            missing = [key for key in dict.fromkeys(keys) if key not in blobs]
+            if self._db is not None and missing:
+                for start in range(0, len(missing), LOOKUP_BATCH):
+                    batch = missing[start:start + LOOKUP_BATCH]
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                        batch).fetchall()
+                    for key, blob in rows:
+                        blobs[key] = blob
+                        self._remember(key, blob)
+                found = [key for key in missing if key in blobs]
+                if found:
+                    now = time.time()
+                    self._db.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, key) for key in found])
+                    self._db.commit()
+
+            vectors = []
+            disk_hits = set(missing)
+            for key in keys:
+                blob = blobs.get(key)
+                if blob is None:
+                    self._counters["misses"] += 1
+                elif key in disk_hits:
+                    # Repeats of a key within the batch are served from memory
+                    disk_hits.discard(key)
+                    self._counters["disk_hits"] += 1
+                else:
+                    self._counters["memory_hits"] += 1
+                vectors.append(None if blob is None else _unpack(blob))
+            return vectors
+
+    def put(self, key: str, vector: List[float]) -> None:
+        self.put_many({key: vector})
+
+    def put_many(self, entries: Dict[str, List[float]]) -> None:
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            rows = []
+            for key, vector in entries.items():
+                blob = _pack(vector)
+                self._remember(key, blob)
+                rows.append((key, blob, len(blob), now))
+
+            if self._db is not None:
+                for key, blob, size, _ in rows:
+                    existing = self._db.execute(
+                        "SELECT size FROM embeddings WHERE key = ?", (key,)).fetchone()
+                    self._disk_bytes += size - (existing[0] if existing else 0)
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) "
+                    "VALUES (?, ?, ?, ?)", rows)
+                self._db.commit()
+                if self._disk_bytes > self.disk_max_bytes:
+                    self._evict_disk()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._counters["memory_hits"] + \
+                self._counters["disk_hits"] + self._counters["misses"]
+            hits = lookups - self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # Callers must hold self._lock
+
+    def _remember(self, key: str, blob: bytes) -> None:
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = blob
+        self._memory_bytes += len(blob)
+        while self._memory_bytes > self.memory_max_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counters["memory_evictions"] += 1
+
+    def _evict_disk(self) -> None:
+        target = int(self.disk_max_bytes * DISK_EVICTION_TARGET)
+        cursor = self._db.execute(
+            "SELECT key, size FROM embeddings ORDER BY last_access ASC")
+        doomed = []
+        for key, size in cursor:
+            if self._disk_bytes <= target:
+                break
+            doomed.append((key,))
+            self._disk_bytes -= size
+        cursor.close()
+        self._db.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self._db.commit()
+        self._counters["disk_evictions"] += len(doomed)
+        logger.info(f"Evicted {len(doomed)} embeddings from disk cache")
+
+
+class CachedEmbedder(Embedder):
+    """
+    Wraps an embedder so repeated (model, task type, title, text) inputs are
+    served from an EmbeddingCache instead of the provider.
+    """
+
+    def __init__(self, embedder: Embedder, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+
+    @property
+    def name(self) -> str:
+        return self.embedder.name
+
+    @property
+    def model_name(self) -> str:
+        return self.embedder.model_name
+
+    @property
+    def task_type(self) -> str:
+        return self.embedder.task_type
+
+    @property
+    def dimension(self) -> int:
+        return self.embedder.dimension
+
+    def _key(self, text: str, title: Optional[str]) -> str:
+        return EmbeddingCache.make_key(self.model_name, self.task_type, title, text)
+
+    async def get_embeddings(self, texts: List[str], title: Optional[str] = "Document Chunk") -> List[List[float]]:
+        keys = [self._key(text, title) for text in texts]
+        # SQLite lookups are blocking, keep them off the event loop
+        vectors: List[Optional[List[float]]] = await asyncio.to_thread(
+            self.cache.get_many, keys)
+
+        # Embed each distinct missing text once, even if it repeats in the input
+        missing: Dict[str, str] = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                missing.setdefault(key, text)
+
+        if missing:
+            fresh = await self.embedder.get_embeddings(
+                list(missing.values()), title=title)
+            computed = dict(zip(missing.keys(), fresh))
+            await asyncio.to_thread(self.cache.put_many, computed)
+            vectors = [computed[key] if vector is None else vector
+                       for key, vector in zip(keys, vectors)]
+
+        return vectors
+
+    def close(self) -> None:
+        self.cache.close()
@@ -1,44 +1,133 @@
-import time
+import os
+import asyncio
 import logging
-from typing import List, Optional
+from typing import List, Optional, Union
 import google.generativeai as genai
 from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable, GoogleAPIError
+from ..utils.telemetry import EMBED_BACKOFF_SECONDS, EMBED_RETRIES, request_id, span
+from .rate_limiter import AdaptiveRateLimiter, CircuitOpen, backoff_delay
 
 logger = logging.getLogger("embedding_service")
 logger.setLevel(logging.INFO)
 
-MAX_RETRIES = 3
-RETRY_BACKOFF = [2, 4, 8]  # in seconds
+MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", 3))
 
+# Gemini's batchEmbedContents accepts at most 100 inputs per request
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 100))
+# Gemini requests in flight at once, across every upload, sync and search in the process
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", 4))
+# Output size of models/embedding-001
+GEMINI_EMBED_DIMENSION = 768
 
-class GeminiEmbedder:
-    def __init__(self, model_name: str = "models/embedding-001", task_type: str = "RETRIEVAL_DOCUMENT"):
+
+class EmbeddingQuotaExceeded(RuntimeError):
+    """The provider kept rejecting requests for quota after every retry."""
+
+
+# One limiter for the whole process: every caller draws on the same Gemini quota
+gemini_limiter = AdaptiveRateLimiter("gemini", max_in_flight=EMBED_CONCURRENCY)
+
+
+class Embedder:
+    """
+    Interface shared by the embedding backends and the wrappers around them.
+    `dimension` is the size of the vectors produced, which fixes the vector size
+    of every collection embedded with it.
+    """
+
+    name = "base"
+    model_name: str
+    task_type: str
+    dimension: int
+
+    async def get_embedding(self, text: str, title: Optional[str] = "Document Chunk") -> List[float]:
+        return (await self.get_embeddings([text], title=title))[0]
+
+    async def get_embeddings(self, texts: List[str], title: Optional[str] = "Document Chunk") -> List[List[float]]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class GeminiEmbedder(Embedder):
+    name = "gemini"
+    dimension = GEMINI_EMBED_DIMENSION
+
+    def __init__(self, model_name: str = "models/embedding-001", task_type: str = "RETRIEVAL_DOCUMENT",
+                 batch_size: int = EMBED_BATCH_SIZE, limiter: AdaptiveRateLimiter = gemini_limiter):
         self.model_name = model_name
         self.task_type = task_type
+        self.batch_size = max(1, min(batch_size, 100))
+        self.limiter = limiter
+
+    async def get_embedding(self, text: str, title: Optional[str] = "Document Chunk") -> List[float]:
+        return await self._embed_with_retry(text, title)
+
+    async def get_embeddings(self, texts: List[str], title: Optional[str] = "Document Chunk") -> List[List[float]]:
+        """
+        Embed many texts using batched requests.
+
+        Texts are grouped into provider-sized batches which are sent concurrently,
+        paced by the shared rate limiter. Each batch is retried on its own, and the
+        returned vectors are in the same order as `texts`.
+        """
+        if not texts:
+            return []
+
+        batches = [texts[i:i + self.batch_size]
+                   for i in range(0, len(texts), self.batch_size)]
 
-    def get_embedding(self, text: str, title: Optional[str] = "Document Chunk") -> List[float]:
+        results = await asyncio.gather(*(self._embed_with_retry(batch, title) for batch in batches))
+        return [vector for batch in results for vector in batch]
+
+    async def _embed_with_retry(self, content: Union[str, List[str]], title: Optional[str]):
+        quota_exhausted = False
         for attempt in range(MAX_RETRIES):
             try:
-                response = genai.embed_content(
-                    model=self.model_name,
-                    content=text,
-                    task_type=self.task_type,
-                    title=title
-                )
+                async with self.limiter.slot() as started:
+                    try:
+                        async with span("embed.gemini", attempt=attempt + 1):
+                            response = await genai.embed_content_async(
+                                model=self.model_name,
+                                content=content,
+                                task_type=self.task_type,
+                                title=title
+                            )
+                    except (ResourceExhausted, ServiceUnavailable) as retryable:
+                        self.limiter.failed(started, throttled=isinstance(retryable, ResourceExhausted))
+                        raise
+                    self.limiter.succeeded()
 
                 if hasattr(response, "embedding"):
-                    return response.embedding
+                    embedding = response.embedding
                 elif isinstance(response, dict) and "embedding" in response:
-                    return response["embedding"]
+                    embedding = response["embedding"]
                 else:
                     raise ValueError(
                         "No 'embedding' field in Gemini response.")
 
+                if isinstance(content, list) and len(embedding) != len(content):
+                    raise ValueError(
+                        f"Gemini returned {len(embedding)} embeddings for {len(content)} inputs.")
+                return embedding
+
             except (ResourceExhausted, ServiceUnavailable) as retryable:
-                wait_time = RETRY_BACKOFF[min(attempt, len(RETRY_BACKOFF)-1)]
+                quota_exhausted = isinstance(retryable, ResourceExhausted)
+                if attempt + 1 == MAX_RETRIES:
+                    break
+                wait_time = backoff_delay(attempt)
                 logger.warning(
-                    f"[Gemini] Retryable error on attempt {attempt+1}: {retryable}. Retrying in {wait_time}s.")
-                time.sleep(wait_time)
+                    f"[Gemini] Retryable error on attempt {attempt+1} (request {request_id.get()}): "
+                    f"{retryable}. Retrying in {wait_time:.1f}s.")
+                EMBED_RETRIES.labels(reason=type(retryable).__name__).inc()
+                EMBED_BACKOFF_SECONDS.inc(wait_time)
+                async with span("embed.backoff"):
+                    await asyncio.sleep(wait_time)
+
+            except CircuitOpen as open_circuit:
+                logger.warning(f"[Gemini] Not called (request {request_id.get()}): {open_circuit}")
+                raise
 
             except GoogleAPIError as gerr:
                 logger.error(f"[Gemini] API error: {gerr}")
@@ -48,5 +137,8 @@ class GeminiEmbedder:
                 logger.exception(f"[Gemini] Unexpected error: {e}")
                 raise
 
+        if quota_exhausted:
+            raise EmbeddingQuotaExceeded(
+                "Gemini embedding quota exhausted after retries.")
         raise RuntimeError(
             "All Gemini embedding attempts failed after retries.")
@@ -0,0 +1,61 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from .embedding_service import Embedder
+
+logger = logging.getLogger("local_embedder")
+logger.setLevel(logging.INFO)
+
+LOCAL_EMBED_MODEL = os.getenv("LOCAL_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+LOCAL_EMBED_DEVICE = os.getenv("LOCAL_EMBED_DEVICE", "cpu")
+LOCAL_EMBED_BATCH_SIZE = int(os.getenv("LOCAL_EMBED_BATCH_SIZE", 64))
+# Each worker runs a whole batch; the model already uses several cores per batch
+LOCAL_EMBED_WORKERS = int(os.getenv("LOCAL_EMBED_WORKERS", 1))
+
+
+class LocalEmbedder(Embedder):
+    """
+    sentence-transformers model running on this machine. No network round-trip
+    and no quota; batches run on a small thread pool so the event loop stays free.
+
+    Needs the optional `sentence-transformers` package.
+    """
+
+    name = "local"
+
+    def __init__(self, model_name: str = LOCAL_EMBED_MODEL, task_type: str = "RETRIEVAL_DOCUMENT",
+                 batch_size: int = LOCAL_EMBED_BATCH_SIZE, workers: int = LOCAL_EMBED_WORKERS,
+                 device: str = LOCAL_EMBED_DEVICE):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "The local embedding backend needs sentence-transformers: pip install sentence-transformers") from e
+
+        self.model_name = model_name
+        self.task_type = task_type
+        self.batch_size = max(1, batch_size)
+        logger.info(f"Loading local embedding model {model_name} on {device}")
+        self._model = SentenceTransformer(model_name, device=device)
+        self.dimension = self._model.get_sentence_embedding_dimension()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="local-embed")
+
+    async def get_embeddings(self, texts: List[str], title: Optional[str] = "Document Chunk") -> List[List[float]]:
+        # The title is a Gemini task hint; sentence-transformers models have no equivalent
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self._pool, self._encode, batch) for batch in batches))
+        return [vector for batch in results for vector in batch]
+
+    def _encode(self, batch: List[str]) -> List[List[float]]:
+        return self._model.encode(
+            batch, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True).tolist()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
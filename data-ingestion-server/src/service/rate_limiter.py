@@ -0,0 +1,199 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
+
+from ..utils.telemetry import EMBED_BREAKER_OPENS, span
+
+logger = logging.getLogger("rate_limiter")
+logger.setLevel(logging.INFO)
+
+# Provider requests per second (Gemini embedding models allow 1500 a minute by default);
+# the limiter starts here and never goes above it
+EMBED_MAX_RPS = float(os.getenv("EMBED_MAX_RPS", 25))
+# Floor that repeated 429s can cut the rate down to
+EMBED_MIN_RPS = float(os.getenv("EMBED_MIN_RPS", 0.5))
+# Requests that may start back to back after an idle period
+EMBED_BURST = int(os.getenv("EMBED_BURST", 8))
+# In-flight requests kept free for search queries, so they never queue behind ingestion
+EMBED_INTERACTIVE_SLOTS = int(os.getenv("EMBED_INTERACTIVE_SLOTS", 1))
+# Consecutive failed requests that open the circuit, and seconds it stays open
+EMBED_BREAKER_THRESHOLD = int(os.getenv("EMBED_BREAKER_THRESHOLD", 5))
+EMBED_BREAKER_COOLDOWN_SECONDS = float(os.getenv("EMBED_BREAKER_COOLDOWN_SECONDS", 30))
+# Seconds before the first retry of a failed request, doubled on every attempt
+EMBED_BACKOFF_BASE = 2.0
+EMBED_BACKOFF_MAX = 30.0
+# Share of the maximum rate regained after every successful request
+RATE_RECOVERY = 0.05
+# Seconds between checks for a free in-flight slot
+SLOT_POLL_SECONDS = 0.02
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+_lane: ContextVar[str] = ContextVar("embed_lane", default=BULK)
+
+
+@contextmanager
+def interactive() -> Iterator[None]:
+    """
+    Embedding requests made in this block, and in tasks it starts, go through
+    the interactive lane ahead of bulk ingestion.
+    """
+    token = _lane.set(INTERACTIVE)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class CircuitOpen(RuntimeError):
+    """Recent requests to the provider kept failing; calls fail fast until the cooldown ends."""
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter, so callers failing together do not retry together."""
+    delay = min(EMBED_BACKOFF_MAX, EMBED_BACKOFF_BASE * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket shared by every caller of one provider in the process.
+
+    Requests start at `max_rps`. A throttling response halves the rate (once per
+    wave of requests that were already in flight), and every success wins back
+    a little of it, so the rate settles just under the provider's quota instead
+    of every caller hitting it and backing off in lockstep.
+
+    There are two lanes. Bulk callers wait while an interactive caller is
+    queued, and `interactive_slots` of the `max_in_flight` slots are only
+    available to interactive callers.
+
+    After `breaker_threshold` consecutive failures the circuit opens: calls
+    raise CircuitOpen for `cooldown` seconds, then a single probe request is let
+    through and its outcome closes or re-opens the circuit.
+
+    State sits behind a thread lock rather than asyncio primitives, so one
+    limiter can serve any number of event loops.
+    """
+
+    def __init__(self, name: str, max_rps: float = EMBED_MAX_RPS, min_rps: float = EMBED_MIN_RPS,
+                 burst: int = EMBED_BURST, max_in_flight: int = 4,
+                 interactive_slots: int = EMBED_INTERACTIVE_SLOTS,
+                 breaker_threshold: int = EMBED_BREAKER_THRESHOLD,
+                 cooldown: float = EMBED_BREAKER_COOLDOWN_SECONDS):
+        self.name = name
+        self.max_rps = max_rps
+        self.min_rps = min(min_rps, max_rps)
+        self.burst = max(1, burst)
+        self.max_in_flight = max(1, max_in_flight)
+        self.bulk_in_flight = max(1, self.max_in_flight - max(0, interactive_slots))
+        self.breaker_threshold = max(1, breaker_threshold)
+        self.cooldown = cooldown
+        self.rate = max_rps
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._in_flight = 0
+        self._waiting: Dict[str, int] = {INTERACTIVE: 0, BULK: 0}
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._last_cut = 0.0
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        """
+        Waits for a token and an in-flight slot in the caller's lane. Yields the
+        time the request started, to be passed back to `failed`.
+        """
+        lane = _lane.get()
+        started, probe = await self._acquire(lane)
+        try:
+            yield started
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                if probe:
+                    self._probing = False
+
+    def succeeded(self) -> None:
+        with self._lock:
+            if self._failures >= self.breaker_threshold:
+                logger.info(f"[{self.name}] Circuit closed")
+            self._failures = 0
+            self.rate = min(self.max_rps, self.rate + self.max_rps * RATE_RECOVERY)
+
+    def failed(self, started: float, throttled: bool) -> None:
+        """Records a failed request; `throttled` for quota errors (HTTP 429)."""
+        with self._lock:
+            now = time.monotonic()
+            self._failures += 1
+            # Requests that started before the last cut failed at the old rate
+            if throttled and started >= self._last_cut:
+                self.rate = max(self.min_rps, self.rate / 2)
+                self._last_cut = now
+                # Empty the bucket, including tokens it would have refilled since the last request
+                self._tokens = min(self._tokens, 0.0)
+                self._refilled = now
+                logger.warning(f"[{self.name}] Throttled, rate lowered to {self.rate:.2f} requests/s")
+            if self._failures >= self.breaker_threshold and self._open_until <= now:
+                self._open_until = now + self.cooldown
+                EMBED_BREAKER_OPENS.labels(provider=self.name).inc()
+                logger.error(f"[{self.name}] {self._failures} failed requests in a row, "
+                             f"circuit open for {self.cooldown:.0f}s")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "in_flight": self._in_flight,
+                "waiting_interactive": self._waiting[INTERACTIVE],
+                "waiting_bulk": self._waiting[BULK],
+                "circuit_open": time.monotonic() < self._open_until,
+            }
+
+    async def _acquire(self, lane: str) -> Tuple[float, bool]:
+        with self._lock:
+            self._waiting[lane] += 1
+        try:
+            async with span(f"embed.wait.{lane}"):
+                while True:
+                    with self._lock:
+                        delay, probe = self._try_take(lane)
+                    if delay is None:
+                        return time.monotonic(), probe
+                    await asyncio.sleep(delay)
+        finally:
+            with self._lock:
+                self._waiting[lane] -= 1
+
+    def _try_take(self, lane: str) -> Tuple[Optional[float], bool]:
+        """Takes a token and a slot, or returns how long to wait. Called under the lock."""
+        now = time.monotonic()
+        if now < self._open_until:
+            raise CircuitOpen(f"{self.name} is failing, circuit open for another {self._open_until - now:.0f}s")
+        probe = self._failures >= self.breaker_threshold
+        if probe and self._probing:
+            raise CircuitOpen(f"{self.name} is failing, waiting for the probe request")
+
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        if lane == BULK and (self._waiting[INTERACTIVE] or self._in_flight >= self.bulk_in_flight):
+            return SLOT_POLL_SECONDS, False
+        if self._in_flight >= self.max_in_flight:
+            return SLOT_POLL_SECONDS, False
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate, False
+
+        self._tokens -= 1
+        self._in_flight += 1
+        if probe:
+            self._probing = True
+        return None, probe
@@ -0,0 +1,232 @@
+import os
+import re
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterator, List, NamedTuple, Type
+from .telemetry import span
+
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "sentence")
+# embedding-001 accepts up to 2048 input tokens; smaller chunks retrieve more precisely
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 512))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 64))
+
+# Gemini models average roughly four characters per token
+CHARS_PER_TOKEN = 4
+# Separator assumed between streamed segments (e.g. PDF pages) when computing offsets
+SEGMENT_SEPARATOR = "\n\n"
+
+_SENTENCE = re.compile(r"\S.*?(?:[.!?][\"')\]]*(?=\s)|$)")
+_WORD = re.compile(r"\S+")
+_MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+\S")
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*\.?|[A-Z]\.)\s+[A-Z][^.!?]*$")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+class Chunk(NamedTuple):
+    text: str
+    index: int
+    char_start: int  # offset into the document, segments joined by SEGMENT_SEPARATOR
+    char_end: int
+
+
+class Unit(NamedTuple):
+    start: int
+    end: int
+    tokens: int
+    is_heading: bool
+
+
+class Chunker:
+    """
+    Packs text units (words, sentences, table rows...) into chunks of at most
+    `max_tokens` estimated tokens, repeating up to `overlap_tokens` of trailing
+    units at the start of the next chunk.
+
+    Text is pushed in segment by segment with `feed` and chunks come out as soon
+    as they are complete, so only about one chunk of text is held in memory.
+    Subclasses decide how a segment is split into units.
+    """
+
+    # Start a fresh chunk, without overlap, at every heading
+    break_on_headings = False
+
+    def __init__(self, max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+        self._text = ""          # document text from self._text_start onwards
+        self._text_start = 0
+        self._offset = 0         # document offset where the next segment starts
+        self._fed = False        # whether a segment was fed, so the next one is preceded by a separator
+        self._units: List[Unit] = []
+        self._tokens = 0
+        self._fresh = 0          # units in the buffer not already emitted as overlap
+        self._index = 0
+
+    def split_units(self, segment: str) -> Iterator[Unit]:
+        raise NotImplementedError
+
+    def feed(self, segment: str) -> Iterator[Chunk]:
+        if self._fed:
+            self._text += SEGMENT_SEPARATOR
+            self._offset += len(SEGMENT_SEPARATOR)
+        self._fed = True
+        base = self._offset
+        self._text += segment
+        self._offset += len(segment)
+        # Blank segments (e.g. empty PDF pages) yield no units but still move later offsets
+        if not segment.strip():
+            return
+
+        for unit in self.split_units(segment):
+            unit = unit._replace(start=unit.start + base, end=unit.end + base)
+            for piece in self._fit(unit):
+                if self._units and (self._tokens + piece.tokens > self.max_tokens or
+                                    (piece.is_heading and self.break_on_headings)):
+                    yield self._emit(keep_overlap=not (piece.is_heading and self.break_on_headings))
+                    # Shed overlap that would push the next chunk over budget
+                    while self._units and self._tokens + piece.tokens > self.max_tokens:
+                        self._tokens -= self._units.pop(0).tokens
+                self._units.append(piece)
+                self._tokens += piece.tokens
+                self._fresh += 1
+
+    def finish(self) -> Iterator[Chunk]:
+        if self._fresh:
+            yield self._emit(keep_overlap=False)
+
+    def _fit(self, unit: Unit) -> Iterator[Unit]:
+        """Split a unit that alone exceeds the budget on word boundaries."""
+        if unit.tokens <= self.max_tokens:
+            yield unit
+            return
+        limit = self.max_tokens * CHARS_PER_TOKEN
+        text = self._slice(unit.start, unit.end)
+        start = end = None
+        for word in _WORD.finditer(text):
+            # A single word longer than the budget (URLs, encoded blobs) is cut by length
+            for piece_start in range(word.start(), word.end(), limit):
+                piece_end = min(piece_start + limit, word.end())
+                if start is None:
+                    start = piece_start
+                elif piece_end - start > limit:
+                    yield Unit(unit.start + start, unit.start + end, estimate_tokens(text[start:end]), unit.is_heading)
+                    start = piece_start
+                end = piece_end
+        if start is not None:
+            yield Unit(unit.start + start, unit.start + end, estimate_tokens(text[start:end]), unit.is_heading)
+
+    def _emit(self, keep_overlap: bool) -> Chunk:
+        start, end = self._units[0].start, self._units[-1].end
+        chunk = Chunk(self._slice(start, end), self._index, start, end)
+        self._index += 1
+
+        kept: List[Unit] = []
+        if keep_overlap:
+            tokens = 0
+            for unit in reversed(self._units[1:]):
+                if tokens + unit.tokens > self.overlap_tokens:
+                    break
+                kept.insert(0, unit)
+                tokens += unit.tokens
+        self._units = kept
+        self._tokens = sum(unit.tokens for unit in kept)
+        self._fresh = 0
+
+        # Drop text that no later chunk can reference
+        keep_from = kept[0].start if kept else end
+        self._text = self._text[keep_from - self._text_start:]
+        self._text_start = keep_from
+        return chunk
+
+    def _slice(self, start: int, end: int) -> str:
+        return self._text[start - self._text_start:end - self._text_start]
+
+
+CHUNKERS: Dict[str, Type[Chunker]] = {}
+
+
+def register_chunker(name: str) -> Callable[[Type[Chunker]], Type[Chunker]]:
+    def decorator(cls: Type[Chunker]) -> Type[Chunker]:
+        CHUNKERS[name] = cls
+        return cls
+    return decorator
+
+
+def get_chunker(strategy: str = CHUNK_STRATEGY, max_tokens: int = CHUNK_MAX_TOKENS,
+                overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> Chunker:
+    if strategy not in CHUNKERS:
+        raise ValueError(
+            f"Unknown chunking strategy: {strategy}. Available: {', '.join(sorted(CHUNKERS))}")
+    return CHUNKERS[strategy](max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+
+
+async def chunk_stream(segments: AsyncIterable[str], chunker: Chunker) -> AsyncIterator[Chunk]:
+    async for segment in segments:
+        # Chunk the segment before handing any chunk on, so the span times only the chunker
+        with span("chunk"):
+            chunks = list(chunker.feed(segment))
+        for chunk in chunks:
+            yield chunk
+    with span("chunk"):
+        chunks = list(chunker.finish())
+    for chunk in chunks:
+        yield chunk
+
+
+def chunk_text(text: str, chunker: Chunker) -> List[Chunk]:
+    return [*chunker.feed(text), *chunker.finish()]
+
+
+@register_chunker("words")
+class WordChunker(Chunker):
+    """Fixed token budget over whitespace-separated words, ignoring structure."""
+
+    def split_units(self, segment: str) -> Iterator[Unit]:
+        for word in _WORD.finditer(segment):
+            yield Unit(word.start(), word.end(), estimate_tokens(word.group()), False)
+
+
+@register_chunker("sentence")
+class SentenceChunker(Chunker):
+    """
+    Token budget over sentences. Table rows and headings are kept whole, so
+    chunks never end mid-sentence or mid-row unless a single one is too long.
+    """
+
+    def split_units(self, segment: str) -> Iterator[Unit]:
+        line_start = 0
+        for line in segment.split("\n"):
+            stripped = line.strip()
+            if stripped:
+                if self.is_heading(stripped):
+                    yield self._line_unit(line, line_start, is_heading=True)
+                elif self.is_table_row(stripped):
+                    yield self._line_unit(line, line_start, is_heading=False)
+                else:
+                    for sentence in _SENTENCE.finditer(line):
+                        yield Unit(line_start + sentence.start(), line_start + sentence.end(),
+                                   estimate_tokens(sentence.group()), False)
+            line_start += len(line) + 1
+
+    @staticmethod
+    def is_heading(line: str) -> bool:
+        return bool(_MARKDOWN_HEADING.match(line) or
+                    (len(line) <= 80 and _NUMBERED_HEADING.match(line)))
+
+    @staticmethod
+    def is_table_row(line: str) -> bool:
+        return line.count("|") >= 2 or "\t" in line
+
+    @staticmethod
+    def _line_unit(line: str, line_start: int, is_heading: bool) -> Unit:
+        start = line_start + len(line) - len(line.lstrip())
+        end = line_start + len(line.rstrip())
+        return Unit(start, end, estimate_tokens(line.strip()), is_heading)
+
+
+@register_chunker("heading")
+class HeadingChunker(SentenceChunker):
+    """Like "sentence", but every heading starts a new chunk so sections stay apart."""
+
+    break_on_headings = True
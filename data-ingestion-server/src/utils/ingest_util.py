@@ -1,32 +1,71 @@
+import asyncio
+import codecs
 import logging
-import tempfile
-from typing import List
+import re
+import threading
+from html.parser import HTMLParser
+from typing import AsyncIterator, Iterator, List, Optional, Tuple, TypeVar
+import aiofiles
 from fastapi import UploadFile
-from bs4 import BeautifulSoup
-from PyPDF2 import PdfReader
-import io
 import os
-from pdf2image import convert_from_path
-import pytesseract
+from .pdf_extractor import iter_pdf_pages
+from .telemetry import span
 
 SUPPORTED_EXTENSIONS = [".pdf", ".html", ".htm", ".txt"]
 
+# Bytes read from an upload or file at a time
+READ_BLOCK_BYTES = 1024 * 1024
+# Approximate characters per text/HTML segment handed to the chunker
+SEGMENT_CHARS = 64 * 1024
+# Largest accepted upload, 0 for no limit
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", 0)) * 1024 * 1024
 
-async def extract_text_from_file(file: UploadFile) -> str:
-    filename = file.filename
-    extension = os.path.splitext(filename)[1].lower()
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_\-]+)""", re.IGNORECASE)
 
+T = TypeVar("T")
+
+
+async def spool_upload(file: UploadFile, file_path: str, max_bytes: int = MAX_UPLOAD_BYTES) -> int:
+    """
+    Copy an upload to `file_path` block by block, so only one block is in memory.
+    Raises ValueError (and removes the partial file) past `max_bytes`, if set.
+    """
+    size = 0
     try:
-        content = await file.read()
+        async with aiofiles.open(file_path, "wb") as out:
+            while block := await file.read(READ_BLOCK_BYTES):
+                size += len(block)
+                if max_bytes and size > max_bytes:
+                    raise ValueError(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                await out.write(block)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return size
+
 
+async def stream_text_from_path(file_path: str) -> AsyncIterator[str]:
+    """
+    Yield the text of a file on disk segment by segment (one segment per PDF
+    page, a bounded run of paragraphs for text and HTML), without ever loading
+    the whole file.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+
+    try:
+        # PDF parsing, OCR and HTML parsing are CPU-bound, keep them off the event loop
         if extension == ".pdf":
-            return extract_text_from_pdf(content)
+            async for page_text in iterate_in_thread(iter_pdf_pages(file_path), stage="extract.pdf"):
+                yield page_text
 
         elif extension in [".html", ".htm"]:
-            return extract_text_from_html(content)
+            async for segment in iterate_in_thread(iter_html_segments(file_path), stage="extract.html"):
+                yield segment
 
         elif extension == ".txt":
-            return content.decode("utf-8", errors="ignore")
+            async for segment in iterate_in_thread(iter_text_segments(file_path), stage="extract.text"):
+                yield segment
 
         else:
             raise ValueError(f"Unsupported file extension: {extension}")
@@ -36,41 +75,150 @@ async def extract_text_from_file(file: UploadFile) -> str:
         raise
 
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> str:
+def iter_text_segments(file_path: str, segment_chars: int = SEGMENT_CHARS) -> Iterator[str]:
     """
-    Extract text from PDF bytes, with OCR fallback for image-based pages.
+    Yield a UTF-8 text file in segments of about `segment_chars` characters.
+
+    Segments end at a blank line and drop it, which is exactly the separator the
+    chunker puts back between segments, so chunk offsets match the file. Only a
+    paragraph longer than `segment_chars` is cut elsewhere (at a line break or
+    space).
     """
-    with tempfile.TemporaryDirectory() as path:
-        pdf_path = os.path.join(path, "temp.pdf")
-        with open(pdf_path, "wb") as f:
-            f.write(pdf_bytes)
-
-        reader = PdfReader(pdf_path)
-        text_pages: List[str] = []
-
-        for page_number, page in enumerate(reader.pages, start=1):
-            try:
-                text = page.extract_text()
-                if text and text.strip():
-                    text_pages.append(text)
-                else:
-                    # OCR fallback for image-based page
-                    images = convert_from_path(
-                        pdf_path, first_page=page_number, last_page=page_number)
-                    for img in images:
-                        ocr_text = pytesseract.image_to_string(img)
-                        if ocr_text.strip():
-                            text_pages.append(ocr_text)
-            except Exception as e:
-                text_pages.append(
-                    f"[Error processing page {page_number}]: {e}")
-
-        return "\n\n".join(text_pages)
-
-def extract_text_from_html(html_bytes: bytes) -> str:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    buffer = ""
+    with open(file_path, "rb") as f:
+        while block := f.read(READ_BLOCK_BYTES):
+            buffer += decoder.decode(block)
+            while len(buffer) >= segment_chars:
+                cut, skip = _segment_boundary(buffer, segment_chars)
+                yield buffer[:cut]
+                buffer = buffer[cut + skip:]
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+def _segment_boundary(text: str, limit: int) -> Tuple[int, int]:
+    """Return (end of segment, separator length to drop) for text longer than limit."""
+    for separator in ("\n\n", "\n", " "):
+        cut = text.rfind(separator, 0, limit)
+        if cut > 0:
+            return cut, len(separator)
+    return limit, 0
+
+
+class _HTMLTextParser(HTMLParser):
+    """
+    Collects stripped text nodes like BeautifulSoup's get_text(strip=True),
+    skipping script, style and template contents.
+    """
+
+    SKIPPED = {"script", "style", "template"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.size = 0
+        self._skipping = 0
+        self._pending: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in self.SKIPPED:
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in self.SKIPPED and self._skipping:
+            self._skipping -= 1
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_data(self, data):
+        # A text node cut by a read boundary arrives in pieces; join them at the next tag
+        if not self._skipping:
+            self._pending.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        text = "".join(self._pending).strip()
+        self._pending = []
+        if text:
+            self.parts.append(text)
+            self.size += len(text) + 1
+
+    def take(self) -> str:
+        text = "\n".join(self.parts)
+        self.parts, self.size = [], 0
+        return text
+
+
+def iter_html_segments(file_path: str, segment_chars: int = SEGMENT_CHARS) -> Iterator[str]:
+    """
+    Parse an HTML file incrementally and yield its text, one line per text node,
+    in segments of about `segment_chars` characters.
+    """
+    parser = _HTMLTextParser()
+    decoder = None
+    with open(file_path, "rb") as f:
+        while block := f.read(READ_BLOCK_BYTES):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(_html_encoding(block))(errors="replace")
+            parser.feed(decoder.decode(block))
+            if parser.size >= segment_chars:
+                yield parser.take()
+    if decoder is not None:
+        parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    if parser.parts:
+        yield parser.take()
+
+
+def _html_encoding(head: bytes) -> str:
+    """Encoding from a BOM or <meta charset> in the first block, else UTF-8."""
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    match = _META_CHARSET.search(head[:4096])
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+async def iterate_in_thread(iterator: Iterator[T], stage: Optional[str] = None) -> AsyncIterator[T]:
+    """
+    Drive a blocking iterator from async code, advancing it in a worker thread.
+    With a `stage`, the time taken to produce each item is recorded under it.
+    If the consumer stops early, a generator is closed so its cleanup runs.
+    """
+    sentinel = object()
+    # A step still running in a thread after cancellation must end before close()
+    lock = threading.Lock()
+
+    def advance():
+        with lock:
+            return next(iterator, sentinel)
+
+    def close():
+        with lock:
+            iterator.close()
+
     try:
-        soup = BeautifulSoup(html_bytes, "html.parser")
-        return soup.get_text(separator="\n", strip=True)
-    except Exception as e:
-        logging.exception("HTML extraction failed")
-        raise
+        while True:
+            if stage is None:
+                item = await asyncio.to_thread(advance)
+            else:
+                async with span(stage):
+                    item = await asyncio.to_thread(advance)
+            if item is sentinel:
+                break
+            yield item
+    finally:
+        if hasattr(iterator, "close"):
+            await asyncio.to_thread(close)
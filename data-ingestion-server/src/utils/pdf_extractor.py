@@ -0,0 +1,105 @@
+import os
+import time
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Iterator, Optional, Tuple
+from PyPDF2 import PdfReader
+from pdf2image import convert_from_path
+import pytesseract
+from .telemetry import observe_stage, span
+
+PDF_OCR_WORKERS = int(os.getenv("PDF_OCR_WORKERS", os.cpu_count() or 2))
+PDF_OCR_DPI = int(os.getenv("PDF_OCR_DPI", 200))
+# How many pages may be in flight ahead of the page currently being yielded
+PDF_PAGE_WINDOW = int(os.getenv("PDF_PAGE_WINDOW", PDF_OCR_WORKERS * 2))
+
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    global _ocr_pool
+    if _ocr_pool is None:
+        # The server runs threads (job workers, to_thread calls); forking it could copy a held lock
+        _ocr_pool = ProcessPoolExecutor(
+            max_workers=PDF_OCR_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+    return _ocr_pool
+
+
+def shutdown_ocr_pool() -> None:
+    global _ocr_pool
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown(cancel_futures=True)
+        _ocr_pool = None
+
+
+def ocr_pdf_page(pdf_path: str, page_number: int, dpi: int) -> str:
+    """
+    Rasterise a single page and run Tesseract on it. Runs in a worker process.
+    """
+    images = convert_from_path(
+        pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    texts = [pytesseract.image_to_string(img) for img in images]
+    return "\n".join(text for text in texts if text.strip())
+
+
+def _timed_ocr_pdf_page(pdf_path: str, page_number: int, dpi: int) -> Tuple[str, float]:
+    # Metrics live in the parent process, so the worker only reports how long it took
+    started = time.perf_counter()
+    text = ocr_pdf_page(pdf_path, page_number, dpi)
+    return text, time.perf_counter() - started
+
+
+def iter_pdf_pages(pdf_path: str, dpi: int = PDF_OCR_DPI, window: int = PDF_PAGE_WINDOW) -> Iterator[str]:
+    """
+    Yield the text of each page of a PDF in page order.
+
+    Pages with a text layer are extracted directly. Image-only pages are sent to
+    the OCR process pool as soon as they are seen, so up to `window` pages are
+    recognised in parallel while earlier pages are already being consumed.
+    OCR that has not started yet is cancelled if the iterator is closed early.
+    """
+    reader = PdfReader(pdf_path)
+    pool = get_ocr_pool()
+    pending: Deque[Tuple[int, Future]] = deque()
+
+    try:
+        for page_number, page in enumerate(reader.pages, start=1):
+            future: Future = Future()
+            try:
+                with span("extract.text_page", page=page_number):
+                    text = page.extract_text()
+                if text and text.strip():
+                    future.set_result((text, None))
+                else:
+                    # OCR fallback for image-based page
+                    future = pool.submit(_timed_ocr_pdf_page, pdf_path, page_number, dpi)
+            except Exception as e:
+                future.set_exception(e)
+            pending.append((page_number, future))
+
+            while pending and (pending[0][1].done() or len(pending) >= window):
+                text = _page_text(*pending.popleft())
+                if text:
+                    yield text
+
+        while pending:
+            text = _page_text(*pending.popleft())
+            if text:
+                yield text
+    finally:
+        # The consumer stopped early (cancelled job, failed ingest): drop the queued OCR work
+        for _, future in pending:
+            future.cancel()
+
+
+def _page_text(page_number: int, future: Future) -> str:
+    try:
+        text, ocr_seconds = future.result()
+        if ocr_seconds is not None:
+            observe_stage("extract.ocr_page", ocr_seconds)
+        return text
+    except Exception as e:
+        logging.warning(f"Failed to extract PDF page {page_number}: {e}")
+        return f"[Error processing page {page_number}]: {e}"
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, List, NamedTuple, Optional
+from .telemetry import span
+
+# Items that may wait between two stages; bounds how far fast stages run ahead
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 8))
+
+_DONE = object()
+
+
+class Stage(NamedTuple):
+    """
+    One step of a pipeline. `fn` receives an item (or a list of up to
+    `batch_size` items when batching) and returns the item for the next stage,
+    or None to drop it.
+    """
+    name: str
+    fn: Callable[[Any], Awaitable[Any]]
+    concurrency: int = 1
+    batch_size: int = 1
+
+
+async def run_pipeline(source: AsyncIterable[Any], stages: List[Stage],
+                       queue_size: int = PIPELINE_QUEUE_SIZE,
+                       name: str = "pipeline") -> Dict[str, Dict[str, float]]:
+    """
+    Push every item of `source` through `stages`, connected by bounded queues.
+
+    All stages run at once, each with its own number of workers, so throughput
+    is set by the slowest stage rather than the sum of all of them. Batching
+    stages take whatever is already queued, up to `batch_size`, without waiting
+    for more. The first error cancels the whole pipeline and is re-raised.
+
+    Each call of a stage is also timed as the `<name>.<stage>` span.
+    Returns per-stage counters: items processed and seconds spent working.
+    """
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+    stats = {stage.name: {"items": 0, "busy_seconds": 0.0} for stage in stages}
+
+    async def feed() -> None:
+        async for item in source:
+            await queues[0].put(item)
+        await queues[0].put(_DONE)
+
+    async def work(index: int, stage: Stage) -> None:
+        inbox = queues[index]
+        outbox: Optional[asyncio.Queue] = queues[index + 1] if index + 1 < len(queues) else None
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                # Leave the marker for the other workers of this stage
+                inbox.put_nowait(_DONE)
+                return
+            batch = [item]
+            while len(batch) < stage.batch_size and not inbox.empty():
+                item = inbox.get_nowait()
+                if item is _DONE:
+                    inbox.put_nowait(_DONE)
+                    break
+                batch.append(item)
+
+            started = time.perf_counter()
+            async with span(f"{name}.{stage.name}", items=len(batch)):
+                result = await stage.fn(batch if stage.batch_size > 1 else batch[0])
+            stats[stage.name]["busy_seconds"] += time.perf_counter() - started
+            stats[stage.name]["items"] += len(batch)
+            if result is not None and outbox is not None:
+                await outbox.put(result)
+
+    async def run_stage(index: int, stage: Stage) -> None:
+        await asyncio.gather(*(work(index, stage) for _ in range(max(1, stage.concurrency))))
+        if index + 1 < len(queues):
+            await queues[index + 1].put(_DONE)
+
+    tasks = [asyncio.create_task(feed())]
+    tasks += [asyncio.create_task(run_stage(index, stage)) for index, stage in enumerate(stages)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return stats
@@ -0,0 +1,54 @@
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Iterator, List
+from qdrant_client.http.models import SparseVector
+
+# BM25 term-frequency saturation and length normalisation. IDF is applied by
+# Qdrant at query time (Modifier.IDF), so it always reflects the current corpus.
+BM25_K1 = float(os.getenv("BM25_K1", 1.2))
+BM25_B = float(os.getenv("BM25_B", 0.75))
+# Typical chunk length in tokens, standing in for the corpus average document length
+BM25_AVG_DOC_TOKENS = float(os.getenv("BM25_AVG_DOC_TOKENS", 256))
+
+# Words joined by . _ - / : stay one term (error codes, config keys, ticket ids,
+# paths), and their parts are indexed as well
+_TERM = re.compile(r"[0-9a-z]+(?:[._\-/:][0-9a-z]+)*")
+_PART = re.compile(r"[0-9a-z]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i if in into is it its of on or "
+    "so than that the their then there these this to was were what when where which who "
+    "why will with you your".split())
+
+
+def tokenize(text: str) -> Iterator[str]:
+    for match in _TERM.finditer(text.casefold()):
+        term = match.group()
+        parts = _PART.findall(term)
+        if len(parts) > 1:
+            yield term
+        for part in parts:
+            if part not in _STOPWORDS:
+                yield part
+
+
+def term_index(term: str) -> int:
+    # Stable across processes and restarts, unlike hash()
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def encode_document(text: str) -> SparseVector:
+    """BM25 term weights of a chunk, keyed by hashed term."""
+    counts = Counter(term_index(term) for term in tokenize(text))
+    length = sum(counts.values())
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / BM25_AVG_DOC_TOKENS)
+    indices: List[int] = list(counts)
+    values = [tf * (BM25_K1 + 1) / (tf + norm) for tf in counts.values()]
+    return SparseVector(indices=indices, values=values)
+
+
+def encode_query(text: str) -> SparseVector:
+    """One unit weight per distinct query term; Qdrant multiplies in the IDF."""
+    indices = sorted({term_index(term) for term in tokenize(text)})
+    return SparseVector(indices=indices, values=[1.0] * len(indices))
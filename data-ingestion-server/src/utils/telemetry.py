@@ -0,0 +1,86 @@
+import os
+import time
+import logging
+from contextvars import ContextVar
+from typing import Optional
+from uuid import uuid4
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+# Header carrying the request id from the MCP server through the agentics server to here
+REQUEST_ID_HEADER = "X-Request-ID"
+# Log every finished span with its request id, parent and duration (off by default)
+TRACE_SPANS = os.getenv("TRACE_SPANS", "false").lower() == "true"
+
+# Seconds; covers a cached lookup up to a long OCR page or crew task
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+_current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+
+logger = logging.getLogger("trace")
+logger.setLevel(logging.INFO if TRACE_SPANS else logging.WARNING)
+
+
+def new_request_id() -> str:
+    return uuid4().hex
+
+
+STAGE_SECONDS = Histogram(
+    "nexlify_stage_seconds", "Time spent in each ingestion and search stage.", ("stage", "status"),
+    buckets=DEFAULT_BUCKETS)
+HTTP_REQUEST_SECONDS = Histogram(
+    "nexlify_http_request_seconds", "Time to answer HTTP requests, until the response headers.",
+    ("method", "route", "status"), buckets=DEFAULT_BUCKETS)
+EMBED_RETRIES = Counter(
+    "nexlify_embed_retries_total", "Embedding calls retried after a retryable provider error.", ("reason",))
+EMBED_BACKOFF_SECONDS = Counter(
+    "nexlify_embed_backoff_seconds_total", "Seconds slept between embedding retries.")
+EMBED_BREAKER_OPENS = Counter(
+    "nexlify_embed_breaker_opens_total", "Times the embedding provider's circuit breaker opened.", ("provider",))
+
+
+def render_metrics() -> str:
+    """All metrics of the default registry in the Prometheus text exposition format."""
+    return generate_latest().decode("utf-8")
+
+
+class span:
+    """
+    Times a stage, as `with span("embed"):` or `async with span("embed"):`.
+
+    The duration goes to STAGE_SECONDS, labelled with the stage and whether it
+    raised, and is logged with the request id and the enclosing span, so one
+    request's stages can be followed across the log.
+    """
+
+    def __init__(self, stage: str, **attributes):
+        self.stage = stage
+        self.attributes = attributes
+
+    def __enter__(self) -> "span":
+        self._parent = _current_span.get()
+        self._token = _current_span.set(self.stage)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        status = "ok" if exc_type is None else "error"
+        STAGE_SECONDS.labels(stage=self.stage, status=status).observe(duration)
+        if logger.isEnabledFor(logging.INFO):
+            attributes = "".join(f" {key}={value}" for key, value in self.attributes.items())
+            logger.info(f"span={self.stage} request_id={request_id.get()} parent={self._parent or '-'} "
+                        f"status={status} seconds={duration:.4f}{attributes}")
+
+    async def __aenter__(self) -> "span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+
+def observe_stage(stage: str, seconds: float, status: str = "ok") -> None:
+    """Records a stage timed elsewhere, e.g. in a worker process."""
+    STAGE_SECONDS.labels(stage=stage, status=status).observe(seconds)
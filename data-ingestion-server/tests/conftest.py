@@ -0,0 +1,50 @@
+import asyncio
+from typing import Dict, List, Optional
+
+import pytest
+
+import src.core.ingest_controller as controller
+from benchmarks.fakes import fake_vector
+from src.core.search_cache import SearchResultCache
+from src.service.embedders import EmbedderRouter
+from src.service.embedding_cache import EmbeddingCache
+from src.service.embedding_service import Embedder
+
+
+class FakeEmbedder(Embedder):
+    """Hashed bag of words: texts sharing words get similar vectors. Records every call."""
+
+    name = "fake"
+    task_type = "RETRIEVAL_DOCUMENT"
+
+    def __init__(self, dimension: int = 64, model_name: str = "fake-words"):
+        self.dimension = dimension
+        self.model_name = model_name
+        self.calls: List[List[str]] = []
+
+    async def get_embeddings(self, texts: List[str], title: Optional[str] = "Document Chunk") -> List[List[float]]:
+        self.calls.append(list(texts))
+        return [fake_vector(text, self.dimension) for text in texts]
+
+
+def make_router(collections: Optional[Dict[str, str]] = None, **backends: Embedder) -> EmbedderRouter:
+    """A router over uncached fake backends, so every embedding reaches the backend."""
+    backends = backends or {"fake": FakeEmbedder()}
+    return EmbedderRouter(dict(backends), next(iter(backends)), collections or {},
+                          list(backends.values()), EmbeddingCache(None))
+
+
+async def segments(*parts: str):
+    for part in parts:
+        yield part
+
+
+@pytest.fixture(autouse=True)
+def fresh_controller_state(monkeypatch):
+    """Module-level caches of the controller start empty in every test."""
+    monkeypatch.setattr(controller, "_known_collections", {})
+    monkeypatch.setattr(controller, "_sparse_support", {})
+    monkeypatch.setattr(controller, "_collection_models", {})
+    monkeypatch.setattr(controller, "_searchable_collections", None)
+    monkeypatch.setattr(controller, "_collection_lock", asyncio.Lock())
+    monkeypatch.setattr(controller, "search_cache", SearchResultCache())
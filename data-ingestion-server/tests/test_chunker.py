@@ -0,0 +1,45 @@
+from src.utils.chunker import SEGMENT_SEPARATOR, HeadingChunker, SentenceChunker, WordChunker, chunk_text
+
+
+def feed_all(chunker, segments):
+    return [chunk for segment in segments for chunk in chunker.feed(segment)] + list(chunker.finish())
+
+
+def test_offsets_index_the_separator_joined_document_across_feeds():
+    segments = ["One two three four.", "", "Five six. Seven eight.", " \n ", "Nine ten eleven."]
+    document = SEGMENT_SEPARATOR.join(segments)
+    chunks = feed_all(WordChunker(max_tokens=3, overlap_tokens=1), segments)
+
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert document[chunk.char_start:chunk.char_end] == chunk.text
+    # Blank segments are skipped, but still counted in later offsets
+    assert chunks[-1].char_end == len(document)
+
+
+def test_trailing_words_are_repeated_as_overlap():
+    words = [f"w{n}" for n in range(10)]
+    chunks = chunk_text(" ".join(words), WordChunker(max_tokens=4, overlap_tokens=2))
+
+    assert [chunk.text.split() for chunk in chunks] == [
+        words[0:4], words[2:6], words[4:8], words[6:10]]
+
+
+def test_headings_start_a_new_chunk_without_overlap():
+    text = "# Install\nRun the installer. Accept the terms.\n# Usage\nStart the server."
+
+    chunks = chunk_text(text, HeadingChunker(max_tokens=100, overlap_tokens=10))
+    assert [chunk.text for chunk in chunks] == [
+        "# Install\nRun the installer. Accept the terms.", "# Usage\nStart the server."]
+    # Without heading breaks the whole text fits in one chunk
+    assert len(chunk_text(text, SentenceChunker(max_tokens=100, overlap_tokens=10))) == 1
+
+
+def test_words_longer_than_the_budget_are_cut_by_length():
+    blob = "x" * 20
+    text = f"see {blob} end"
+    chunks = chunk_text(text, WordChunker(max_tokens=2, overlap_tokens=0))
+
+    assert [chunk.text for chunk in chunks] == ["see", "x" * 8, "x" * 8, "xxxx end"]
+    for chunk in chunks:
+        assert text[chunk.char_start:chunk.char_end] == chunk.text
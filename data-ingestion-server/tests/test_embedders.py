@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from qdrant_client import AsyncQdrantClient
+
+import src.core.ingest_controller as controller
+from src.models.embedding_model import SemanticSearchRequest
+from src.service.embedders import EmbedderRouter
+from src.service.embedding_cache import EmbeddingCache
+from src.service.embedding_service import EmbeddingQuotaExceeded
+
+from conftest import FakeEmbedder, segments
+
+
+class ExhaustedEmbedder(FakeEmbedder):
+    async def get_embeddings(self, texts, title=None):
+        raise EmbeddingQuotaExceeded("quota exhausted")
+
+
+def router(default, collections=None, **backends):
+    return EmbedderRouter(dict(backends), default, collections or {}, list(backends.values()), EmbeddingCache(None))
+
+
+def test_queries_use_the_backend_of_the_model_the_collection_was_built_with():
+    gemini = FakeEmbedder(model_name="gemini-model")
+    local = FakeEmbedder(dimension=32, model_name="local-model")
+
+    embedders = router("gemini", {"local_docs": "local"}, gemini=gemini, local=local)
+    assert embedders.for_query("dev_docs", "gemini-model") is gemini
+    assert embedders.for_query("dev_docs", "local-model") is local
+    assert embedders.for_query("local_docs", "local-model") is local
+    assert embedders.for_query("dev_docs", None) is gemini
+    assert embedders.for_query("dev_docs", "unknown-model") is gemini
+    assert embedders.for_collection("dev_docs") is gemini
+
+
+def test_ingestion_never_switches_model_and_records_it():
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        gemini = ExhaustedEmbedder(model_name="gemini-model")
+        local = FakeEmbedder(model_name="local-model")
+        embedders = router("gemini", gemini=gemini, local=local)
+
+        with pytest.raises(EmbeddingQuotaExceeded):
+            await controller.ingest_file_to_qdrant(qdrant, embedders, segments("Some text."), "a.txt", "dev_docs")
+        assert local.calls == []
+        info = await qdrant.get_collection("dev_docs")
+        assert info.config.metadata == {controller.EMBED_MODEL_KEY: "gemini-model"}
+        await qdrant.close()
+
+    asyncio.run(main())
+
+
+def test_ingesting_with_another_model_of_the_same_size_is_rejected():
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        first = router("a", a=FakeEmbedder(model_name="model-a"))
+        second = router("b", b=FakeEmbedder(model_name="model-b"))
+        await controller.ingest_file_to_qdrant(qdrant, first, segments("Some text."), "a.txt", "dev_docs")
+        controller._known_collections.clear()
+
+        with pytest.raises(ValueError, match="built with model-a"):
+            await controller.ingest_file_to_qdrant(qdrant, second, segments("Other text."), "b.txt", "dev_docs")
+        await qdrant.close()
+
+    asyncio.run(main())
+
+
+def test_unrecorded_collections_get_the_model_of_their_next_ingest():
+    async def main():
+        from qdrant_client.http.models import Distance, VectorParams
+        qdrant = AsyncQdrantClient(":memory:")
+        await qdrant.create_collection("legacy", vectors_config=VectorParams(size=64, distance=Distance.COSINE))
+        embedders = router("a", a=FakeEmbedder(model_name="model-a"))
+
+        await controller.ingest_file_to_qdrant(qdrant, embedders, segments("Some text."), "a.txt", "legacy")
+
+        assert (await qdrant.get_collection("legacy")).config.metadata == {controller.EMBED_MODEL_KEY: "model-a"}
+        await qdrant.close()
+
+    asyncio.run(main())
+
+
+def test_search_embeds_with_the_model_the_collection_was_built_with():
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        local = FakeEmbedder(dimension=32, model_name="local-model")
+        await controller.ingest_file_to_qdrant(
+            qdrant, router("local", local=local), segments("Rotate the oauth certificate."), "a.txt", "dev_docs")
+
+        gemini = ExhaustedEmbedder(model_name="gemini-model")
+        embedders = router("gemini", gemini=gemini, local=local)
+        response = await controller.search_collection(qdrant, embedders, SemanticSearchRequest(query="oauth"))
+
+        assert response.results[0].filename == "a.txt"
+        await qdrant.close()
+
+    asyncio.run(main())
@@ -0,0 +1,38 @@
+import sqlite3
+
+from src.service.embedding_cache import EmbeddingCache
+
+
+def test_get_many_reads_disk_hits_in_one_commit(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    writer = EmbeddingCache(path)
+    writer.put_many({f"k{i}": [float(i), 0.5] for i in range(3)})
+    writer.close()
+
+    cache = EmbeddingCache(path)
+    statements = []
+    cache._db.set_trace_callback(statements.append)
+    vectors = cache.get_many(["k0", "missing", "k2", "k0"])
+
+    assert vectors == [[0.0, 0.5], None, [2.0, 0.5], [0.0, 0.5]]
+    assert sum(s.startswith("SELECT") for s in statements) == 1
+    assert sum(s == "COMMIT" for s in statements) == 1
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (2, 1, 1)
+
+    # Disk hits are now in memory
+    statements.clear()
+    assert cache.get("k2") == [2.0, 0.5]
+    assert statements == []
+
+
+def test_get_many_updates_access_times(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path, memory_max_bytes=0)
+    cache.put_many({"a": [1.0], "b": [2.0]})
+    with sqlite3.connect(path) as db:
+        db.execute("UPDATE embeddings SET last_access = 0")
+    cache.get_many(["a"])
+    with sqlite3.connect(path) as db:
+        access = dict(db.execute("SELECT key, last_access FROM embeddings"))
+    assert access["a"] > 0 and access["b"] == 0
@@ -0,0 +1,83 @@
+import asyncio
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import Distance, ScoredPoint, VectorParams
+
+import src.core.ingest_controller as controller
+from src.models.embedding_model import SemanticSearchRequest
+from src.utils.sparse_encoder import encode_document, encode_query, tokenize
+
+from conftest import make_router, segments
+
+DOCS = {
+    "errors.txt": "Login fails with ERR_AUTH.401 when the oauth token expired.",
+    "deploy.txt": "Deploy the gateway proxy behind the ingress.",
+    "rotate.txt": "Rotate the oauth certificate and refresh the session.",
+}
+
+
+def point(point_id: int, score: float) -> ScoredPoint:
+    return ScoredPoint(id=point_id, version=0, score=score)
+
+
+def test_tokenize_keeps_compound_terms_and_drops_stopwords():
+    assert list(tokenize("The ERR_AUTH.401 is at /var/log")) == [
+        "err_auth.401", "err", "auth", "401", "var/log", "var", "log"]
+    assert encode_query("the of and").indices == []
+    document = encode_document("token token session")
+    weights = dict(zip(document.indices, document.values))
+    assert weights[encode_query("token").indices[0]] > weights[encode_query("session").indices[0]]
+
+
+def test_weighted_fusion_normalises_and_weights_both_sides():
+    dense = [point(1, 0.9), point(2, 0.5), point(3, 0.1)]
+    sparse = [point(3, 12.0), point(4, 2.0)]
+
+    assert [p.id for p in controller.weighted_fusion(dense, sparse, 1.0, 2)] == [1, 2]
+    assert controller.weighted_fusion(dense, sparse, 0.0, 2)[0].id == 3
+
+    fused = {p.id: p.score for p in controller.weighted_fusion(dense, sparse, 0.5, 4)}
+    assert fused == {1: 0.5, 2: 0.25, 3: 0.5, 4: 0.0}
+
+
+async def ingest_docs(qdrant, embedders, collection="dev_docs"):
+    for filename, text in DOCS.items():
+        await controller.ingest_file_to_qdrant(qdrant, embedders, segments(text), filename, collection)
+
+
+def test_hybrid_search_finds_exact_terms_with_both_fusions():
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedders = make_router()
+        await ingest_docs(qdrant, embedders)
+
+        for fusion in ("rrf", "weighted"):
+            response = await controller.search_collection(qdrant, embedders, SemanticSearchRequest(
+                query="ERR_AUTH.401", mode="hybrid", fusion=fusion, top_k=2))
+            assert response.mode == "hybrid"
+            assert response.results[0].filename == "errors.txt"
+            assert len(response.results) <= 2
+        await qdrant.close()
+
+    asyncio.run(main())
+
+
+def test_hybrid_falls_back_to_dense():
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedders = make_router()
+        # A collection created before hybrid search, without the sparse vector
+        await qdrant.create_collection("legacy", vectors_config=VectorParams(size=64, distance=Distance.COSINE))
+        await ingest_docs(qdrant, embedders, "legacy")
+        await ingest_docs(qdrant, embedders)
+
+        legacy = await controller.search_collection(qdrant, embedders, SemanticSearchRequest(
+            query="oauth token", collection="legacy", mode="hybrid"))
+        stopwords = await controller.search_collection(qdrant, embedders, SemanticSearchRequest(
+            query="what is the", mode="hybrid"))
+
+        assert legacy.mode == "dense" and legacy.results
+        assert stopwords.mode == "dense"
+        await qdrant.close()
+
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+import pytest
+
+import src.utils.ingest_util as ingest_util
+from src.utils.chunker import SEGMENT_SEPARATOR
+from src.utils.ingest_util import iter_html_segments, iter_text_segments
+
+
+@pytest.fixture
+def tiny_reads(monkeypatch):
+    # Reads of a few bytes split tags, entities and multi-byte characters
+    monkeypatch.setattr(ingest_util, "READ_BLOCK_BYTES", 3)
+
+
+def write(tmp_path, name, data: bytes) -> str:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_text_segments_rejoin_to_the_file_across_multibyte_reads(tmp_path, tiny_reads):
+    paragraphs = ["Ünïcödé € 😀 first paragraph", "zweite Straße — 第二段", "last ✓"]
+    text = "\n\n".join(paragraphs)
+    path = write(tmp_path, "a.txt", text.encode("utf-8"))
+
+    # Segments end at blank lines, which the chunker puts back between them
+    segments = list(iter_text_segments(path, segment_chars=30))
+    assert segments == [paragraphs[0], "\n\n".join(paragraphs[1:])]
+    assert SEGMENT_SEPARATOR.join(segments) == text
+    assert "".join(iter_text_segments(path, segment_chars=10_000)) == text
+
+
+def test_html_text_skips_scripts_and_styles_with_tags_split_across_reads(tmp_path, tiny_reads):
+    html = (
+        "<html><head><style>p { color: red }</style>"
+        "<script>var s = '<p>not text</p>';</script></head>"
+        "<body><p class=\"lead\">Héllo &amp; wörld</p><template><p>hidden</p></template>"
+        "<div>naïve — café 😀</div></body></html>"
+    )
+    path = write(tmp_path, "a.html", html.encode("utf-8"))
+
+    assert list(iter_html_segments(path)) == ["Héllo & wörld\nnaïve — café 😀"]
+    # A small segment size splits between text nodes
+    assert list(iter_html_segments(path, segment_chars=5)) == ["Héllo & wörld", "naïve — café 😀"]
+
+
+def test_html_encoding_comes_from_the_meta_charset(tmp_path):
+    html = "<html><head><meta charset=\"iso-8859-1\"></head><body><p>café crème</p></body></html>"
+    path = write(tmp_path, "latin.html", html.encode("iso-8859-1"))
+
+    assert list(iter_html_segments(path)) == ["café crème"]
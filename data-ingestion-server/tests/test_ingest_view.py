@@ -0,0 +1,77 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_embedders, get_job_manager, get_qdrant
+from src.api.ingest_view import router
+from src.core.job_manager import SUCCEEDED, Job, JobManager, JobStore
+
+
+class FakeJobManager:
+    def __init__(self):
+        self.jobs = []
+
+    def active(self, kind):
+        return next((job for job in self.jobs if job.kind == kind and not job.finished), None)
+
+    def submit(self, kind, collection, params):
+        job = Job(f"job-{len(self.jobs)}", kind, collection, params)
+        self.jobs.append(job)
+        return job
+
+
+def client(jobs):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_job_manager] = lambda: jobs
+    app.dependency_overrides[get_qdrant] = lambda: None
+    app.dependency_overrides[get_embedders] = lambda: None
+    return TestClient(app)
+
+
+def test_confluence_sync_reuses_the_active_job_of_the_same_mode():
+    jobs = FakeJobManager()
+    api = client(jobs)
+
+    first = api.post("/admin/confluence")
+    second = api.post("/admin/confluence", params={"mode": "incremental"})
+
+    assert first.status_code == second.status_code == 202
+    assert first.json()["job_id"] == second.json()["job_id"]
+    assert len(jobs.jobs) == 1
+
+
+def test_confluence_sync_of_another_mode_conflicts_with_the_active_job():
+    jobs = FakeJobManager()
+    api = client(jobs)
+    api.post("/admin/confluence")
+
+    response = api.post("/admin/confluence", params={"mode": "full"})
+
+    assert response.status_code == 409
+    assert len(jobs.jobs) == 1
+
+    jobs.jobs[0].status = "succeeded"
+    assert api.post("/admin/confluence", params={"mode": "full"}).status_code == 202
+    assert jobs.jobs[1].params == {"mode": "full"}
+
+
+def test_search_rejects_out_of_range_top_k():
+    api = client(FakeJobManager())
+
+    assert api.post("/search", json={"query": "q", "top_k": 0}).status_code == 422
+    assert api.post("/search", json={"query": "q", "top_k": 1000}).status_code == 422
+    assert api.post("/search/batch", json={"queries": [{"query": "q", "top_k": 0}]}).status_code == 422
+    assert api.post("/search/batch", json={"queries": [{"query": "q"}], "merge": True,
+                                           "merge_top_k": 0}).status_code == 422
+
+
+def test_cancel_returns_finished_jobs_from_the_store_and_404_for_unknown_ids(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    store.save(Job("done", "document", "dev_docs", {"filename": "a.txt"}, status=SUCCEEDED))
+    api = client(JobManager(store, {}))
+    try:
+        done = api.post("/jobs/done/cancel")
+        assert done.status_code == 200 and done.json()["status"] == SUCCEEDED
+        assert api.post("/jobs/unknown/cancel").status_code == 404
+    finally:
+        store.close()
@@ -0,0 +1,153 @@
+import asyncio
+import functools
+
+from qdrant_client import AsyncQdrantClient
+
+import src.core.ingest_controller as controller
+from benchmarks.fakes import ConfluenceMock
+from src.core.confluence_state import ConfluenceWatermarkStore
+from src.models.embedding_model import SemanticSearchRequest
+
+from conftest import FakeEmbedder, make_router, segments
+
+FIRST = "Deploy the gateway proxy.\n\nRotate the oauth certificate monthly."
+EDITED = "Deploy the gateway proxy.\n\nRotate the oauth certificate weekly."
+
+
+async def stored(qdrant, collection):
+    points, _ = await qdrant.scroll(collection, limit=1000, with_payload=True)
+    return points
+
+
+def test_reingesting_unchanged_content_embeds_nothing():
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedder = FakeEmbedder()
+        embedders = make_router(fake=embedder)
+
+        chunks = await controller.ingest_file_to_qdrant(qdrant, embedders, segments(FIRST), "a.txt", "dev_docs")
+        ids = {point.id for point in await stored(qdrant, "dev_docs")}
+        embedder.calls.clear()
+        again = await controller.ingest_file_to_qdrant(qdrant, embedders, segments(FIRST), "a.txt", "dev_docs")
+
+        assert again == chunks and len(ids) == chunks
+        assert embedder.calls == []
+        assert {point.id for point in await stored(qdrant, "dev_docs")} == ids
+        await qdrant.close()
+
+    asyncio.run(main())
+
+
+def test_replace_deletes_chunks_of_the_previous_upload_only():
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedders = make_router()
+        await controller.ingest_file_to_qdrant(qdrant, embedders, segments(FIRST), "a.txt", "dev_docs")
+        await controller.ingest_file_to_qdrant(qdrant, embedders, segments("Other file."), "b.txt", "dev_docs")
+
+        await controller.ingest_file_to_qdrant(qdrant, embedders, segments(EDITED), "a.txt", "dev_docs")
+        texts = sorted(point.payload["text"] for point in await stored(qdrant, "dev_docs"))
+        assert texts == sorted([EDITED, "Other file."])
+
+        # Without replace the old chunks are kept next to the new ones
+        await controller.ingest_file_to_qdrant(
+            qdrant, embedders, segments(FIRST), "a.txt", "dev_docs", replace=False)
+        assert len(await stored(qdrant, "dev_docs")) == 3
+        await qdrant.close()
+
+    asyncio.run(main())
+
+
+def test_confluence_sync_is_incremental_and_removes_deleted_pages(tmp_path, monkeypatch):
+    mock = ConfluenceMock(pages=6, paragraphs=2, latency=0.0).start()
+    monkeypatch.setattr(controller, "CONFLUENCE_BASE_URL", mock.base_url)
+    monkeypatch.setattr(controller, "CONFLUENCE_SPACE_KEY", "TEST")
+    monkeypatch.setattr(controller, "CONFLUENCE_FETCH_BATCH", 2)
+    monkeypatch.setattr(controller, "ConfluenceWatermarkStore",
+                        functools.partial(ConfluenceWatermarkStore, str(tmp_path / "state.sqlite3")))
+
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedder = FakeEmbedder()
+        embedders = make_router(fake=embedder)
+        collection = controller.CONFLUENCE_COLLECTION
+
+        first = await controller.fetch_and_ingest_confluence_pages(qdrant, embedders)
+        assert (first["pages_ingested"], first["removed"]) == (6, 0)
+        pages = {point.payload["page_id"] for point in await stored(qdrant, collection)}
+        assert len(pages) == 6
+
+        embedder.calls.clear()
+        second = await controller.fetch_and_ingest_confluence_pages(qdrant, embedders)
+        assert (second["pages_ingested"], second["unchanged"]) == (0, 6)
+        assert embedder.calls == []
+
+        removed = sorted(mock.pages)[0]
+        del mock.pages[removed]
+        third = await controller.fetch_and_ingest_confluence_pages(qdrant, embedders)
+        assert third["removed"] == 1
+        assert removed not in {point.payload["page_id"] for point in await stored(qdrant, collection)}
+
+        # A full sync re-reads every page, but only embeds chunks whose text changed
+        edited = sorted(mock.pages)[0]
+        title, _ = mock.pages[edited]
+        mock.pages[edited] = (title, "<p>Completely rewritten page.</p>")
+        embedder.calls.clear()
+        full = await controller.fetch_and_ingest_confluence_pages(qdrant, embedders, mode="full")
+        assert full["pages_ingested"] == 5
+        embedded = [text for call in embedder.calls for text in call]
+        assert len(embedded) == 1 and embedded[0].endswith("Completely rewritten page.")
+        texts = [point.payload["text"] for point in await stored(qdrant, collection)
+                 if point.payload["page_id"] == edited]
+        assert texts == ["Completely rewritten page."]
+
+        results = await controller.search_collection(qdrant, embedders, SemanticSearchRequest(
+            query="completely rewritten page", collection=collection, top_k=1))
+        assert results.results[0].title == title
+        await qdrant.close()
+
+    try:
+        asyncio.run(main())
+    finally:
+        mock.stop()
+
+
+def test_confluence_page_missing_from_search_is_kept_and_retried(tmp_path, monkeypatch):
+    mock = ConfluenceMock(pages=4, paragraphs=2, latency=0.0).start()
+    monkeypatch.setattr(controller, "CONFLUENCE_BASE_URL", mock.base_url)
+    monkeypatch.setattr(controller, "CONFLUENCE_SPACE_KEY", "TEST")
+    monkeypatch.setattr(controller, "CONFLUENCE_FETCH_BATCH", 2)
+    monkeypatch.setattr(controller, "ConfluenceWatermarkStore",
+                        functools.partial(ConfluenceWatermarkStore, str(tmp_path / "state.sqlite3")))
+
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedders = make_router()
+        collection = controller.CONFLUENCE_COLLECTION
+        await controller.fetch_and_ingest_confluence_pages(qdrant, embedders)
+
+        edited = sorted(mock.pages)[0]
+        title, _ = mock.pages[edited]
+        before = [point.payload["text"] for point in await stored(qdrant, collection)
+                  if point.payload["page_id"] == edited]
+        mock.pages[edited] = (title, "<p>Completely rewritten page.</p>")
+        mock.versions[edited] = 2
+        mock.unindexed.add(edited)
+
+        lagging = await controller.fetch_and_ingest_confluence_pages(qdrant, embedders)
+        assert (lagging["pages_ingested"], lagging["pages_deferred"]) == (0, 1)
+        # The page keeps its points from the last version that was ingested
+        assert [point.payload["text"] for point in await stored(qdrant, collection)
+                if point.payload["page_id"] == edited] == before
+
+        mock.unindexed.clear()
+        caught_up = await controller.fetch_and_ingest_confluence_pages(qdrant, embedders)
+        assert (caught_up["pages_ingested"], caught_up["pages_deferred"]) == (1, 0)
+        assert [point.payload["text"] for point in await stored(qdrant, collection)
+                if point.payload["page_id"] == edited] == ["Completely rewritten page."]
+        await qdrant.close()
+
+    try:
+        asyncio.run(main())
+    finally:
+        mock.stop()
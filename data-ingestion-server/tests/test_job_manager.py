@@ -0,0 +1,136 @@
+import asyncio
+
+from src.core.job_manager import CANCELLED, QUEUED, RUNNING, SUCCEEDED, Job, JobManager, JobStore
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def test_submit_runs_job_and_keeps_it_only_in_store(tmp_path):
+    async def main():
+        async def runner(job):
+            job.add_total(2)
+            job.advance(2)
+            return {"chunks": 2}
+
+        manager = JobManager(JobStore(str(tmp_path / "jobs.sqlite3")), {"document": runner})
+        job = manager.submit("document", "dev_docs", {"filename": "a.txt"})
+        await wait_for(lambda: job.finished)
+
+        assert job.job_id not in manager._jobs
+        stored = manager.get(job.job_id)
+        assert (stored.status, stored.chunks_done, stored.result) == (SUCCEEDED, 2, {"chunks": 2})
+        assert [j.job_id for j in manager.recent()] == [job.job_id]
+        await manager.stop()
+
+    asyncio.run(main())
+
+
+def test_cancel_queued_and_running_jobs(tmp_path):
+    async def main():
+        started = asyncio.Event()
+
+        async def runner(job):
+            started.set()
+            await asyncio.sleep(60)
+
+        manager = JobManager(JobStore(str(tmp_path / "jobs.sqlite3")), {"document": runner}, workers=1)
+        running = manager.submit("document", "dev_docs", {"filename": "a.txt"})
+        queued = manager.submit("document", "dev_docs", {"filename": "b.txt"})
+        await started.wait()
+        assert (running.status, queued.status) == (RUNNING, QUEUED)
+
+        manager.cancel(queued.job_id)
+        manager.cancel(running.job_id)
+        await wait_for(lambda: running.finished)
+
+        assert manager.get(queued.job_id).status == CANCELLED
+        assert manager.get(running.job_id).status == CANCELLED
+        # Finished jobs are no longer active; the endpoint reads them from the store
+        assert manager.cancel(running.job_id) is None
+        await manager.stop()
+
+    asyncio.run(main())
+
+
+def test_start_resumes_unfinished_jobs(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    store.save(Job("interrupted", "document", "dev_docs", {"filename": "a.txt"}, status=RUNNING, chunks_done=5))
+    store.save(Job("gone", "document", "dev_docs", {"filename": "b.txt", "spool_path": str(tmp_path / "missing")},
+                   status=QUEUED))
+    store.close()
+
+    async def main():
+        ran = []
+
+        async def runner(job):
+            ran.append((job.job_id, job.chunks_done))
+            return {}
+
+        manager = JobManager(JobStore(path), {"document": runner})
+        await manager.start()
+        await wait_for(lambda: ran)
+        await wait_for(lambda: manager.get("interrupted").finished)
+
+        assert ran == [("interrupted", 0)]
+        assert manager.get("interrupted").status == SUCCEEDED
+        assert manager.get("gone").status == "failed"
+        await manager.stop()
+
+    asyncio.run(main())
+
+
+def test_stop_leaves_running_jobs_queued(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+
+    async def main():
+        started = asyncio.Event()
+
+        async def runner(job):
+            started.set()
+            await asyncio.sleep(60)
+
+        manager = JobManager(JobStore(path), {"document": runner})
+        job = manager.submit("document", "dev_docs", {"filename": "a.txt"})
+        await started.wait()
+        await manager.stop()
+        return job.job_id
+
+    job_id = asyncio.run(main())
+    store = JobStore(path)
+    assert [job.job_id for job in store.unfinished()] == [job_id]
+    store.close()
+
+
+def test_jobs_replacing_the_same_file_do_not_overlap(tmp_path):
+    async def main():
+        active = {}
+        overlaps = []
+
+        async def runner(job):
+            key = job.params["filename"]
+            active[key] = active.get(key, 0) + 1
+            overlaps.append((key, active[key]))
+            await asyncio.sleep(0.05)
+            active[key] -= 1
+            return {}
+
+        manager = JobManager(JobStore(str(tmp_path / "jobs.sqlite3")), {"document": runner},
+                             workers=4, collection_concurrency=4)
+        jobs = [manager.submit("document", "dev_docs", {"filename": name, "replace": True})
+                for name in ("a.txt", "a.txt", "b.txt")]
+        await asyncio.sleep(0.02)
+        # The second upload of a.txt waits, b.txt runs alongside the first
+        assert [job.status for job in jobs] == [RUNNING, QUEUED, RUNNING]
+        await wait_for(lambda: all(job.finished for job in jobs))
+
+        assert max(depth for key, depth in overlaps if key == "a.txt") == 1
+        assert manager._source_locks == {}
+        await manager.stop()
+
+    asyncio.run(main())
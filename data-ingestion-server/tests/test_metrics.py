@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from src.main import app
+from src.utils.telemetry import EMBED_BREAKER_OPENS, span
+
+
+def scrape(api: TestClient):
+    response = api.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    return {family.name: family for family in text_string_to_metric_families(response.text)}
+
+
+def samples(family, name, **labels):
+    return [sample for sample in family.samples
+            if sample.name == name and all(sample.labels.get(key) == value for key, value in labels.items())]
+
+
+def test_metrics_endpoint_exports_parseable_stage_request_and_counter_series():
+    api = TestClient(app)  # no lifespan: the routes used here need no backends
+    with span("test.metrics"):
+        pass
+    try:
+        with span("test.metrics"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    EMBED_BREAKER_OPENS.labels(provider="test").inc()
+    assert api.get("/").status_code == 200
+
+    families = scrape(api)
+
+    stages = families["nexlify_stage_seconds"]
+    assert stages.type == "histogram"
+    for status in ("ok", "error"):
+        [count] = samples(stages, "nexlify_stage_seconds_count", stage="test.metrics", status=status)
+        assert count.value == 1
+        buckets = samples(stages, "nexlify_stage_seconds_bucket", stage="test.metrics", status=status)
+        assert [sample.value for sample in buckets] == sorted(sample.value for sample in buckets)
+        assert buckets[-1].labels["le"] == "+Inf" and buckets[-1].value == 1
+
+    requests = families["nexlify_http_request_seconds"]
+    assert samples(requests, "nexlify_http_request_seconds_count", method="GET", route="/", status="200")
+
+    opens = families["nexlify_embed_breaker_opens"]
+    assert opens.type == "counter"
+    [opened] = samples(opens, "nexlify_embed_breaker_opens_total", provider="test")
+    assert opened.value >= 1
+    # Unlabelled counters are exported before their first increment
+    assert samples(families["nexlify_embed_backoff_seconds"], "nexlify_embed_backoff_seconds_total")
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import Distance, VectorParams
+
+import src.core.ingest_controller as controller
+from src.models.embedding_model import SearchResult, SemanticSearchRequest, SemanticSearchResponse
+
+from conftest import make_router, segments
+
+
+def response(collection, mode, *scores):
+    return SemanticSearchResponse(query="q", collection=collection, mode=mode, results=[
+        SearchResult(id=f"{collection}-{index}", collection=collection, text="", score=score)
+        for index, score in enumerate(scores)])
+
+
+def merge(collections, responses, top_k=5, models=None):
+    req = SemanticSearchRequest(query="q", collection=collections, top_k=top_k)
+    return controller.merge_collection_responses(req, collections, responses, models or ["m"] * len(collections))
+
+
+def test_single_collection_list_keeps_its_results_unchanged():
+    only = response("docs", "hybrid", 0.4)
+    merged = merge(["docs"], [only])
+
+    assert merged.results == only.results
+    assert merged.collections == ["docs"] and merged.mode == "hybrid"
+
+
+def test_dense_results_are_merged_on_their_cosine_scores():
+    merged = merge(["docs", "wiki"], [response("docs", "dense", 0.91, 0.85), response("wiki", "dense", 0.32)])
+
+    # The best hit of a weak collection does not outrank better hits elsewhere
+    assert [(result.id, result.score) for result in merged.results] == [
+        ("docs-0", 0.91), ("docs-1", 0.85), ("wiki-0", 0.32)]
+    assert all(result.raw_score is None for result in merged.results)
+
+
+def test_dense_results_of_different_models_are_merged_by_reciprocal_rank():
+    responses = [response("confluence", "dense", 0.62, 0.6), response("dev_docs", "dense", 0.41)]
+    merged = merge(["confluence", "dev_docs"], responses, models=["gemini-embedding", "all-MiniLM-L6-v2"])
+
+    assert [result.id for result in merged.results] == ["confluence-0", "dev_docs-0", "confluence-1"]
+    assert [result.raw_score for result in merged.results] == [0.62, 0.41, 0.6]
+
+    # A collection whose model is not recorded is not assumed to share one
+    unknown = merge(["confluence", "dev_docs"], responses, models=["gemini-embedding", None])
+    assert [result.id for result in unknown.results] == ["confluence-0", "dev_docs-0", "confluence-1"]
+
+
+def test_hybrid_results_are_merged_by_reciprocal_rank():
+    merged = merge(["docs", "wiki"], [response("docs", "hybrid", 0.5, 0.3), response("wiki", "dense", 0.9)],
+                   top_k=2)
+
+    assert [result.id for result in merged.results] == ["docs-0", "wiki-0"]
+    assert [result.score for result in merged.results] == [1 / 61, 1 / 61]
+    assert [result.raw_score for result in merged.results] == [0.5, 0.9]
+    assert merged.mode == "mixed"
+
+
+async def ingest(qdrant, embedders, collection, text):
+    await controller.ingest_file_to_qdrant(qdrant, embedders, segments(text), "notes.txt", collection)
+
+
+def test_all_searches_only_managed_collections_of_the_query_model():
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedders = make_router()
+        await ingest(qdrant, embedders, "dev_docs", "Rotate the oauth certificate.")
+        await ingest(qdrant, embedders, "wiki", "The oauth token expires after an hour.")
+        # Not created by this server, built with another model, and of another size
+        await qdrant.create_collection("foreign", vectors_config=VectorParams(size=64, distance=Distance.COSINE))
+        await qdrant.create_collection("other_model", metadata={controller.EMBED_MODEL_KEY: "other"},
+                                       vectors_config=VectorParams(size=64, distance=Distance.COSINE))
+        await qdrant.create_collection("small", metadata={controller.EMBED_MODEL_KEY: "fake-words"},
+                                       vectors_config=VectorParams(size=8, distance=Distance.COSINE))
+
+        response = await controller.search_collection(qdrant, embedders, SemanticSearchRequest(
+            query="oauth", collection="all"))
+
+        assert response.collections == ["dev_docs", "wiki"]
+        assert {result.collection for result in response.results} == {"dev_docs", "wiki"}
+        await qdrant.close()
+
+    asyncio.run(main())
+
+
+def test_failing_collection_is_skipped_only_in_multi_collection_searches(monkeypatch):
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedders = make_router()
+        await ingest(qdrant, embedders, "dev_docs", "Rotate the oauth certificate.")
+        await ingest(qdrant, embedders, "wiki", "The oauth token expires after an hour.")
+
+        missing = await controller.search_collection(qdrant, embedders, SemanticSearchRequest(
+            query="oauth", collection=["dev_docs", "missing"]))
+        assert missing.collections == ["dev_docs"]
+        assert missing.results and {result.collection for result in missing.results} == {"dev_docs"}
+
+        query_batch_points = qdrant.query_batch_points
+
+        async def failing_wiki(collection_name, requests):
+            if collection_name == "wiki":
+                raise ConnectionError("wiki is down")
+            return await query_batch_points(collection_name=collection_name, requests=requests)
+
+        monkeypatch.setattr(qdrant, "query_batch_points", failing_wiki)
+        merged = await controller.search_collection(qdrant, embedders, SemanticSearchRequest(
+            query="oauth", collection="all"))
+        assert merged.collections == ["dev_docs"]
+
+        with pytest.raises(ConnectionError):
+            await controller.search_collection(qdrant, embedders, SemanticSearchRequest(
+                query="oauth", collection="wiki"))
+        await qdrant.close()
+
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+import asyncio
+from concurrent.futures import Future
+
+from benchmarks.fakes import make_pdf
+from src.utils import pdf_extractor
+from src.utils.ingest_util import iterate_in_thread
+
+
+class FakeOcrPool:
+    """Each submitted page finishes when the next one is submitted; the last never does."""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, pdf_path, page_number, dpi):
+        if self.futures:
+            self.futures[-1].set_result((f"ocr page {page_number - 1}", 0.0))
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+def write_pdf(tmp_path, pages):
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(make_pdf(pages))
+    return str(path)
+
+
+def test_closing_early_cancels_pending_ocr(tmp_path, monkeypatch):
+    pool = FakeOcrPool()
+    monkeypatch.setattr(pdf_extractor, "get_ocr_pool", lambda: pool)
+    pages = pdf_extractor.iter_pdf_pages(write_pdf(tmp_path, ["", "", ""]), window=10)
+
+    assert next(pages) == "ocr page 1"
+    pages.close()
+
+    assert pool.futures[1].cancelled()
+    assert len(pool.futures) == 2
+
+
+def test_iterate_in_thread_closes_abandoned_iterator(tmp_path, monkeypatch):
+    pool = FakeOcrPool()
+    monkeypatch.setattr(pdf_extractor, "get_ocr_pool", lambda: pool)
+
+    async def first_page():
+        segments = iterate_in_thread(pdf_extractor.iter_pdf_pages(write_pdf(tmp_path, ["", "", ""]), window=10))
+        async for segment in segments:
+            await segments.aclose()
+            return segment
+
+    assert asyncio.run(first_page()) == "ocr page 1"
+    assert pool.futures[1].cancelled()
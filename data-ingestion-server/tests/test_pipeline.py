@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from src.utils.pipeline import Stage, run_pipeline
+
+
+async def numbers(count):
+    for number in range(count):
+        yield number
+
+
+def test_every_item_passes_every_stage():
+    async def main():
+        seen = []
+
+        async def double(item):
+            await asyncio.sleep(0)
+            return item * 2
+
+        async def drop_odd_tens(item):
+            return None if item % 20 == 10 else item
+
+        async def collect(item):
+            seen.append(item)
+
+        stats = await run_pipeline(numbers(50), [
+            Stage("double", double, concurrency=4),
+            Stage("filter", drop_odd_tens, concurrency=2),
+            Stage("collect", collect),
+        ], queue_size=2)
+        return seen, stats
+
+    seen, stats = asyncio.run(main())
+    assert sorted(seen) == [n * 2 for n in range(50) if (n * 2) % 20 != 10]
+    assert {name: stat["items"] for name, stat in stats.items()} == {"double": 50, "filter": 50, "collect": 45}
+
+
+def test_batching_stage_takes_what_is_queued():
+    async def main():
+        batches = []
+
+        async def slow(items):
+            batches.append(list(items))
+            await asyncio.sleep(0.01)
+
+        await run_pipeline(numbers(20), [Stage("batch", slow, batch_size=8)])
+        return batches
+
+    batches = asyncio.run(main())
+    assert sorted(item for batch in batches for item in batch) == list(range(20))
+    assert max(len(batch) for batch in batches) > 1
+    assert all(len(batch) <= 8 for batch in batches)
+
+
+def test_stages_overlap():
+    async def main():
+        active = {"a": 0, "b": 0}
+        overlapped = []
+
+        def stage(name):
+            async def run(item):
+                active[name] += 1
+                overlapped.append(all(active.values()))
+                await asyncio.sleep(0.01)
+                active[name] -= 1
+                return item
+            return run
+
+        await run_pipeline(numbers(10), [Stage("a", stage("a")), Stage("b", stage("b"))])
+        return overlapped
+
+    assert any(asyncio.run(main()))
+
+
+def test_first_error_cancels_the_pipeline_and_is_raised():
+    async def main():
+        processed = []
+
+        async def fail_on_three(item):
+            if item == 3:
+                raise RuntimeError("boom")
+            return item
+
+        async def record(item):
+            processed.append(item)
+            await asyncio.sleep(0.01)
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await run_pipeline(numbers(1000), [Stage("check", fail_on_three), Stage("record", record)])
+        return processed
+
+    assert len(asyncio.run(main())) < 10
@@ -0,0 +1,172 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import src.service.rate_limiter as rate_limiter
+from src.service.rate_limiter import AdaptiveRateLimiter, CircuitOpen, interactive
+
+
+class FakeClock:
+    """Replaces the limiter's monotonic clock; its sleeps advance the clock instead of waiting."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.now += delay
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(rate_limiter, "asyncio", SimpleNamespace(sleep=clock.sleep))
+    return clock
+
+
+async def settle(rounds: int = 20) -> None:
+    for _ in range(rounds):
+        await asyncio.sleep(0)
+
+
+def test_interactive_request_goes_ahead_of_queued_bulk(clock):
+    limiter = AdaptiveRateLimiter("test", burst=10, max_in_flight=1, interactive_slots=0)
+    started = []
+
+    async def request(name: str, release: asyncio.Event) -> None:
+        async with limiter.slot():
+            started.append(name)
+            await release.wait()
+
+    async def search(release: asyncio.Event) -> None:
+        with interactive():
+            await request("interactive", release)
+
+    async def main():
+        release = asyncio.Event()
+        holder = asyncio.ensure_future(request("holder", release))
+        await settle()
+        bulk = asyncio.ensure_future(request("bulk", release))
+        await settle()
+        query = asyncio.ensure_future(search(release))
+        await settle()
+        assert limiter.stats()["waiting_bulk"] == 1
+        assert limiter.stats()["waiting_interactive"] == 1
+
+        release.set()
+        await asyncio.gather(holder, bulk, query)
+
+    asyncio.run(main())
+    # The bulk request was queued first, but waits while a search is queued
+    assert started == ["holder", "interactive", "bulk"]
+
+
+def test_interactive_slot_is_kept_free_of_bulk_requests(clock):
+    limiter = AdaptiveRateLimiter("test", burst=10, max_in_flight=2, interactive_slots=1)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def bulk_request():
+            async with limiter.slot():
+                await release.wait()
+
+        first = asyncio.ensure_future(bulk_request())
+        second = asyncio.ensure_future(bulk_request())
+        await settle()
+        assert limiter.stats()["in_flight"] == 1
+        assert limiter.stats()["waiting_bulk"] == 1
+
+        with interactive():
+            async with limiter.slot():
+                assert limiter.stats()["in_flight"] == 2
+
+        release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(main())
+
+
+def test_breaker_opens_at_threshold_and_probe_closes_or_reopens_it(clock):
+    limiter = AdaptiveRateLimiter("test", burst=10, breaker_threshold=3, cooldown=30)
+
+    async def request():
+        async with limiter.slot() as started:
+            return started
+
+    async def main():
+        for _ in range(2):
+            limiter.failed(await request(), throttled=False)
+        assert not limiter.stats()["circuit_open"]
+        limiter.failed(await request(), throttled=False)
+        assert limiter.stats()["circuit_open"]
+        with pytest.raises(CircuitOpen):
+            await request()
+
+        # After the cooldown one probe goes through; others fail fast meanwhile
+        clock.now += 30
+        async with limiter.slot() as started:
+            with pytest.raises(CircuitOpen, match="probe"):
+                await request()
+        limiter.failed(started, throttled=False)
+        assert limiter.stats()["circuit_open"]
+        with pytest.raises(CircuitOpen):
+            await request()
+
+        clock.now += 30
+        async with limiter.slot():
+            pass
+        limiter.succeeded()
+        assert not limiter.stats()["circuit_open"]
+        await asyncio.gather(request(), request())
+
+    asyncio.run(main())
+
+
+def test_throttling_halves_rate_once_per_wave_and_success_recovers_it(clock):
+    limiter = AdaptiveRateLimiter("test", max_rps=10, min_rps=1, burst=4, breaker_threshold=100)
+
+    async def main():
+        async with limiter.slot() as first:
+            pass
+        async with limiter.slot() as second:
+            pass
+        clock.now += 1
+
+        limiter.failed(first, throttled=True)
+        assert limiter.stats()["rate"] == 5
+        # Started before the cut, so it failed at the old rate
+        limiter.failed(second, throttled=True)
+        assert limiter.stats()["rate"] == 5
+
+        # The cut empties the bucket: the next request waits for a token at the new rate
+        before = clock.now
+        async with limiter.slot() as third:
+            pass
+        assert clock.now - before == pytest.approx(1 / 5)
+
+        limiter.failed(third, throttled=True)
+        clock.now += 1
+        async with limiter.slot() as fourth:
+            pass
+        limiter.failed(fourth, throttled=True)
+        clock.now += 1
+        async with limiter.slot() as fifth:
+            pass
+        limiter.failed(fifth, throttled=True)
+        assert limiter.stats()["rate"] == 1
+
+        # Every success wins back 5% of the maximum rate, up to the maximum
+        for _ in range(10):
+            limiter.succeeded()
+        assert limiter.stats()["rate"] == pytest.approx(6)
+        for _ in range(20):
+            limiter.succeeded()
+        assert limiter.stats()["rate"] == 10
+
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+import asyncio
+
+from qdrant_client import AsyncQdrantClient
+
+import src.core.ingest_controller as controller
+from src.core.search_cache import SearchResultCache
+from src.models.embedding_model import SemanticSearchRequest
+
+from conftest import make_router, segments
+
+
+def test_hit_miss_and_query_normalisation():
+    cache = SearchResultCache()
+    cache.put(cache.make_key("Token  Refresh", "docs", 5, None), "response")
+
+    assert cache.get(cache.make_key("token refresh", "docs", 5, None)) == "response"
+    assert cache.get(cache.make_key("token refresh", "docs", 3, None)) is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_entries_expire_and_are_evicted_least_recently_used_first():
+    expired = SearchResultCache(ttl_seconds=-1)
+    expired.put(expired.make_key("q", "docs", 5, None), "response")
+    assert expired.get(expired.make_key("q", "docs", 5, None)) is None
+
+    cache = SearchResultCache(max_entries=2)
+    keys = [cache.make_key(query, "docs", 5, None) for query in ("a", "b", "c")]
+    cache.put(keys[0], "a")
+    cache.put(keys[1], "b")
+    cache.get(keys[0])
+    cache.put(keys[2], "c")
+    assert [cache.get(key) for key in keys] == ["a", None, "c"]
+
+
+def test_invalidate_drops_only_that_collection():
+    cache = SearchResultCache()
+    docs, other = cache.make_key("q", "docs", 5, None), cache.make_key("q", "other", 5, None)
+    cache.put(docs, "docs")
+    cache.put(other, "other")
+
+    cache.invalidate("docs")
+
+    assert cache.get(cache.make_key("q", "docs", 5, None)) is None
+    assert cache.get(other) == "other"
+    assert cache.generations() == {"docs": 1, "other": 0}
+
+
+def test_results_computed_before_a_write_are_not_stored():
+    cache = SearchResultCache()
+    key = cache.make_key("q", "docs", 5, None)
+    cache.invalidate("docs")  # an ingest lands while the search is running
+    cache.put(key, "stale")
+    assert cache.stats()["entries"] == 0
+
+
+def test_ingesting_invalidates_cached_search_results():
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedders = make_router()
+        request = SemanticSearchRequest(query="rotate the oauth certificate", top_k=5)
+        await controller.ingest_file_to_qdrant(
+            qdrant, embedders, segments("Deploy the gateway proxy."), "gateway.txt", "dev_docs")
+
+        first = await controller.search_collection(qdrant, embedders, request)
+        second = await controller.search_collection(qdrant, embedders, request)
+        assert (first.cached, second.cached) == (False, True)
+
+        await controller.ingest_file_to_qdrant(
+            qdrant, embedders, segments("Rotate the oauth certificate monthly."), "oauth.txt", "dev_docs")
+        third = await controller.search_collection(qdrant, embedders, request)
+
+        assert third.cached is False
+        assert third.results[0].filename == "oauth.txt"
+
+        # A re-upload that changes nothing keeps the cache
+        await controller.ingest_file_to_qdrant(
+            qdrant, embedders, segments("Rotate the oauth certificate monthly."), "oauth.txt", "dev_docs")
+        assert (await controller.search_collection(qdrant, embedders, request)).cached is True
+        await qdrant.close()
+
+    asyncio.run(main())
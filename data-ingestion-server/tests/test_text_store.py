@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from qdrant_client import AsyncQdrantClient
+
+import src.core.ingest_controller as controller
+import src.core.text_store as text_store_module
+from src.core.text_store import TextStore
+from src.models.embedding_model import SemanticSearchRequest
+
+from conftest import FakeEmbedder, make_router, segments
+
+TEXT = "Deploy the gateway proxy.\n\nRotate the oauth certificate monthly."
+
+
+def test_put_get_and_delete_are_scoped_to_the_collection(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_store_module, "LOOKUP_BATCH", 2)
+    store = TextStore(str(tmp_path / "texts.sqlite3"))
+    try:
+        store.put_many("docs", {"a": "alpha", "b": "béta", "c": "gamma"})
+        store.put_many("wiki", {"a": "other alpha"})
+
+        assert store.get_many("docs", ["a", "b", "c", "missing", "a"]) == {"a": "alpha", "b": "béta", "c": "gamma"}
+        store.put_many("docs", {"a": "alpha v2"})
+        store.delete_many("docs", ["b"])
+
+        assert store.get_many("docs", ["a", "b", "c"]) == {"a": "alpha v2", "c": "gamma"}
+        assert store.get_many("wiki", ["a", "b"]) == {"a": "other alpha"}
+        assert store.stats()["entries"] == 3
+    finally:
+        store.close()
+
+
+@pytest.fixture
+def local_text_store(tmp_path, monkeypatch):
+    store = TextStore(str(tmp_path / "texts.sqlite3"))
+    monkeypatch.setattr(text_store_module, "PAYLOAD_TEXT_STORE", "local")
+    monkeypatch.setattr(text_store_module, "_text_store", store)
+    yield store
+    store.close()
+
+
+async def stored(qdrant, collection="dev_docs"):
+    points, _ = await qdrant.scroll(collection, limit=1000, with_payload=True)
+    return points
+
+
+async def search(qdrant, embedders, query="oauth certificate"):
+    return await controller.search_collection(qdrant, embedders, SemanticSearchRequest(query=query, top_k=5))
+
+
+def test_search_hydrates_text_from_the_local_store(local_text_store):
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedders = make_router()
+        await controller.ingest_file_to_qdrant(qdrant, embedders, segments(TEXT), "a.txt", "dev_docs")
+
+        points = await stored(qdrant)
+        assert points and all("text" not in point.payload for point in points)
+        assert local_text_store.get_many("dev_docs", [str(point.id) for point in points])
+
+        response = await search(qdrant, embedders)
+        assert response.results and all(result.text for result in response.results)
+        assert TEXT in [result.text for result in response.results]
+        await qdrant.close()
+
+    asyncio.run(main())
+
+
+def test_lost_texts_are_not_returned_and_reingesting_restores_them(local_text_store):
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedder = FakeEmbedder()
+        embedders = make_router(fake=embedder)
+        await controller.ingest_file_to_qdrant(qdrant, embedders, segments(TEXT), "a.txt", "dev_docs")
+        ids = [str(point.id) for point in await stored(qdrant)]
+
+        local_text_store.delete_many("dev_docs", ids)
+        assert (await search(qdrant, embedders, "gateway proxy")).results == []
+
+        embedder.calls.clear()
+        await controller.ingest_file_to_qdrant(qdrant, embedders, segments(TEXT), "a.txt", "dev_docs")
+        assert embedder.calls, "points without text must not count as stored"
+        assert set(local_text_store.get_many("dev_docs", ids)) == set(ids)
+        assert TEXT in [result.text for result in (await search(qdrant, embedders, "gateway proxy")).results]
+        await qdrant.close()
+
+    asyncio.run(main())
+
+
+def test_switching_back_to_qdrant_reingests_points_without_payload_text(local_text_store, monkeypatch):
+    async def main():
+        qdrant = AsyncQdrantClient(":memory:")
+        embedders = make_router()
+        await controller.ingest_file_to_qdrant(qdrant, embedders, segments(TEXT), "a.txt", "dev_docs")
+
+        monkeypatch.setattr(text_store_module, "PAYLOAD_TEXT_STORE", "qdrant")
+        assert (await search(qdrant, embedders, "gateway proxy")).results == []
+
+        await controller.ingest_file_to_qdrant(qdrant, embedders, segments(TEXT), "a.txt", "dev_docs")
+        assert all(point.payload.get("text") for point in await stored(qdrant))
+        assert TEXT in [result.text for result in (await search(qdrant, embedders, "gateway proxy")).results]
+        await qdrant.close()
+
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+import os
+import math
+import time
+import logging
+import operator
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from nexlify_ai_agentics_server.telemetry import request_headers
+
+NEXLIFY_DATA_INGESTION_SERVICE_BASE_URI = os.getenv("NEXLIFY_DATA_INGESTION_SERVICE_BASE_URI", "http://localhost:7860")
+# Seconds an answer is served from the cache; 0 disables the cache
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", 3600))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 256))
+# Cosine similarity above which a differently worded query reuses a cached answer
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.95))
+ANSWER_CACHE_HTTP_TIMEOUT = float(os.getenv("ANSWER_CACHE_HTTP_TIMEOUT", 5))
+
+logger = logging.getLogger(__name__)
+
+Snapshot = Tuple[str, Tuple[Tuple[str, int], ...]]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+class AnswerLookup(NamedTuple):
+    key: str
+    vector: Optional[Tuple[float, ...]]
+    snapshot: Optional[Snapshot]  # Collection generations the answer must be stored with
+    answer: Optional[str] = None
+    match: Optional[str] = None  # "exact" or "semantic" on a hit
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    snapshot: Snapshot
+    vector: Optional[Tuple[float, ...]]
+    answer: str
+
+
+class AnswerCache:
+    """
+    TTL + LRU cache of crew answers.
+
+    A query hits when its normalised text was answered before, or when its
+    embedding (from the ingestion server) is within ANSWER_CACHE_SIMILARITY of a
+    cached query's. Every entry records the ingestion server's collection
+    generations at the time the crew started, and entries are dropped as soon as
+    those change, so re-ingested content is never answered from stale results.
+    When the ingestion server cannot be reached nothing is served from the cache.
+    """
+
+    def __init__(self, base_uri: str = NEXLIFY_DATA_INGESTION_SERVICE_BASE_URI,
+                 ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS, max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+                 similarity: float = ANSWER_CACHE_SIMILARITY, timeout: float = ANSWER_CACHE_HTTP_TIMEOUT):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._client = httpx.AsyncClient(base_url=base_uri, timeout=timeout)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._counters: Dict[str, int] = {
+            "exact_hits": 0, "semantic_hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    async def lookup(self, query: str) -> AnswerLookup:
+        key = normalize_query(query)
+        if not self.enabled:
+            return AnswerLookup(key, None, None)
+        snapshot = await self._snapshot()
+        if snapshot is None:
+            self._counters["misses"] += 1
+            return AnswerLookup(key, None, None)
+        self._purge(snapshot)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self._counters["exact_hits"] += 1
+            return AnswerLookup(key, entry.vector, snapshot, entry.answer, "exact")
+
+        vector = await self._embed(query)
+        if vector is not None:
+            best_key, best_score = None, self.similarity
+            for entry_key, entry in self._entries.items():
+                if entry.vector is not None:
+                    score = sum(map(operator.mul, vector, entry.vector))
+                    if score >= best_score:
+                        best_key, best_score = entry_key, score
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                self._counters["semantic_hits"] += 1
+                return AnswerLookup(key, vector, snapshot, self._entries[best_key].answer, "semantic")
+
+        self._counters["misses"] += 1
+        return AnswerLookup(key, vector, snapshot)
+
+    def store(self, lookup: AnswerLookup, answer: str) -> None:
+        """Cache the answer computed after `lookup` missed."""
+        if lookup.snapshot is None:
+            return
+        self._entries[lookup.key] = _Entry(
+            time.monotonic() + self.ttl_seconds, lookup.snapshot, lookup.vector, answer)
+        self._entries.move_to_end(lookup.key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        hits = self._counters["exact_hits"] + self._counters["semantic_hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            **self._counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def _purge(self, snapshot: Snapshot) -> None:
+        now = time.monotonic()
+        stale = [key for key, entry in self._entries.items()
+                 if entry.expires_at < now or entry.snapshot != snapshot]
+        for key in stale:
+            if self._entries[key].snapshot != snapshot:
+                self._counters["invalidations"] += 1
+            del self._entries[key]
+
+    async def _snapshot(self) -> Optional[Snapshot]:
+        try:
+            response = await self._client.get("/collections/generations", headers=request_headers())
+            response.raise_for_status()
+            data = response.json()
+            return data["epoch"], tuple(sorted(data["generations"].items()))
+        except Exception as e:
+            logger.warning(f"Could not read collection generations, skipping the answer cache: {e}")
+            return None
+
+    async def _embed(self, query: str) -> Optional[Tuple[float, ...]]:
+        try:
+            response = await self._client.post("/embeddings", json={"text": query}, headers=request_headers())
+            response.raise_for_status()
+            vector: List[float] = response.json()["embedding"]
+        except Exception as e:
+            logger.warning(f"Could not embed the query, only exact answer matches are used: {e}")
+            return None
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return tuple(value / norm for value in vector)
@@ -1,24 +1,153 @@
-from fastapi import FastAPI
+import json
+import time
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from nexlify_ai_agentics_server.crew import NexlifyAiAgenticsServer
+from nexlify_ai_agentics_server.answer_cache import AnswerCache
+from nexlify_ai_agentics_server.crew_pool import CrewOverloaded, CrewPool
+from nexlify_ai_agentics_server.telemetry import (
+    CONTENT_TYPE_LATEST, HTTP_REQUEST_SECONDS, REQUEST_ID_HEADER, new_request_id, render_metrics, request_id, span)
+from nexlify_ai_agentics_server.tools.nexlify_search_tool import close_clients
+
+# Seconds clients are told to wait before retrying an overloaded server
+OVERLOAD_RETRY_AFTER = "10"
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Agents, tasks and crews are built once and copied per request
+    app.state.crews = CrewPool()
+    app.state.answers = AnswerCache()
+    try:
+        yield
+    finally:
+        app.state.crews.close()
+        await app.state.answers.close()
+        await close_clients()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    # The MCP server's request id is kept and forwarded to the ingestion server
+    rid = request.headers.get(REQUEST_ID_HEADER) or new_request_id()
+    token = request_id.set(rid)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_id.reset(token)
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.labels(
+        method=request.method,
+        route=route.path if route is not None else "unmatched",
+        status=str(response.status_code),
+    ).observe(time.perf_counter() - started)
+    response.headers[REQUEST_ID_HEADER] = rid
+    return response
 
-app = FastAPI()
 
 class SearchRequest(BaseModel):
     query: str
 
 class SearchResponse(BaseModel):
     response: str
+    cached: bool = False  # True when answered from the answer cache
 
 ERROR_MESSAGE = "Please check the inputs and try again. If the issue persists, contact support."
 
+
+def get_crews(request: Request) -> CrewPool:
+    return request.app.state.crews
+
+
+def get_answers(request: Request) -> AnswerCache:
+    return request.app.state.answers
+
+
 @app.post("/search", response_model=SearchResponse)
-async def search(request: SearchRequest):
+async def search(request: SearchRequest, crews: CrewPool = Depends(get_crews),
+                 answers: AnswerCache = Depends(get_answers)):
+
+    async with span("answer_cache.lookup"):
+        lookup = await answers.lookup(request.query)
+    if lookup.answer is not None:
+        return SearchResponse(response=lookup.answer, cached=True)
 
     try:
-        output = NexlifyAiAgenticsServer().crew().kickoff(inputs={"query": request.query})
+        result = await crews.kickoff(inputs={"query": request.query})
+    except CrewOverloaded:
+        raise HTTPException(status_code=503, detail="Too many searches in progress, please retry shortly.",
+                            headers={"Retry-After": OVERLOAD_RETRY_AFTER})
     except Exception:
-        output = None
+        result = None
+
+    if result is None:
+        return SearchResponse(response=ERROR_MESSAGE)
+    # Answers built without one of the searches are not worth repeating
+    if result.complete:
+        answers.store(lookup, result.output.raw)
+    return SearchResponse(response=result.output.raw)
+
+
+def sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/search/stream")
+async def search_stream(request: SearchRequest, crews: CrewPool = Depends(get_crews),
+                        answers: AnswerCache = Depends(get_answers)):
+    """
+    Same search as /search, as Server-Sent Events: `task_started`, `task_completed`
+    and `task_failed` while the crew runs, `token` for each piece of the answer as
+    the analyzer writes it, then one `answer` event with the full SearchResponse.
+    `error` replaces `answer` when the search fails.
+    """
+    if crews.overloaded:
+        raise HTTPException(status_code=503, detail="Too many searches in progress, please retry shortly.",
+                            headers={"Retry-After": OVERLOAD_RETRY_AFTER})
+
+    async def events() -> AsyncIterator[str]:
+        async with span("answer_cache.lookup"):
+            lookup = await answers.lookup(request.query)
+        if lookup.answer is not None:
+            yield sse("answer", SearchResponse(response=lookup.answer, cached=True).model_dump())
+            return
+
+        try:
+            async for event, data in crews.stream(inputs={"query": request.query}):
+                if event == "keepalive":
+                    yield ": keepalive\n\n"
+                elif event == "result":
+                    result = data["result"]
+                    if result.complete:
+                        answers.store(lookup, result.output.raw)
+                    yield sse("answer", SearchResponse(response=result.output.raw).model_dump())
+                else:
+                    yield sse(event, data)
+        except CrewOverloaded:
+            yield sse("error", {"detail": "Too many searches in progress, please retry shortly."})
+        except Exception:
+            logger.exception("Streamed search failed")
+            yield sse("error", {"detail": ERROR_MESSAGE})
+
+    # X-Accel-Buffering stops nginx from holding events back
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/search/cache/stats")
+def answer_cache_stats(answers: AnswerCache = Depends(get_answers)):
+    return answers.stats()
+
 
-    response = ERROR_MESSAGE if output is None else output.raw
-    return SearchResponse(response=response)
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE_LATEST)
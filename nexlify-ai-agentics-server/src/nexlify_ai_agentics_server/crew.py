@@ -1,6 +1,7 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 import os
+from typing import Dict
 from crewai.llm import LLM
 from nexlify_ai_agentics_server.tools.nexlify_search_tool import NexlifySearchTool
 from crewai_tools import SerperDevTool
@@ -18,6 +19,8 @@ class NexlifyAiAgenticsServer():
 	tasks_config = 'config/tasks.yaml'
 
 	llm = LLM(model=MODEL, api_key=MODEL_API_KEY, temperature=0.7)
+	# The analyzer streams so /search/stream can relay its answer as it is written
+	analyzer_llm = LLM(model=MODEL, api_key=MODEL_API_KEY, temperature=0.7, stream=True)
 
 	# Initialize the tools
 	web_search_tool = SerperDevTool(
@@ -50,7 +53,7 @@ class NexlifyAiAgenticsServer():
 	def result_analyzer(self) -> Agent:
 		return Agent(
 			config=self.agents_config['result_analyzer'],
-			llm=self.llm,
+			llm=self.analyzer_llm,
 			verbose=True
 		)
 
@@ -74,7 +77,7 @@ class NexlifyAiAgenticsServer():
 	def result_analyzer_task(self) -> Task:
 		return Task(
 			config=self.tasks_config['result_analyzer_task'],
-			llm=self.llm,
+			llm=self.analyzer_llm,
 			context=[
 				self.vector_db_search_task(),
 				self.internet_search_task(),
@@ -92,3 +95,33 @@ class NexlifyAiAgenticsServer():
 			verbose=True,
 			name='NexlifyAiAgenticsServer',
 		)
+
+	def result_analyzer_parallel_task(self) -> Task:
+		"""Analyzer task of the parallel process, not part of crew()."""
+		return Task(
+			config=self.tasks_config['result_analyzer_parallel_task'],
+			name='result_analyzer_task',
+			llm=self.analyzer_llm,
+		)
+
+	def task_crew(self, agent: Agent, task: Task) -> Crew:
+		"""Creates a crew that runs a single task."""
+		return Crew(
+			agents=[agent],
+			tasks=[task],
+			process=Process.sequential,
+			verbose=True,
+			name=f'NexlifyAiAgenticsServer.{task.name}',
+		)
+
+	def templates(self) -> Dict[str, Crew]:
+		"""
+		Crews used to serve requests, built once and copied per request: the full
+		sequential crew, plus the single-task crews of the parallel process.
+		"""
+		return {
+			"sequential": self.crew(),
+			"vector": self.task_crew(self.vector_db_searcher(), self.vector_db_search_task()),
+			"web": self.task_crew(self.internet_searcher(), self.internet_search_task()),
+			"analyzer": self.task_crew(self.result_analyzer(), self.result_analyzer_parallel_task()),
+		}
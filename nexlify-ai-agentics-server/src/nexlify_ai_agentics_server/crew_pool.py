@@ -0,0 +1,194 @@
+import os
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, NamedTuple, Optional, Tuple
+
+from crewai import Crew, CrewOutput
+
+from nexlify_ai_agentics_server.crew import NexlifyAiAgenticsServer
+from nexlify_ai_agentics_server.crew_stream import CrewEventRelay, CrewEvents, StreamEvent
+from nexlify_ai_agentics_server.telemetry import CrewMetrics, span
+
+# "parallel" runs the vector DB and internet searches at the same time and starts
+# the analyzer once both are done (or timed out); "sequential" runs one task after another
+CREW_PROCESS = os.getenv("CREW_PROCESS", "parallel")
+# Seconds each search may take in the parallel process before the analyzer goes without it
+VECTOR_SEARCH_TIMEOUT = float(os.getenv("VECTOR_SEARCH_TIMEOUT", 60))
+WEB_SEARCH_TIMEOUT = float(os.getenv("WEB_SEARCH_TIMEOUT", 90))
+# Threads running crew kickoffs; a parallel request uses two at once, then one
+CREW_WORKERS = int(os.getenv("CREW_WORKERS", 8))
+# Requests admitted at once (running or waiting for a worker); more are rejected.
+# A search thread left running after its timeout counts as one request until it returns
+CREW_MAX_REQUESTS = int(os.getenv("CREW_MAX_REQUESTS", 16))
+# Seconds between keep-alive events of a streamed search, so proxies keep the connection open
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE_SECONDS", 15))
+
+logger = logging.getLogger(__name__)
+
+
+class CrewResult(NamedTuple):
+    output: CrewOutput
+    complete: bool  # False when the analyzer ran without one of the searches
+
+
+class CrewOverloaded(RuntimeError):
+    """Raised when CREW_MAX_REQUESTS requests are already in progress."""
+
+
+class CrewPool:
+    """
+    Serves crew runs from templates built once at startup. Every request runs on
+    copies of the templates, so agents and tasks are not re-parsed from YAML and
+    requests do not share task state. Kickoffs are blocking and run on a bounded
+    thread pool, keeping the event loop free.
+    """
+
+    def __init__(self, process: str = CREW_PROCESS, workers: int = CREW_WORKERS,
+                 max_requests: int = CREW_MAX_REQUESTS):
+        if process not in ("parallel", "sequential"):
+            raise ValueError(f"Unknown crew process: {process}")
+        self.process = process
+        self.max_requests = max_requests
+        self._templates = NexlifyAiAgenticsServer().templates()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crew")
+        self._relay = CrewEventRelay()
+        self._metrics = CrewMetrics()
+        self._in_flight = 0
+        self._abandoned = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def abandoned(self) -> int:
+        """Kickoffs still running on a worker after their request gave up on them."""
+        return self._abandoned
+
+    @property
+    def overloaded(self) -> bool:
+        return self._in_flight + self._abandoned >= self.max_requests
+
+    async def kickoff(self, inputs: Dict[str, Any], events: Optional[CrewEvents] = None) -> CrewResult:
+        """Runs the crew with the configured process, or raises CrewOverloaded."""
+        if self.overloaded:
+            raise CrewOverloaded(f"{self._in_flight} requests already in progress, "
+                                 f"{self._abandoned} timed-out searches still running")
+        self._in_flight += 1
+        try:
+            if self.process == "parallel":
+                return await self.kickoff_parallel(inputs, events)
+            return CrewResult(await self._run("sequential", inputs, events), complete=True)
+        finally:
+            self._in_flight -= 1
+
+    async def stream(self, inputs: Dict[str, Any],
+                     keepalive: float = STREAM_KEEPALIVE_SECONDS) -> AsyncIterator[StreamEvent]:
+        """
+        Runs the crew like `kickoff`, yielding task progress and the answer's tokens
+        while it runs, then a final ("result", {"result": CrewResult}) event.
+        Yields ("keepalive", {}) when nothing happened for `keepalive` seconds.
+        """
+        events = CrewEvents(asyncio.get_running_loop())
+        run = asyncio.ensure_future(self.kickoff(inputs, events))
+        try:
+            while True:
+                get = asyncio.ensure_future(events.queue.get())
+                await asyncio.wait({get, run}, timeout=keepalive, return_when=asyncio.FIRST_COMPLETED)
+                if get.done():
+                    yield get.result()
+                    continue
+                get.cancel()
+                if run.done():
+                    break
+                yield "keepalive", {}
+            # Thread-safe puts scheduled before the run finished are already queued
+            while not events.queue.empty():
+                yield events.queue.get_nowait()
+            yield "result", {"result": run.result()}
+        finally:
+            run.cancel()
+
+    async def kickoff_parallel(self, inputs: Dict[str, Any], events: Optional[CrewEvents] = None) -> CrewResult:
+        """
+        Runs both searches concurrently, each under its own timeout, then the
+        analyzer on whatever they returned. Latency is roughly the slower search
+        plus the analyzer instead of the sum of all three tasks.
+        """
+        (vector_results, vector_ok), (web_results, web_ok) = await asyncio.gather(
+            self._retrieve("vector database", "vector", inputs, VECTOR_SEARCH_TIMEOUT, events),
+            self._retrieve("internet", "web", inputs, WEB_SEARCH_TIMEOUT, events),
+        )
+        output = await self._run(
+            "analyzer", {**inputs, "vector_results": vector_results, "web_results": web_results}, events)
+        return CrewResult(output, complete=vector_ok and web_ok)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, template: str, inputs: Dict[str, Any], events: Optional[CrewEvents] = None,
+                   timeout: Optional[float] = None) -> CrewOutput:
+        crew: Crew = self._templates[template].copy()
+        if events is None:
+            return await self._kickoff(template, crew, inputs, timeout)
+
+        # The last task of the sequential and analyzer crews writes the answer
+        if template in ("sequential", "analyzer"):
+            events.stream_answer_of(crew.tasks[-1])
+        self._relay.watch(crew.tasks, events)
+        try:
+            return await self._kickoff(template, crew, inputs, timeout)
+        finally:
+            self._relay.forget(crew.tasks)
+
+    async def _kickoff(self, template: str, crew: Crew, inputs: Dict[str, Any],
+                       timeout: Optional[float] = None) -> CrewOutput:
+        """
+        Runs `crew.kickoff` on a worker thread. `timeout` starts once a worker picks
+        the kickoff up, so time spent queued behind other requests does not count.
+        """
+        # The worker thread runs in the request's context, so tools and event handlers see its request id
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+
+        def work() -> CrewOutput:
+            loop.call_soon_threadsafe(_resolve, started)
+            return context.run(crew.kickoff, inputs=inputs)
+
+        job = self._executor.submit(work)
+        result = asyncio.wrap_future(job)
+        try:
+            async with span(f"crew.{template}"):
+                # `result` finishes first only when the pool shut down before the job started
+                await asyncio.wait({started, result}, return_when=asyncio.FIRST_COMPLETED)
+                return await asyncio.wait_for(result, timeout)
+        finally:
+            # A queued job is dropped; a running one cannot be interrupted and
+            # holds capacity until its kickoff returns
+            if not job.done() and not job.cancel():
+                self._abandoned += 1
+                job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release_abandoned))
+
+    def _release_abandoned(self) -> None:
+        self._abandoned -= 1
+
+    async def _retrieve(self, source: str, template: str, inputs: Dict[str, Any],
+                        timeout: float, events: Optional[CrewEvents] = None) -> Tuple[str, bool]:
+        try:
+            output = await self._run(template, inputs, events, timeout)
+            return output.raw, True
+        except asyncio.TimeoutError:
+            # The late result of the still-running kickoff is discarded
+            logger.warning(f"The {source} search timed out after {timeout:.0f}s")
+            return f"No {source} results: the search timed out.", False
+        except Exception:
+            logger.exception(f"The {source} search failed")
+            return f"No {source} results: the search failed.", False
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
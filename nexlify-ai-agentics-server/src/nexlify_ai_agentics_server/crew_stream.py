@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from crewai import Task
+from crewai.utilities.events import (
+    LLMStreamChunkEvent,
+    TaskCompletedEvent,
+    TaskFailedEvent,
+    TaskStartedEvent,
+    crewai_event_bus,
+)
+
+# The analyzer writes "Thought: ..." before its answer; only what follows this is streamed
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+StreamEvent = Tuple[str, Dict[str, Any]]
+
+
+def _task_label(task: Task) -> str:
+    return task.name or task.description.strip().splitlines()[0]
+
+
+class CrewEvents:
+    """
+    Events of one request's crew runs, delivered to an asyncio queue.
+
+    Task progress is reported for every watched task; LLM tokens only for the task
+    that writes the answer, starting after its FINAL_ANSWER_MARKER.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.queue: "asyncio.Queue[StreamEvent]" = asyncio.Queue()
+        self._loop = loop
+        self._answer_tasks: Set[str] = set()
+        self._pending: Dict[str, str] = {}  # Chunks of an answer task before the marker
+
+    def put(self, event: str, data: Dict[str, Any]) -> None:
+        # Called from crew worker threads
+        self._loop.call_soon_threadsafe(self.queue.put_nowait, (event, data))
+
+    def stream_answer_of(self, task: Task) -> None:
+        self._answer_tasks.add(str(task.id))
+
+    def on_chunk(self, task_id: str, chunk: str) -> None:
+        if task_id not in self._answer_tasks:
+            return
+        pending = self._pending.get(task_id)
+        if pending is None:
+            self.put("token", {"text": chunk})
+            return
+        pending += chunk
+        start = pending.find(FINAL_ANSWER_MARKER)
+        if start < 0:
+            self._pending[task_id] = pending
+            return
+        del self._pending[task_id]
+        text = pending[start + len(FINAL_ANSWER_MARKER):].lstrip()
+        if text:
+            self.put("token", {"text": text})
+
+    def on_task_started(self, task_id: str) -> None:
+        if task_id in self._answer_tasks:
+            self._pending[task_id] = ""
+
+
+class CrewEventRelay:
+    """
+    Routes crewai events to the CrewEvents of the request that owns the task.
+
+    The crewai event bus is process-wide and its handlers run on the thread that
+    emits the event, so handlers are registered once and look the task up here.
+    Crews are copied per request, and every copy has fresh task ids.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, CrewEvents] = {}
+        crewai_event_bus.register_handler(TaskStartedEvent, self._on_task_started)
+        crewai_event_bus.register_handler(TaskCompletedEvent, self._on_task_completed)
+        crewai_event_bus.register_handler(TaskFailedEvent, self._on_task_failed)
+        crewai_event_bus.register_handler(LLMStreamChunkEvent, self._on_chunk)
+
+    def watch(self, tasks: Iterable[Task], events: CrewEvents) -> None:
+        with self._lock:
+            for task in tasks:
+                self._tasks[str(task.id)] = events
+
+    def forget(self, tasks: Iterable[Task]) -> None:
+        with self._lock:
+            for task in tasks:
+                self._tasks.pop(str(task.id), None)
+
+    def _events_of(self, task: Optional[Any]) -> Optional[CrewEvents]:
+        if task is None:
+            return None
+        with self._lock:
+            return self._tasks.get(str(task.id))
+
+    def _on_task_started(self, source: Any, event: TaskStartedEvent) -> None:
+        events = self._events_of(event.task)
+        if events is not None:
+            events.on_task_started(str(event.task.id))
+            events.put("task_started", {"task": _task_label(event.task), "agent": event.task.agent.role.strip()})
+
+    def _on_task_completed(self, source: Any, event: TaskCompletedEvent) -> None:
+        events = self._events_of(event.task)
+        if events is not None:
+            events.put("task_completed", {"task": _task_label(event.task)})
+
+    def _on_task_failed(self, source: Any, event: TaskFailedEvent) -> None:
+        events = self._events_of(event.task)
+        if events is not None:
+            events.put("task_failed", {"task": _task_label(event.task), "error": event.error})
+
+    def _on_chunk(self, source: Any, event: LLMStreamChunkEvent) -> None:
+        if event.task_id is None or event.tool_call is not None:
+            return
+        with self._lock:
+            events = self._tasks.get(str(event.task_id))
+        if events is not None:
+            events.on_chunk(str(event.task_id), event.chunk)
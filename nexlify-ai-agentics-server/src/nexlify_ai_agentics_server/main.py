@@ -2,8 +2,10 @@
 import sys
 import warnings
 import os
+import asyncio
 
 from nexlify_ai_agentics_server.crew import NexlifyAiAgenticsServer
+from nexlify_ai_agentics_server.crew_pool import CrewPool
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -19,7 +21,11 @@ def run():
     inputs = {
         'query': 'AI LLMs'
     }
-    NexlifyAiAgenticsServer().crew().kickoff(inputs=inputs)
+    crews = CrewPool()
+    try:
+        asyncio.run(crews.kickoff(inputs=inputs))
+    finally:
+        crews.close()
 
 
 def train():
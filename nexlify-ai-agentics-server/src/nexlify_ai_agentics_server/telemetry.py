@@ -0,0 +1,165 @@
+import os
+import time
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from uuid import uuid4
+
+from crewai.utilities.events import (
+    LLMCallCompletedEvent,
+    LLMCallFailedEvent,
+    LLMCallStartedEvent,
+    TaskCompletedEvent,
+    TaskFailedEvent,
+    ToolUsageErrorEvent,
+    ToolUsageFinishedEvent,
+    ToolUsageStartedEvent,
+    crewai_event_bus,
+)
+from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+
+# Header carrying the request id from the MCP server, through here, to the ingestion server
+REQUEST_ID_HEADER = "X-Request-ID"
+# Log every finished span with its request id, parent and duration (off by default)
+TRACE_SPANS = os.getenv("TRACE_SPANS", "false").lower() == "true"
+
+# Seconds; covers a cached lookup up to a slow crew task
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+_current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+
+logger = logging.getLogger("trace")
+logger.setLevel(logging.INFO if TRACE_SPANS else logging.WARNING)
+
+
+def new_request_id() -> str:
+    return uuid4().hex
+
+
+def request_headers() -> Dict[str, str]:
+    """Headers forwarding the current request id to the ingestion server."""
+    return {REQUEST_ID_HEADER: request_id.get()}
+
+
+STAGE_SECONDS = Histogram(
+    "nexlify_stage_seconds", "Time spent in each crew task, tool call, LLM call and cache lookup.",
+    ("stage", "status"), buckets=DEFAULT_BUCKETS)
+HTTP_REQUEST_SECONDS = Histogram(
+    "nexlify_http_request_seconds", "Time to answer HTTP requests, until the response headers.",
+    ("method", "route", "status"), buckets=DEFAULT_BUCKETS)
+
+
+def render_metrics() -> str:
+    """All metrics of the default registry in the Prometheus text exposition format."""
+    return generate_latest().decode("utf-8")
+
+
+class span:
+    """
+    Times a stage, as `with span("crew.vector"):` or `async with span("crew.vector"):`.
+
+    The duration goes to STAGE_SECONDS, labelled with the stage and whether it
+    raised, and is logged with the request id and the enclosing span, so one
+    request's stages can be followed across the log.
+    """
+
+    def __init__(self, stage: str, **attributes):
+        self.stage = stage
+        self.attributes = attributes
+
+    def __enter__(self) -> "span":
+        self._parent = _current_span.get()
+        self._token = _current_span.set(self.stage)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        status = "ok" if exc_type is None else "error"
+        STAGE_SECONDS.labels(stage=self.stage, status=status).observe(duration)
+        if logger.isEnabledFor(logging.INFO):
+            attributes = "".join(f" {key}={value}" for key, value in self.attributes.items())
+            logger.info(f"span={self.stage} request_id={request_id.get()} parent={self._parent or '-'} "
+                        f"status={status} seconds={duration:.4f}{attributes}")
+
+    async def __aenter__(self) -> "span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+
+def observe_stage(stage: str, seconds: float, status: str = "ok") -> None:
+    """Records a stage timed elsewhere, e.g. in a worker process."""
+    STAGE_SECONDS.labels(stage=stage, status=status).observe(seconds)
+
+
+def _slug(name: str) -> str:
+    return "_".join(name.lower().split())
+
+
+class CrewMetrics:
+    """
+    Times crew tasks, tool calls and LLM calls from crewai events.
+
+    Handlers run on the crew worker thread that emits the event, which runs in
+    the context of the request that started the crew, so spans are logged with
+    its request id. Tool and LLM calls are synchronous on that thread, so their
+    start times are kept per thread.
+    """
+
+    def __init__(self):
+        self._started: Dict[Tuple[int, str], float] = {}
+        self._lock = threading.Lock()
+        crewai_event_bus.register_handler(TaskCompletedEvent, self._on_task_finished)
+        crewai_event_bus.register_handler(TaskFailedEvent, self._on_task_finished)
+        crewai_event_bus.register_handler(ToolUsageStartedEvent, self._on_tool_started)
+        crewai_event_bus.register_handler(ToolUsageFinishedEvent, self._on_tool_finished)
+        crewai_event_bus.register_handler(ToolUsageErrorEvent, self._on_tool_finished)
+        crewai_event_bus.register_handler(LLMCallStartedEvent, self._on_llm_started)
+        crewai_event_bus.register_handler(LLMCallCompletedEvent, self._on_llm_finished)
+        crewai_event_bus.register_handler(LLMCallFailedEvent, self._on_llm_finished)
+
+    def _start(self, key: str) -> None:
+        with self._lock:
+            self._started[(threading.get_ident(), key)] = time.perf_counter()
+
+    def _finish(self, key: str) -> Optional[float]:
+        with self._lock:
+            started = self._started.pop((threading.get_ident(), key), None)
+        return None if started is None else time.perf_counter() - started
+
+    def _record(self, stage: str, seconds: Optional[float], failed: bool, **attributes) -> None:
+        if seconds is None:
+            return
+        status = "error" if failed else "ok"
+        STAGE_SECONDS.labels(stage=stage, status=status).observe(seconds)
+        if logger.isEnabledFor(logging.INFO):
+            details = "".join(f" {key}={value}" for key, value in attributes.items())
+            logger.info(f"span={stage} request_id={request_id.get()} status={status} seconds={seconds:.4f}{details}")
+
+    def _on_task_finished(self, source, event) -> None:
+        task = event.task
+        if task is not None:
+            self._record("task." + _slug(task.name or "unnamed"), task.execution_duration,
+                         isinstance(event, TaskFailedEvent))
+
+    def _on_tool_started(self, source, event: ToolUsageStartedEvent) -> None:
+        self._start(f"tool:{event.tool_name}")
+
+    def _on_tool_finished(self, source, event) -> None:
+        seconds = self._finish(f"tool:{event.tool_name}")
+        if isinstance(event, ToolUsageFinishedEvent):
+            seconds = (event.finished_at - event.started_at).total_seconds()
+        self._record("tool." + _slug(event.tool_name), seconds,
+                     isinstance(event, ToolUsageErrorEvent), cached=getattr(event, "from_cache", False))
+
+    def _on_llm_started(self, source, event: LLMCallStartedEvent) -> None:
+        self._start("llm")
+
+    def _on_llm_finished(self, source, event) -> None:
+        self._record("llm.call", self._finish("llm"), isinstance(event, LLMCallFailedEvent),
+                     agent=_slug(event.agent_role or "none"))
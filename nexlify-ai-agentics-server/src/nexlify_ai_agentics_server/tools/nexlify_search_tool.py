@@ -1,19 +1,76 @@
 from crewai.tools import BaseTool
-from typing import Type, Any
+from typing import Type, Any, Dict, Optional
 from pydantic import BaseModel, Field
 import httpx
 import os
+import asyncio
+import threading
+import weakref
 from dotenv import load_dotenv
 import logging
+from nexlify_ai_agentics_server.telemetry import request_headers
 
 load_dotenv()
 
 NEXLIFY_DATA_INGESTION_SERVICE_BASE_URI = os.getenv("NEXLIFY_DATA_INGESTION_SERVICE_BASE_URI", "http://localhost:7860")  # Default to localhost if not set
-MCP_TIMEOUT = os.getenv("MCP_TIMEOUT", "500")  # Default timeout of 500 milliseconds if not set
+# Timeouts in seconds; MCP_TIMEOUT is still honoured as the read timeout
+NEXLIFY_SEARCH_CONNECT_TIMEOUT = float(os.getenv("NEXLIFY_SEARCH_CONNECT_TIMEOUT", 5))
+NEXLIFY_SEARCH_READ_TIMEOUT = float(os.getenv("NEXLIFY_SEARCH_READ_TIMEOUT", os.getenv("MCP_TIMEOUT", 30)))
+# Connections kept open to the data ingestion server, shared by all crew runs
+NEXLIFY_SEARCH_MAX_CONNECTIONS = int(os.getenv("NEXLIFY_SEARCH_MAX_CONNECTIONS", 32))
+NEXLIFY_SEARCH_MAX_KEEPALIVE = int(os.getenv("NEXLIFY_SEARCH_MAX_KEEPALIVE", 16))
+# Collections searched, as a comma-separated list or "all"; results from several
+# collections come back as one ranking from a single request
+NEXLIFY_SEARCH_COLLECTIONS = os.getenv("NEXLIFY_SEARCH_COLLECTIONS", "dev_docs")
 USER_AGENT = os.getenv("USER_AGENT", "NexlifySearchTool/1.0")
 DEFAULT_ERROR_MESSAGE = "Please check the inputs and try again. If the issue persists, contact support."
 NO_INFO_MESSAGE = "No information found for the given query."
 
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+# An AsyncClient's connections belong to the event loop that opened them
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _client_options() -> Dict[str, Any]:
+    return {
+        "base_url": NEXLIFY_DATA_INGESTION_SERVICE_BASE_URI,
+        "headers": {"User-Agent": USER_AGENT},
+        "timeout": httpx.Timeout(NEXLIFY_SEARCH_READ_TIMEOUT, connect=NEXLIFY_SEARCH_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(max_connections=NEXLIFY_SEARCH_MAX_CONNECTIONS,
+                               max_keepalive_connections=NEXLIFY_SEARCH_MAX_KEEPALIVE),
+    }
+
+
+def get_client() -> httpx.Client:
+    """Process-wide pooled client; crew worker threads share its keep-alive connections."""
+    global _client
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(**_client_options())
+        return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Pooled client of the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _async_clients[loop] = httpx.AsyncClient(**_client_options())
+    return client
+
+
+async def close_clients() -> None:
+    """Closes the shared client and the running loop's async client."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+    async_client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if async_client is not None:
+        await async_client.aclose()
+
 
 class NexlifySearchToolInput(BaseModel):
     """Input schema for NexlifySearchTool."""
@@ -27,26 +84,37 @@ class NexlifySearchTool(BaseTool):
     args_schema: Type[BaseModel] = NexlifySearchToolInput
 
     def _run(self, query: str) -> Any:
-        # Implementation of the search functionality goes here
-        return self.__nexlify_search(query)
+        try:
+            res = get_client().post("/search", json=self.__request_body(query), headers=request_headers())
+            return self.__search_results(res.json())
+        except Exception as e:
+            logging.error(f"An unexpected error occurred: {str(e)}")
+            return DEFAULT_ERROR_MESSAGE
+
+    async def _arun(self, query: str) -> Any:
+        try:
+            res = await get_async_client().post("/search", json=self.__request_body(query),
+                                                headers=request_headers())
+            return self.__search_results(res.json())
+        except Exception as e:
+            logging.error(f"An unexpected error occurred: {str(e)}")
+            return DEFAULT_ERROR_MESSAGE
 
+    def __request_body(self, query: str) -> dict:
+        collections = [name.strip() for name in NEXLIFY_SEARCH_COLLECTIONS.split(",") if name.strip()]
+        body = {"query": query, "top_k": 3}
+        if collections:
+            # Without one the ingestion server searches its default collection
+            body["collection"] = collections[0] if len(collections) == 1 else collections
+        return body
 
-    def __nexlify_search(self, query: str) -> list | str:
-        """    Search confluence pages using the Nexlify API.
+    def __search_results(self, res: dict) -> list | str:
+        """    Extracts the results of a Nexlify search API response.
         Args:
-            query (str): The search query.
+            res (dict): The response body.
         Returns:
             list | str: The search results.
         """
-        search_results = NO_INFO_MESSAGE
-        request_body = {"query": query, "top_k": 3}
-        try:
-            # Make a POST request to the Nexlify search API
-            res = httpx.post(f"{NEXLIFY_DATA_INGESTION_SERVICE_BASE_URI}/search", json=request_body, headers={"User-Agent": USER_AGENT}, timeout=int(MCP_TIMEOUT)).json()
-            if res.get("results") is not None:
-                search_results = res["results"]
-        except Exception as e:
-            logging.error(f"An unexpected error occurred: {str(e)}")
-            search_results = DEFAULT_ERROR_MESSAGE
-
-        return search_results
\ No newline at end of file
+        if res.get("results") is not None:
+            return res["results"]
+        return NO_INFO_MESSAGE
@@ -0,0 +1,5 @@
+import os
+
+# crew.py builds its LLMs from these at import time
+os.environ.setdefault("MODEL", "gemini/gemini-1.5-flash")
+os.environ.setdefault("MODEL_API_KEY", "test-key")
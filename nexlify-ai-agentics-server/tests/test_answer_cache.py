@@ -0,0 +1,137 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from nexlify_ai_agentics_server import answer_cache
+from nexlify_ai_agentics_server.answer_cache import AnswerCache
+
+
+class FakeIngestionServer:
+    """Answers the cache's /collections/generations and /embeddings requests."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.generations = {"dev_docs": 1}
+        self.embedded = []
+        self.down = False
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.down:
+            return httpx.Response(503)
+        if request.url.path == "/collections/generations":
+            return httpx.Response(200, json={"epoch": "e1", "generations": self.generations})
+        if request.url.path == "/embeddings":
+            text = json.loads(request.content)["text"]
+            self.embedded.append(text)
+            return httpx.Response(200, json={"embedding": self.embeddings[text]})
+        return httpx.Response(404)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(answer_cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def make_cache(server, **kwargs) -> AnswerCache:
+    cache = AnswerCache(base_uri="http://ingestion", **kwargs)
+    cache._client = httpx.AsyncClient(base_url="http://ingestion", transport=httpx.MockTransport(server.handle))
+    return cache
+
+
+async def ask(cache: AnswerCache, query: str, answer: str):
+    """Look the query up and, on a miss, cache `answer` as the crew would."""
+    lookup = await cache.lookup(query)
+    if lookup.answer is None:
+        cache.store(lookup, answer)
+    return lookup
+
+
+EMBEDDINGS = {
+    "How do I deploy?": [1.0, 0.0, 0.0],
+    "how can i deploy": [0.99, 0.1, 0.0],
+    "What is the refund policy?": [0.0, 1.0, 0.0],
+}
+
+
+def test_exact_and_semantic_hits(clock):
+    server = FakeIngestionServer(EMBEDDINGS)
+    cache = make_cache(server, ttl_seconds=60, similarity=0.95)
+
+    async def main():
+        first = await ask(cache, "How do I deploy?", "Run make deploy.")
+        # Same text up to case and spacing: answered without embedding the query
+        exact = await ask(cache, "  how do I   DEPLOY? ", "unused")
+        semantic = await ask(cache, "how can i deploy", "unused")
+        other = await ask(cache, "What is the refund policy?", "30 days.")
+        await cache.close()
+        return first, exact, semantic, other
+
+    first, exact, semantic, other = asyncio.run(main())
+    assert (first.answer, first.match) == (None, None)
+    assert (exact.answer, exact.match) == ("Run make deploy.", "exact")
+    assert (semantic.answer, semantic.match) == ("Run make deploy.", "semantic")
+    assert (other.answer, other.match) == (None, None)
+    assert server.embedded == ["How do I deploy?", "how can i deploy", "What is the refund policy?"]
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 2)
+
+
+def test_answers_expire_after_the_ttl(clock):
+    cache = make_cache(FakeIngestionServer(EMBEDDINGS), ttl_seconds=60)
+
+    async def main():
+        await ask(cache, "How do I deploy?", "Run make deploy.")
+        clock.now += 59
+        fresh = await cache.lookup("How do I deploy?")
+        clock.now += 2
+        expired = await cache.lookup("How do I deploy?")
+        await cache.close()
+        return fresh, expired
+
+    fresh, expired = asyncio.run(main())
+    assert fresh.match == "exact"
+    assert expired.answer is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_changed_generations_invalidate_cached_answers(clock):
+    server = FakeIngestionServer(EMBEDDINGS)
+    cache = make_cache(server, ttl_seconds=60)
+
+    async def main():
+        await ask(cache, "How do I deploy?", "Run make deploy.")
+        before = await cache.lookup("How do I deploy?")
+        # A re-ingestion bumps the collection's generation
+        server.generations = {"dev_docs": 2}
+        after = await ask(cache, "how can i deploy", "Run make release.")
+        again = await cache.lookup("how can i deploy")
+        await cache.close()
+        return before, after, again
+
+    before, after, again = asyncio.run(main())
+    assert before.match == "exact"
+    # Neither an exact nor a semantic match survives the change
+    assert after.answer is None
+    assert (again.answer, again.match) == ("Run make release.", "exact")
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_nothing_is_served_or_stored_when_the_ingestion_server_is_down(clock):
+    server = FakeIngestionServer(EMBEDDINGS)
+    cache = make_cache(server, ttl_seconds=60)
+
+    async def main():
+        await ask(cache, "How do I deploy?", "Run make deploy.")
+        server.down = True
+        down = await ask(cache, "How do I deploy?", "stale")
+        await cache.close()
+        return down
+
+    down = asyncio.run(main())
+    assert down.answer is None and down.snapshot is None
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from nexlify_ai_agentics_server import crew_pool
+from nexlify_ai_agentics_server.crew_pool import CrewOverloaded, CrewPool
+
+
+class FakeCrew:
+    """Stands in for a crew template; `kickoff` blocks until `release` is set."""
+
+    def __init__(self, name, seconds=0.0, release=None):
+        self.name = name
+        self.seconds = seconds
+        self.release = release
+        self.tasks = []
+        self.kickoffs = 0
+
+    def copy(self):
+        return self
+
+    def kickoff(self, inputs):
+        self.kickoffs += 1
+        if self.release is not None:
+            self.release.wait(5)
+        time.sleep(self.seconds)
+        return SimpleNamespace(raw=f"{self.name} for {inputs['query']}")
+
+
+def make_pool(monkeypatch, templates, **kwargs):
+    server = SimpleNamespace(templates=lambda: {crew.name: crew for crew in templates})
+    monkeypatch.setattr(crew_pool, "NexlifyAiAgenticsServer", lambda: server)
+    return CrewPool(**kwargs)
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def test_search_timeout_does_not_count_time_queued_for_a_worker(monkeypatch):
+    release = threading.Event()
+    blocker = FakeCrew("sequential", release=release)
+    vector = FakeCrew("vector", seconds=0.05)
+    pool = make_pool(monkeypatch, [blocker, vector], process="sequential", workers=1)
+
+    async def main():
+        busy = asyncio.ensure_future(pool._run("sequential", {"query": "q"}))
+        await wait_for(lambda: blocker.kickoffs == 1)
+        search = asyncio.ensure_future(pool._retrieve("vector database", "vector", {"query": "q"}, 0.2))
+        # Queued longer than its timeout, but the search itself is fast
+        await asyncio.sleep(0.3)
+        release.set()
+        await busy
+        return await search
+
+    try:
+        assert asyncio.run(main()) == ("vector for q", True)
+    finally:
+        pool.close()
+
+
+def test_timed_out_search_holds_capacity_until_its_thread_returns(monkeypatch):
+    monkeypatch.setattr(crew_pool, "VECTOR_SEARCH_TIMEOUT", 0.05)
+    release = threading.Event()
+    templates = [FakeCrew("vector", release=release), FakeCrew("web"), FakeCrew("analyzer")]
+    pool = make_pool(monkeypatch, templates, process="parallel", workers=4, max_requests=1)
+
+    async def main():
+        result = await pool.kickoff({"query": "q"})
+        assert not result.complete
+        assert result.output.raw == "analyzer for q"
+        assert (pool.in_flight, pool.abandoned) == (0, 1)
+        assert pool.overloaded
+        with pytest.raises(CrewOverloaded):
+            await pool.kickoff({"query": "q"})
+
+        release.set()
+        await wait_for(lambda: pool.abandoned == 0)
+        assert not pool.overloaded
+
+    try:
+        asyncio.run(main())
+    finally:
+        release.set()
+        pool.close()
+
+
+def test_cancelled_request_drops_its_queued_kickoff(monkeypatch):
+    release = threading.Event()
+    blocker = FakeCrew("sequential", release=release)
+    analyzer = FakeCrew("analyzer")
+    pool = make_pool(monkeypatch, [blocker, analyzer], process="sequential", workers=1)
+
+    async def main():
+        busy = asyncio.ensure_future(pool._run("sequential", {"query": "q"}))
+        await wait_for(lambda: blocker.kickoffs == 1)
+        queued = asyncio.ensure_future(pool._run("analyzer", {"query": "q"}))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        release.set()
+        await busy
+        await asyncio.sleep(0.05)
+
+    try:
+        asyncio.run(main())
+        assert analyzer.kickoffs == 0
+        assert pool.abandoned == 0
+    finally:
+        pool.close()
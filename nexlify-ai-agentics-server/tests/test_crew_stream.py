@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.events import (
+    LLMStreamChunkEvent,
+    TaskCompletedEvent,
+    TaskFailedEvent,
+    TaskStartedEvent,
+    crewai_event_bus,
+)
+from fastapi.testclient import TestClient
+
+from nexlify_ai_agentics_server import crew_pool
+from nexlify_ai_agentics_server.answer_cache import AnswerCache
+from nexlify_ai_agentics_server.app import app, get_answers, get_crews
+from nexlify_ai_agentics_server.crew_pool import CrewPool
+from test_crew_pool import wait_for
+
+
+@pytest.fixture(autouse=True)
+def event_bus():
+    # Only the relays created by the test see its events, not crewai's own listeners
+    with crewai_event_bus.scoped_handlers():
+        yield
+
+
+class StreamingCrew:
+    """
+    Stands in for the sequential crew: emits the crewai events of one task writing
+    `chunks`, then fails if `error` is set. Waits for `release` after starting.
+    """
+
+    def __init__(self, chunks, error=None, release=None):
+        self.chunks = chunks
+        self.error = error
+        self.release = release
+        self.task = SimpleNamespace(
+            id=uuid.uuid4(), name="analyze", description="Analyze the results", agent=SimpleNamespace(role="Analyst "))
+        self.tasks = [self.task]
+        self.finished = threading.Event()
+
+    def copy(self):
+        return self
+
+    def kickoff(self, inputs):
+        try:
+            crewai_event_bus.emit(self.task, TaskStartedEvent(context="", task=self.task))
+            if self.release is not None:
+                self.release.wait(5)
+            for chunk in self.chunks:
+                crewai_event_bus.emit(self.task, LLMStreamChunkEvent(chunk=chunk, task_id=str(self.task.id)))
+            answer = "".join(self.chunks).split("Final Answer:")[-1].strip()
+            if self.error is not None:
+                crewai_event_bus.emit(self.task, TaskFailedEvent(error=self.error, task=self.task))
+                raise RuntimeError(self.error)
+            output = TaskOutput(description=self.task.description, raw=answer, agent="Analyst")
+            crewai_event_bus.emit(self.task, TaskCompletedEvent(output=output, task=self.task))
+            return SimpleNamespace(raw=answer)
+        finally:
+            self.finished.set()
+
+
+def make_pool(monkeypatch, crew) -> CrewPool:
+    server = SimpleNamespace(templates=lambda: {"sequential": crew})
+    monkeypatch.setattr(crew_pool, "NexlifyAiAgenticsServer", lambda: server)
+    return CrewPool(process="sequential", workers=2)
+
+
+async def collect(pool, keepalive=15.0):
+    events = []
+    try:
+        async for event in pool.stream({"query": "q"}, keepalive=keepalive):
+            events.append(event)
+    except RuntimeError as e:
+        events.append(("raised", {"error": str(e)}))
+    return events
+
+
+def test_stream_yields_progress_then_answer_tokens_then_the_result(monkeypatch):
+    crew = StreamingCrew(["Thought: I know", " it.\nFinal Ans", "wer: Use ", "make", " deploy."])
+    pool = make_pool(monkeypatch, crew)
+
+    try:
+        events = asyncio.run(collect(pool))
+    finally:
+        pool.close()
+    # Everything before the final answer marker is the analyzer's reasoning and not streamed
+    assert events[:-1] == [
+        ("task_started", {"task": "analyze", "agent": "Analyst"}),
+        ("token", {"text": "Use "}),
+        ("token", {"text": "make"}),
+        ("token", {"text": " deploy."}),
+        ("task_completed", {"task": "analyze"}),
+    ]
+    event, data = events[-1]
+    assert event == "result"
+    assert data["result"].output.raw == "Use make deploy." and data["result"].complete
+
+
+def test_failed_crew_streams_its_events_before_raising(monkeypatch):
+    crew = StreamingCrew(["Final Answer: partial"], error="model unavailable")
+    pool = make_pool(monkeypatch, crew)
+
+    try:
+        events = asyncio.run(collect(pool))
+    finally:
+        pool.close()
+    assert events == [
+        ("task_started", {"task": "analyze", "agent": "Analyst"}),
+        ("token", {"text": "partial"}),
+        ("task_failed", {"task": "analyze", "error": "model unavailable"}),
+        ("raised", {"error": "model unavailable"}),
+    ]
+
+
+def test_keepalives_are_sent_while_the_crew_is_quiet(monkeypatch):
+    release = threading.Event()
+    crew = StreamingCrew(["Final Answer: done"], release=release)
+    pool = make_pool(monkeypatch, crew)
+    threading.Timer(0.3, release.set).start()
+
+    try:
+        events = asyncio.run(collect(pool, keepalive=0.05))
+    finally:
+        release.set()
+        pool.close()
+    names = [event for event, _ in events]
+    assert names[0] == "task_started" and names[-1] == "result"
+    assert "keepalive" in names[1:names.index("token")]
+
+
+def test_disconnected_client_stops_receiving_and_releases_the_request(monkeypatch):
+    release = threading.Event()
+    crew = StreamingCrew(["Final Answer: too late"], release=release)
+    pool = make_pool(monkeypatch, crew)
+
+    async def main():
+        received = []
+
+        async def client():
+            async for event in pool.stream({"query": "q"}):
+                received.append(event)
+
+        reading = asyncio.ensure_future(client())
+        await wait_for(lambda: received)
+        # The server cancels the response task when the client goes away
+        reading.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await reading
+        # The kickoff cannot be interrupted: it holds capacity until it returns
+        assert (pool.in_flight, pool.abandoned) == (0, 1)
+
+        release.set()
+        await wait_for(lambda: pool.abandoned == 0)
+        return received
+
+    try:
+        received = asyncio.run(main())
+    finally:
+        release.set()
+        pool.close()
+    assert crew.finished.is_set()
+    # Nothing emitted after the disconnect is routed to the request any more
+    assert received == [("task_started", {"task": "analyze", "agent": "Analyst"})]
+    assert pool._relay._tasks == {}
+
+
+def stream_events(pool) -> list:
+    app.dependency_overrides[get_crews] = lambda: pool
+    app.dependency_overrides[get_answers] = lambda: AnswerCache(ttl_seconds=0)
+    try:
+        response = TestClient(app).post("/search/stream", json={"query": "q"})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return [line.removeprefix("event: ") for line in response.text.splitlines() if line.startswith("event: ")]
+
+
+def test_sse_endpoint_ends_with_answer_or_error(monkeypatch):
+    answered = make_pool(monkeypatch, StreamingCrew(["Final Answer: Use", " make."]))
+    failed = make_pool(monkeypatch, StreamingCrew(["Final Answer: Use"], error="boom"))
+    try:
+        assert stream_events(answered) == ["task_started", "token", "token", "task_completed", "answer"]
+        assert stream_events(failed) == ["task_started", "token", "task_failed", "error"]
+    finally:
+        answered.close()
+        failed.close()
@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from nexlify_ai_agentics_server.app import app
+from nexlify_ai_agentics_server.telemetry import observe_stage, span
+
+
+def test_metrics_endpoint_exports_parseable_stage_and_request_series():
+    api = TestClient(app)  # no lifespan: /metrics needs neither the crews nor the answer cache
+    with span("test.metrics"):
+        pass
+    observe_stage("test.metrics", 0.5, status="error")
+    api.get("/metrics")
+
+    response = api.get("/metrics")
+    assert response.status_code == 200
+    families = {family.name: family for family in text_string_to_metric_families(response.text)}
+
+    stages = families["nexlify_stage_seconds"]
+    assert stages.type == "histogram"
+    counts = {sample.labels["status"]: sample.value for sample in stages.samples
+              if sample.name == "nexlify_stage_seconds_count" and sample.labels["stage"] == "test.metrics"}
+    assert counts == {"ok": 1, "error": 1}
+    [half_second] = [sample for sample in stages.samples
+                     if sample.name == "nexlify_stage_seconds_bucket" and sample.labels["stage"] == "test.metrics"
+                     and sample.labels["status"] == "error" and sample.labels["le"] == "0.5"]
+    assert half_second.value == 1
+
+    requests = families["nexlify_http_request_seconds"]
+    assert any(sample.name == "nexlify_http_request_seconds_count"
+               and sample.labels == {"method": "GET", "route": "/metrics", "status": "200"}
+               for sample in requests.samples)
@@ -1,31 +1,120 @@
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 import httpx
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+import json
 import logging
 import os
-
-# Initialize FastMCP server
-mcp = FastMCP(name = "Nexlify MCP Server", version = "0.1.3")
-logging.basicConfig(level=logging.INFO)
+import time
+from uuid import uuid4
 
 # Constants
 USER_AGENT = "nexlify_mcp_server/1.0"
 NEXLIFY_API_BASE_URI = os.environ.get("NEXLIFY_API_BASE_URI", "http://0.0.0.0:8000")
-MCP_TIMEOUT = os.environ.get("MCP_TIMEOUT", "500") # 500 seconds
+MCP_TIMEOUT = float(os.environ.get("MCP_TIMEOUT", 500)) # Seconds to wait for the next response data
+MCP_CONNECT_TIMEOUT = float(os.environ.get("MCP_CONNECT_TIMEOUT", 10)) # Seconds
+MCP_MAX_CONNECTIONS = int(os.environ.get("MCP_MAX_CONNECTIONS", 10))
+# Sent with every search and forwarded by the agentics server to the ingestion server
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[httpx.AsyncClient]:
+    """One pooled client for the server's lifetime, so tool calls reuse warm connections."""
+    async with httpx.AsyncClient(
+        base_url=NEXLIFY_API_BASE_URI,
+        headers={"User-Agent": USER_AGENT},
+        timeout=httpx.Timeout(MCP_TIMEOUT, connect=MCP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=MCP_MAX_CONNECTIONS, max_keepalive_connections=MCP_MAX_CONNECTIONS),
+    ) as client:
+        yield client
+
+
+# Initialize FastMCP server
+mcp = FastMCP(name = "Nexlify MCP Server", version = "0.1.3", lifespan = lifespan)
+logging.basicConfig(level=logging.INFO)
 
 
 DEFAULT_ERROR_MESSAGE = "Sorry, we couldn't process your request to the Nexlify API server at this time. Please try again later."
 
+# Crew tasks reported as progress by the streaming search
+SEARCH_STEPS = {
+    "vector_db_search_task": "Searching the internal documentation",
+    "internet_search_task": "Searching the web",
+    "result_analyzer_task": "Writing the answer",
+}
+
+
+async def iter_sse(response: httpx.Response) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Parses a Server-Sent Events response into (event, data) pairs."""
+    event, data = "message", []
+    async for line in response.aiter_lines():
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
+
+async def stream_search(client: httpx.AsyncClient, query: str, ctx: Context,
+                        headers: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    Relays the agentics server's /search/stream to the MCP client: task progress as
+    progress notifications and the answer as log messages, one line at a time.
+    Returns the full answer, or None when the server has no streaming endpoint.
+    """
+    async with client.stream("POST", "/search/stream", json={"query": query}, headers=headers) as response:
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        completed, pending = 0, ""
+        async for event, data in iter_sse(response):
+            if event == "task_started":
+                step = SEARCH_STEPS.get(data["task"], data["task"])
+                await ctx.report_progress(completed, len(SEARCH_STEPS), f"{step}...")
+            elif event in ("task_completed", "task_failed"):
+                completed += 1
+                await ctx.report_progress(completed, len(SEARCH_STEPS))
+            elif event == "token":
+                pending += data["text"]
+                if "\n" in pending:
+                    lines, _, pending = pending.rpartition("\n")
+                    await ctx.info(lines)
+            elif event == "answer":
+                return data.get("response", DEFAULT_ERROR_MESSAGE)
+            elif event == "error":
+                return data.get("detail", DEFAULT_ERROR_MESSAGE)
+    return DEFAULT_ERROR_MESSAGE
+
+
 @mcp.tool(name = "nexlify_search", description="Search confluence pages using the Nexlify API")
-def nexlify_search(query: str) -> str:
+async def nexlify_search(query: str, ctx: Context) -> str:
     """    Search confluence pages using the Nexlify API.
     Args:
         query (str): The search query.
     Returns:
         str: The search results.
     """
-    res = httpx.post(f"{NEXLIFY_API_BASE_URI}/search", json={"query": query}, headers={"User-Agent": USER_AGENT}, timeout=int(MCP_TIMEOUT)).json()
-    return res.get("response", DEFAULT_ERROR_MESSAGE)
+    client: httpx.AsyncClient = ctx.request_context.lifespan_context
+    # One id per tool call, to find this search in the agentics and ingestion server logs
+    request_id = uuid4().hex
+    headers = {REQUEST_ID_HEADER: request_id}
+    started = time.perf_counter()
+    try:
+        answer = await stream_search(client, query, ctx, headers)
+        if answer is None:
+            # Agentics servers without /search/stream answer in one response
+            res = (await client.post("/search", json={"query": query}, headers=headers)).json()
+            answer = res.get("response", DEFAULT_ERROR_MESSAGE)
+        logging.info(f"Nexlify search {request_id} answered in {time.perf_counter() - started:.2f}s")
+        return answer
+    except httpx.HTTPError as e:
+        logging.error(f"Nexlify search {request_id} failed: {e}")
+        return DEFAULT_ERROR_MESSAGE
 
 
 def run() -> None: